@@ -0,0 +1,185 @@
+# apps/api/batch.py
+"""
+Multiplexed API calls for the mobile home screen.
+
+POST /api/batch/
+{
+    "requests": [
+        {"id": "chamas", "method": "GET", "path": "/api/chamas/"},
+        {"id": "c1", "method": "GET", "path": "/api/chamas/1/members/"},
+        {"id": "mine", "method": "GET", "path": "/api/contributions/", "query": "limit=20"}
+    ]
+}
+
+Sub-requests resolve against apps.api.urls and reuse the batch's
+authentication, tenant and shard. DRF and @async_endpoint views get the
+user through forced auth and do not authenticate again. Runs of consecutive GET/HEAD
+sub-requests execute concurrently. Sync views run in a small worker pool
+whose threads keep their own persistent, tenant-bound connections.
+Writes run one at a time, in order, on the request's own connection.
+The response lists each sub-response's status and body, in request order.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.http import HttpRequest, HttpResponse, JsonResponse, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+from apps.auth_app.replicas import current_replica
+from apps.auth_app.sharding import current_shard
+from apps.core.async_api import async_endpoint
+
+API_PREFIX = "/api/"
+SAFE_METHODS = ("GET", "HEAD")
+ALLOWED_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE")
+
+_executor = ThreadPoolExecutor(max_workers=settings.BATCH_WORKERS, thread_name_prefix="api-batch")
+
+
+class BatchError(ValueError):
+    pass
+
+
+class SubRequest(HttpRequest):
+    def _get_scheme(self):
+        # Plain HttpRequest always reports "http"; keep the batch's scheme
+        return self.META["wsgi.url_scheme"]
+
+
+def _sub_request(request, spec):
+    if not isinstance(spec, dict):
+        raise BatchError("Each sub-request must be an object")
+    method = str(spec.get("method", "GET")).upper()
+    if method not in ALLOWED_METHODS:
+        raise BatchError(f"Method {method} not allowed")
+    path = str(spec.get("path", ""))
+    if path.startswith(API_PREFIX):
+        path = path[len(API_PREFIX) - 1:]
+    elif not path.startswith("/"):
+        path = "/" + path
+    path, _, query = path.partition("?")
+    query = spec.get("query", query)
+    if not isinstance(query, str):
+        raise BatchError('"query" must be a query string, e.g. "limit=20"')
+
+    match = resolve(path, urlconf="apps.api.urls")
+    if match.func is batch:
+        raise BatchError("Batches cannot be nested")
+
+    sub = SubRequest()
+    sub.method = method
+    sub.path = sub.path_info = API_PREFIX.rstrip("/") + path
+    sub.META = {k: v for k, v in request.META.items() if k.startswith(("HTTP_", "SERVER_", "REMOTE_"))}
+    sub.META.update(REQUEST_METHOD=method, QUERY_STRING=query, PATH_INFO=sub.path, HTTP_ACCEPT="application/json",
+                    SERVER_NAME=request.META.get("SERVER_NAME", "localhost"), SERVER_PORT=request.get_port())
+    sub.META["wsgi.url_scheme"] = request.scheme
+    sub.GET = QueryDict(query)
+    body = json.dumps(spec["body"]).encode() if spec.get("body") is not None else b""
+    sub.META.update(CONTENT_TYPE="application/json", CONTENT_LENGTH=str(len(body)))
+    sub._body = body
+    sub._stream = BytesIO(body)
+    sub._read_started = False
+    sub.tenant = request.tenant
+    sub.user, sub.auth = request.user, request.auth
+    # DRF and aauthenticate() use these instead of running the authenticators again
+    sub._force_auth_user, sub._force_auth_token = request.user, request.auth
+    sub.resolver_match = match
+    return sub, match
+
+
+def _finish(sub, response):
+    if hasattr(response, "render") and callable(response.render):
+        response = response.render()
+    return response
+
+
+def _call_sync(sub, match, tenant, aliases):
+    """Run a sync view in a batch worker with its connections on the tenant."""
+    close_old_connections()   # honours CONN_MAX_AGE / health checks for the worker's connections
+    for alias in aliases:
+        connections[alias].set_tenant(tenant)
+    try:
+        return _finish(sub, match.func(sub, *match.args, **match.kwargs))
+    except Exception as exc:
+        return response_for_exception(sub, exc)
+    finally:
+        for alias in aliases:
+            connections[alias].set_schema_to_public()
+
+
+def _call_sync_here(sub, match):
+    try:
+        return _finish(sub, match.func(sub, *match.args, **match.kwargs))
+    except Exception as exc:
+        return response_for_exception(sub, exc)
+
+
+async def _execute(sub, match, concurrent, aliases):
+    if asyncio.iscoroutinefunction(match.func):
+        try:
+            return await match.func(sub, *match.args, **match.kwargs)
+        except Exception as exc:
+            return await sync_to_async(response_for_exception)(sub, exc)
+    if concurrent:
+        return await sync_to_async(_call_sync, thread_sensitive=False, executor=_executor)(
+            sub, match, sub.tenant, aliases)
+    return await sync_to_async(_call_sync_here)(sub, match)
+
+
+def _encode(entry_id, response):
+    content_type = response.get("Content-Type", "")
+    if response.streaming:
+        body = json.dumps("<streaming response omitted>").encode()
+    elif content_type.startswith("application/json") and response.content:
+        body = response.content   # spliced in as-is, no re-parse
+    else:
+        body = json.dumps(response.content.decode(response.charset or "utf-8", "replace")).encode()
+    head = json.dumps({"id": entry_id, "status": response.status_code})[:-1]
+    return head.encode() + b',"body":' + body + b"}"
+
+
+@async_endpoint(["POST"])
+async def batch(request):
+    specs = request.data.get("requests")
+    if not isinstance(specs, list) or not specs:
+        return JsonResponse({"error": 'A non-empty "requests" list is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(specs) > settings.BATCH_MAX_REQUESTS:
+        return JsonResponse({"error": f"At most {settings.BATCH_MAX_REQUESTS} sub-requests per batch"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    aliases = {DEFAULT_DB_ALIAS, current_shard() or DEFAULT_DB_ALIAS, current_replica()} - {None}
+    results = [None] * len(specs)
+    pending = []   # consecutive safe sub-requests waiting to run together
+
+    async def flush():
+        responses = await asyncio.gather(*(_execute(sub, match, True, aliases) for _, sub, match in pending))
+        for (index, _, _), response in zip(pending, responses):
+            results[index] = response
+        pending.clear()
+
+    for index, spec in enumerate(specs):
+        try:
+            sub, match = _sub_request(request, spec)
+        except Resolver404:
+            results[index] = JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+            continue
+        except BatchError as exc:
+            results[index] = JsonResponse({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            continue
+        if sub.method in SAFE_METHODS:
+            pending.append((index, sub, match))
+            continue
+        await flush()
+        results[index] = await _execute(sub, match, False, aliases)
+    await flush()
+
+    parts = [_encode(spec.get("id", index) if isinstance(spec, dict) else index, response)
+             for index, (spec, response) in enumerate(zip(specs, results))]
+    return HttpResponse(b'{"responses":[' + b",".join(parts) + b"]}", content_type="application/json")
@@ -0,0 +1,106 @@
+# apps/api/flat.py
+"""
+Read-only "flat" serializers for the hot list endpoints.
+
+A FlatSerializer builds response rows straight from QuerySet.values_list()
+tuples. No model instances are created and there is no per-field
+to_representation dispatch; values go to FastJSONRenderer as the database
+returned them. `fields` maps each output key to one of:
+  * an ORM lookup ("created_by__email", or an annotation name);
+  * a dict of key → lookup, giving a nested object (None when its
+    first lookup is NULL);
+  * a (lookups, function) pair, computed from those columns.
+The output matches the ModelSerializer it stands in for.
+
+for_request() applies ?fields= / ?expand= (see sparse.py). `collapsed`
+gives the lookup an expandable key falls back to when it is not
+expanded. Only the selected lookups are read, so a key that is left out
+costs no join.
+"""
+from functools import lru_cache
+from operator import itemgetter
+
+from .sparse import requested
+
+
+@lru_cache(maxsize=256)
+def _variant(cls, fields, expand):
+    spec = {}
+    for key, value in cls.fields.items():
+        if fields is not None and key not in fields:
+            continue
+        if expand is not None and key in cls.collapsed and key not in expand:
+            value = cls.collapsed[key]
+        spec[key] = value
+    return type(cls.__name__, (cls,), {"fields": spec})
+
+
+class FlatSerializer:
+    fields = {}
+    collapsed = {}
+
+    @classmethod
+    def for_request(cls, request):
+        """The serializer restricted to the request's ?fields= / ?expand=."""
+        fields, expand = requested(request)
+        if fields is None and expand is None:
+            return cls
+        known = frozenset(cls.fields)
+        return _variant(
+            cls,
+            None if fields is None else frozenset(fields) & known,
+            None if expand is None else frozenset(expand) & known,
+        )
+
+    @classmethod
+    def _plan(cls):
+        plan = cls.__dict__.get("_compiled")
+        if plan is not None:
+            return plan
+        lookups, plain, nested, computed = [], [], [], []
+
+        def column(lookup):
+            lookups.append(lookup)
+            return len(lookups) - 1
+
+        for key, spec in cls.fields.items():
+            if isinstance(spec, str):
+                plain.append((key, column(spec)))
+            elif isinstance(spec, dict):
+                nested.append((key, [(sub, column(lookup)) for sub, lookup in spec.items()]))
+            else:
+                columns, function = spec
+                computed.append((key, [column(lookup) for lookup in columns], function))
+        names = [key for key, _ in plain]
+        indexes = [index for _, index in plain]
+        if len(indexes) > 1:
+            getter = itemgetter(*indexes)
+        else:
+            getter = lambda values: tuple(values[i] for i in indexes)  # noqa: E731
+        plan = cls._compiled = (lookups, list(cls.fields), names, getter, nested, computed)
+        return plan
+
+    @classmethod
+    def lookups(cls):
+        return cls._plan()[0]
+
+    @classmethod
+    def to_row(cls, values):
+        _, keys, names, getter, nested, computed = cls._plan()
+        row = dict.fromkeys(keys)   # keeps the serializer's key order
+        row.update(zip(names, getter(values)))
+        for key, columns in nested:
+            row[key] = None if values[columns[0][1]] is None else {sub: values[i] for sub, i in columns}
+        for key, indexes, function in computed:
+            row[key] = function(*(values[i] for i in indexes))
+        return row
+
+    @classmethod
+    def rows(cls, queryset):
+        to_row = cls.to_row
+        return [to_row(values) for values in queryset.values_list(*cls.lookups())]
+
+    @classmethod
+    async def arows(cls, queryset):
+        to_row = cls.to_row
+        return [to_row(values) async for values in queryset.values_list(*cls.lookups())]
@@ -0,0 +1,59 @@
+# apps/api/renderers.py
+"""
+orjson-backed JSON rendering and parsing for DRF and the async views.
+
+orjson handles the core JSON types in C, including datetime/date/time
+(UTC written as "Z", as DRF does) and UUID. Decimal is written as a
+string, matching DRF's COERCE_DECIMAL_TO_STRING. Any other type goes to
+DRF's JSONEncoder.default (lazy strings, timedelta, querysets, …).
+"""
+from decimal import Decimal
+
+import orjson
+from django.http import HttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _fallback.default(obj)
+
+
+def dumps(data, indent=False):
+    return orjson.dumps(data, default=_default, option=_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+
+def json_response(data, status=200, headers=None):
+    """JsonResponse equivalent for the async views, rendered with orjson."""
+    return HttpResponse(dumps(data), status=status, headers=headers, content_type="application/json")
+
+
+class FastJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None   # orjson always writes UTF-8
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # The browsable API asks for an indented copy
+        indent = (renderer_context or {}).get("indent")
+        return dumps(data, indent=bool(indent))
+
+
+class FastJSONParser(BaseParser):
+    media_type = "application/json"
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read() if stream is not None else b"")
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,87 @@
+# apps/api/sparse.py
+"""
+?fields= and ?expand= for the chama, member and contribution endpoints.
+
+    GET /api/chamas/1/?fields=id,name,member_count
+    GET /api/chamas/?expand=            (created_by collapses to its id)
+
+`fields` keeps only the listed top-level fields. `expand` names the
+relations to render nested; every other expandable relation collapses to
+its primary key(s). Without the parameter, relations render nested as
+before.
+
+The queryset follows the selection. optimize_queryset() defers the
+columns nobody asked for and calls setup_<field>(queryset, request,
+expanded) for each selected field. Those hooks add joins, annotations and
+prefetches only when their field is in the response.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _names(params, key):
+    raw = params.get(key)
+    if raw is None:
+        return None
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+def requested(request):
+    """(fields, expand) from the query string; None when a parameter is absent."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    params = getattr(request, "query_params", request.GET)
+    return _names(params, "fields"), _names(params, "expand")
+
+
+class SparseFieldsMixin:
+    """ModelSerializer mixin; list it before the serializer base class."""
+    # expandable field -> callable returning the field used when collapsed
+    collapsed_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = requested(self.context.get("request"))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+        if expand is not None:
+            for name, collapsed in self.collapsed_fields.items():
+                if name in self.fields and name not in expand:
+                    self.fields[name] = collapsed()
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        fields, expand = requested(request)
+        declared = cls().fields
+        selected = [name for name in declared if fields is None or name in fields]
+
+        for name in selected:
+            hook = getattr(cls, f"setup_{name}", None)
+            if hook is not None:
+                queryset = hook(queryset, request, expand is None or name in expand)
+
+        if fields is not None:
+            opts = queryset.model._meta
+            columns = {opts.pk.name}
+            for name in selected:
+                source = declared[name].source
+                try:
+                    model_field = opts.get_field(source)
+                except FieldDoesNotExist:
+                    continue
+                if model_field.concrete:
+                    columns.add(model_field.name)
+            queryset = queryset.only(*columns)
+        return queryset
+
+
+class SparseFieldsViewSetMixin:
+    """Trims get_queryset() to what the action's serializer will render."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "optimize_queryset"):
+            queryset = serializer_class.optimize_queryset(queryset, self.request)
+        return queryset
@@ -0,0 +1,52 @@
+# apps/api/streaming.py
+"""
+Constant-memory JSON list responses.
+
+streaming_json_response() writes a FlatSerializer's rows as one JSON array.
+It reads them in STREAM_CHUNK_SIZE batches through QuerySet.aiterator(),
+which uses a server-side cursor on Postgres, and encodes each batch with
+orjson as it goes. At most one batch of rows is in memory at a time,
+however long the list is.
+
+The body is produced after the middleware has returned. By then
+TenantConnectionMiddleware has put the connections back on public, so
+the stream binds the tenant's shard and schema again itself.
+
+Memory stays constant only under ASGI. Under WSGI, Django buffers async
+iterators. With DB_TRANSACTION_POOLING, server-side cursors are off and
+the driver fetches the full result set.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from apps.auth_app.sharding import atenant_shard
+
+from .renderers import dumps
+
+
+def wants_stream(request):
+    params = getattr(request, "query_params", request.GET)
+    return params.get("stream", "").lower() in ("1", "true", "yes")
+
+
+async def _json_rows(serializer, queryset, tenant, chunk_size):
+    to_row = serializer.to_row
+    async with atenant_shard(tenant):
+        yield b"["
+        separator, batch = b"", []
+        async for values in queryset.values_list(*serializer.lookups()).aiterator(chunk_size=chunk_size):
+            batch.append(to_row(values))
+            if len(batch) >= chunk_size:
+                yield separator + dumps(batch)[1:-1]
+                separator, batch = b",", []
+        if batch:
+            yield separator + dumps(batch)[1:-1]
+        yield b"]"
+
+
+def streaming_json_response(request, serializer, queryset, chunk_size=None):
+    """Stream `queryset` through `serializer` (a FlatSerializer) as a JSON array."""
+    rows = _json_rows(serializer, queryset, request.tenant, chunk_size or settings.STREAM_CHUNK_SIZE)
+    response = StreamingHttpResponse(rows, content_type="application/json")
+    response["X-Accel-Buffering"] = "no"
+    return response
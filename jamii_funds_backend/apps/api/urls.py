@@ -4,15 +4,24 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 # Import your viewsets
-from apps.chamas.views import ChamaViewSet
-#from apps.contributions.views import ContributionViewSet
+from .batch import batch
+from apps.core.views import profiling_toggle
+from apps.chamas.views import ChamaViewSet, chama_list
+from apps.contributions.views import ContributionViewSet, contribute, contribution_export, contribution_list
 #from apps.payments.views import PaymentViewSet
 
 router = DefaultRouter()
 router.register(r'chamas', ChamaViewSet, basename='chama')
-#router.register(r'contributions', ContributionViewSet, basename='contribution')
+router.register(r'contributions', ContributionViewSet, basename='contribution')
 #router.register(r'payments', PaymentViewSet, basename='payment')
 
 urlpatterns = [
+    path('batch/', batch, name='batch'),
+    # Async (ASGI) hot paths, matched before the router's sync routes
+    path('chamas/', chama_list, name='chama-list-async'),
+    path('contributions/', contribution_list, name='contribution-list-async'),
+    path('contributions/contribute/', contribute, name='contribution-contribute'),
+    path('contributions/export/', contribution_export, name='contribution-export'),
+    path('profiling/', profiling_toggle, name='profiling-toggle'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
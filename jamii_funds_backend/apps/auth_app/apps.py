@@ -3,4 +3,15 @@ from django.apps import AppConfig
 class AuthAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.auth_app"
-    label = "auth_app"
\ No newline at end of file
+    label = "auth_app"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from rest_framework.authtoken.models import Token
+        from .authentication import token_changed, user_changed
+        from .models import User
+
+        post_save.connect(token_changed, sender=Token, dispatch_uid="token_cache_token_saved")
+        post_delete.connect(token_changed, sender=Token, dispatch_uid="token_cache_token_deleted")
+        post_save.connect(user_changed, sender=User, dispatch_uid="token_cache_user_saved")
+        post_delete.connect(user_changed, sender=User, dispatch_uid="token_cache_user_deleted")
\ No newline at end of file
@@ -0,0 +1,180 @@
+# apps/auth_app/authentication.py
+"""
+Drop-in replacement for DRF's TokenAuthentication that keeps key → user
+snapshots in a bounded, per-process TTL cache.
+
+Each user has a generation stamp in the shared cache (CACHES). Saving or
+deleting the user or their token, and User.objects...update(), replace
+the stamp. Every hit checks it, one cache read, so a logged-out token or
+deactivated user stops working on every worker at once, not when the
+entry's TTL (TOKEN_AUTH_CACHE_TTL) runs out. This needs a cache shared by
+the workers (Redis, memcached); with LocMemCache only this process sees it.
+If the shared cache cannot be read, lookups go to the database.
+"""
+import copy
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.authentication import TokenAuthentication
+
+from apps.core.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+GENERATION_PREFIX = "tokenauth:gen"
+GENERATION_TIMEOUT = 86400   # a missing stamp only costs a miss
+
+
+class TokenUserCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # (schema, key) -> (expires, user, token, generation)
+        self._by_user = {}              # (schema, user_pk) -> {(schema, key)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(cache_key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return entry[1], entry[2], entry[3]
+
+    def discard_stale(self, cache_key):
+        """Drop an entry whose generation is outdated; the lookup counts as a miss."""
+        with self._lock:
+            self._drop(cache_key)
+            self.hits -= 1
+            self.misses += 1
+            self.stale += 1
+
+    def set(self, cache_key, user, token, generation):
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl, user, token, generation)
+            self._entries.move_to_end(cache_key)
+            self._by_user.setdefault((cache_key[0], user.pk), set()).add(cache_key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, cache_key):
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            user_key = (cache_key[0], entry[1].pk)
+            keys = self._by_user.get(user_key)
+            if keys:
+                keys.discard(cache_key)
+                if not keys:
+                    del self._by_user[user_key]
+
+    def invalidate_key(self, schema, key):
+        with self._lock:
+            self._drop((schema, key))
+
+    def invalidate_user(self, schema, user_pk):
+        with self._lock:
+            for cache_key in list(self._by_user.get((schema, user_pk), ())):
+                self._drop(cache_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                # entries invalidated through the shared generation stamp
+                "stale": self.stale,
+                # every miss costs one token+user query
+                "db_queries": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+token_cache = TokenUserCache(settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_TTL)
+
+
+@CACHE_LOOKUPS.collect_from
+def _token_cache_lookups():
+    return {("token_auth", "hit"): token_cache.hits, ("token_auth", "miss"): token_cache.misses}
+
+
+def _schema():
+    return getattr(connection, "schema_name", "public")
+
+
+def _generation_key(schema, user_pk):
+    return f"{GENERATION_PREFIX}:{schema}:{user_pk}"
+
+
+def current_generation(schema, user_pk, create=False):
+    """The user's shared stamp (created if asked and missing); None when unknown."""
+    key = _generation_key(schema, user_pk)
+    try:
+        if create:
+            return cache.get_or_set(key, lambda: uuid.uuid4().hex, timeout=GENERATION_TIMEOUT)
+        return cache.get(key)
+    except Exception:
+        logger.warning("Token auth generation cache unavailable", exc_info=True)
+        return None
+
+
+def invalidate_users(schema, user_pks):
+    """Invalidate the users' cached tokens here and, through the shared stamp, on every worker."""
+    for pk in user_pks:
+        token_cache.invalidate_user(schema, pk)
+        try:
+            cache.set(_generation_key(schema, pk), uuid.uuid4().hex, timeout=GENERATION_TIMEOUT)
+        except Exception:
+            logger.warning("Could not invalidate cached tokens of user %s on other workers", pk, exc_info=True)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        schema = _schema()
+        cache_key = (schema, key)
+        cached = token_cache.get(cache_key)
+        if cached is not None:
+            user, token, generation = cached
+            if generation == current_generation(schema, user.pk):
+                return copy.copy(user), token
+            token_cache.discard_stale(cache_key)
+
+        user, token = super().authenticate_credentials(key)
+        generation = current_generation(schema, user.pk, create=True)
+        if generation is not None:
+            token_cache.set(cache_key, copy.copy(user), token, generation)
+        return user, token
+
+
+# ────────────────────── INVALIDATION (connected in AuthAppConfig.ready) ──────────────────────
+def token_changed(sender, instance, **kwargs):
+    token_cache.invalidate_key(_schema(), instance.key)
+    invalidate_users(_schema(), [instance.user_id])
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_users(_schema(), [instance.pk])
@@ -0,0 +1,96 @@
+# apps/auth_app/hashing.py
+"""
+Password hashing off the request thread.
+
+Hash verification runs in a bounded executor (LOGIN_HASH_EXECUTOR =
+"thread" or "process", LOGIN_HASH_WORKERS wide). hashlib's PBKDF2
+releases the GIL, so threads already scale across cores. At most
+LOGIN_HASH_MAX_PENDING verifications may be queued; beyond that callers
+get HashPoolBusy instead of piling up behind the pool.
+"""
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+from apps.core.metrics import QUEUE_DEPTH
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if settings.LOGIN_HASH_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(max_workers=settings.LOGIN_HASH_WORKERS)
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix="login-hash"
+                )
+        return _executor
+
+
+def preferred_hasher():
+    return get_hasher(settings.LOGIN_PREFERRED_HASHER or "default")
+
+
+def _verify(raw_password, encoded):
+    """Return (valid, new_encoded); new_encoded is set when the hash should be upgraded."""
+    if not check_password(raw_password, encoded):
+        return False, None
+    hasher = preferred_hasher()
+    try:
+        current = identify_hasher(encoded)
+    except ValueError:
+        current = None
+    if current is None or current.algorithm != hasher.algorithm or hasher.must_update(encoded):
+        return True, make_password(raw_password, hasher=hasher)
+    return True, None
+
+
+def _dummy_hash(raw_password):
+    # Same cost as a real check so unknown emails can't be told apart by timing
+    make_password(raw_password)
+    return False, None
+
+
+async def _submit(fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.LOGIN_HASH_MAX_PENDING:
+            raise HashPoolBusy()
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), fn, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def averify_password(raw_password, encoded):
+    """
+    Verify raw_password against encoded in the hash pool.
+    Pass encoded=None for an unknown user to spend the same time.
+    """
+    if encoded is None:
+        return await _submit(_dummy_hash, raw_password)
+    return await _submit(_verify, raw_password, encoded)
+
+
+def pending():
+    return _pending
+
+
+QUEUE_DEPTH.collect_from(lambda: {("login_hash",): _pending})
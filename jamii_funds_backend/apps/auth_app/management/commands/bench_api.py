@@ -0,0 +1,334 @@
+# apps/auth_app/management/commands/bench_api.py
+"""
+Query-budget and latency benchmarks for the HTTP API.
+
+For every --sizes entry (chamas x members per chama x contributions per
+member) a bench tenant is seeded afresh (--reuse keeps the previous
+run's, which the writing scenarios have grown) and every scenario is run
+through the full middleware stack with Django's test client. Per scenario
+and size it records the SQL statement count (from the Server-Timing header
+set by InstrumentationMiddleware), p50/p95 latency and throughput.
+
+Server-Timing is sent before a streaming body (?stream=1, exports) is
+produced, so those counts miss the queries that fetch the rows. They are
+marked "+" and left out of the growth check.
+
+The run fails when:
+  * a scenario issues more queries at a larger size than at the smallest
+    (an N+1 that grows with the data);
+  * queries exceed the recorded baseline;
+  * p50 latency is more than --threshold above the recorded baseline.
+--update-baselines writes the current numbers to the baselines file instead.
+"""
+import json
+import re
+import statistics
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client as HttpClient, override_settings
+from django.urls import URLPattern, URLResolver, resolve
+from rest_framework.authtoken.models import Token
+
+from apps.api import urls as api_urls
+from apps.auth_app.models import Client, Domain, User
+from apps.auth_app.sharding import tenant_shard
+from apps.chamas.models import Chama, Member
+from apps.contributions.models import Contribution, ContributionType
+from apps.sync.models import current_usn
+
+SERVER_TIMING_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+PASSWORD = "bench-password-123"
+CALLBACK_TOKEN = "bench-callback"   # MPESA_CALLBACK_TOKEN while benchmarking
+
+
+def _parse_size(value):
+    try:
+        chamas, members, contributions = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise CommandError(f"Invalid size '{value}' (use CHAMASxMEMBERSxCONTRIBUTIONS, e.g. 5x20x10)")
+    return chamas, members, contributions
+
+
+# ────────────────────── SCENARIOS ──────────────────────
+# (name, method, path, body(ctx, i) or None, staff token?, expected status)
+SCENARIOS = [
+    # auth
+    ("auth.register", "POST", "/api/auth/register/",
+     lambda ctx, i: {"email": f"bench-reg-{ctx['run']}-{i}@bench.local", "password": PASSWORD}, False, 201),
+    ("auth.login", "POST", "/api/auth/login/",
+     lambda ctx, i: {"email": ctx["email"], "password": PASSWORD}, False, 200),
+    ("auth.token_cache", "GET", "/api/auth/token-cache/", None, True, 200),
+    # api router + async hot paths
+    ("api.root", "GET", "/api/", None, True, 200),
+    ("chamas.list", "GET", "/api/chamas/", None, True, 200),
+    ("chamas.list.sparse", "GET", "/api/chamas/?fields=id,name,member_count", None, True, 200),
+    ("chamas.list.stream", "GET", "/api/chamas/?stream=1", None, True, 200),
+    ("chamas.create", "POST", "/api/chamas/",
+     lambda ctx, i: {"name": f"Bench chama {ctx['run']}-{i}", "description": "bench"}, True, 201),
+    ("chamas.retrieve", "GET", "/api/chamas/{chama}/", None, True, 200),
+    ("chamas.update", "PATCH", "/api/chamas/{chama}/", lambda ctx, i: {"description": f"bench {i}"}, True, 200),
+    ("chamas.members", "GET", "/api/chamas/{chama}/members/", None, True, 200),
+    ("chamas.members.stream", "GET", "/api/chamas/{chama}/members/?stream=1", None, True, 200),
+    ("chamas.set_role", "PATCH", "/api/chamas/{chama}/members/",
+     lambda ctx, i: {"user_id": ctx["member_user"], "role": "member"}, True, 200),
+    ("chamas.join", "POST", "/api/chamas/{chama}/join/", None, True, 400),
+    ("chamas.leave", "POST", "/api/chamas/{chama}/leave/", None, True, 400),
+    ("contributions.list", "GET", "/api/contributions/", None, True, 200),
+    ("contributions.retrieve", "GET", "/api/contributions/{contribution}/", None, True, 200),
+    ("contributions.export", "GET", "/api/contributions/export/", None, True, 200),
+    ("api.batch", "POST", "/api/batch/", lambda ctx, i: {"requests": [
+        {"id": "chamas", "method": "GET", "path": "/api/chamas/"},
+        {"id": "members", "method": "GET", "path": f"/api/chamas/{ctx['chama']}/members/"},
+        {"id": "mine", "method": "GET", "path": "/api/contributions/"},
+    ]}, True, 200),
+    ("api.profiling", "GET", "/api/profiling/", None, True, 200),
+    ("sync.full", "GET", "/api/sync/", None, True, 200),
+    # payments (callbacks come from Daraja, unauthenticated)
+    ("payments.stk_callback", "POST", "/api/payments/c2b/?token=" + CALLBACK_TOKEN,
+     lambda ctx, i: {"Body": {"stkCallback": {
+         "CheckoutRequestID": f"ws_CO_bench_{ctx['run']}_{i}", "ResultCode": 0}}}, False, 200),
+    ("payments.c2b_validation", "POST", "/api/payments/c2b/validation/?token=" + CALLBACK_TOKEN,
+     lambda ctx, i: {"TransID": f"BV{ctx['run']}{i}"}, False, 200),
+    ("payments.c2b_confirmation", "POST", "/api/payments/c2b/confirmation/?token=" + CALLBACK_TOKEN,
+     lambda ctx, i: {
+        "TransID": f"BC{ctx['run']}{i}", "TransAmount": "50", "MSISDN": "254700000000",
+        "BillRefNumber": f"C{ctx['chama']}-{ctx['member']}", "TransTime": "20240101000000"}, False, 200),
+    ("payments.daraja_status", "GET", "/api/payments/daraja/status/", None, True, 200),
+]
+
+SKIPPED_ROUTES = {
+    "contribution-contribute",   # calls Daraja
+    # shadowed by the async list views (chamas fall back to the viewset for POST)
+    "chama-list",
+    "contribution-list",
+}
+
+
+def api_route_names():
+    """Named routes under apps.api.urls (router and explicit paths)."""
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.add(pattern.name)
+
+    walk(api_urls.urlpatterns)
+    return names
+
+
+def uncovered_routes(scenarios):
+    covered = set()
+    for _, _, path, _, _, _ in scenarios:
+        path = path.format(chama=1, contribution=1).split("?")[0]
+        covered.add(resolve(path).url_name)
+    return api_route_names() - covered - SKIPPED_ROUTES
+
+
+class Command(BaseCommand):
+    help = "Seed bench tenants, run every API scenario, check query budgets and compare latency to baselines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", default=["2x5x5", "10x25x20"],
+                            help="CHAMASxMEMBERSxCONTRIBUTIONS per bench tenant, smallest first")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--only", nargs="*", help="Scenario name prefixes to run")
+        parser.add_argument("--baselines", default=str(settings.BASE_DIR.parent / "benchmarks" / "baselines.json"))
+        parser.add_argument("--threshold", type=float, default=0.25,
+                            help="Allowed p50 slowdown against the baseline (0.25 = 25%%)")
+        parser.add_argument("--update-baselines", action="store_true")
+        parser.add_argument("--reuse", action="store_true",
+                            help="Keep bench tenants from a previous run instead of re-seeding them")
+        parser.add_argument("--drop", action="store_true", help="Drop the bench tenants afterwards")
+
+    # ────────────────────── seeding ──────────────────────
+    def seed(self, size, reuse):
+        chamas, members, contributions = size
+        schema = f"bench_{chamas}x{members}x{contributions}"
+        tenant = Client.objects.filter(schema_name=schema).first()
+        if tenant and not reuse:
+            tenant.delete(force_drop=True)
+            tenant = None
+        host = f"{schema.replace('_', '-')}.bench.local"
+        if tenant is None:
+            started = time.perf_counter()
+            tenant = Client(schema_name=schema, name=f"Bench {schema}", paid_until=date.today())
+            tenant.save()
+            Domain.objects.get_or_create(domain=host, defaults={"tenant": tenant, "is_primary": True})
+            with tenant_shard(tenant) as connection:
+                self.populate(connection.alias, chamas, members, contributions)
+            self.stdout.write(f"seeded {schema} in {time.perf_counter() - started:.1f}s")
+        return tenant, host
+
+    @staticmethod
+    def populate(using, chamas, members, contributions):
+        users = [User(email=f"bench-{i}@bench.local", first_name="Bench", last_name=str(i)) for i in range(members)]
+        for user in users:
+            user.set_unusable_password()
+        users[0].set_password(PASSWORD)
+        users[0].is_staff = True
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(email__endswith="@bench.local").order_by("id"))
+        Token.objects.create(user=users[0])
+        kind = ContributionType.objects.create(name="Monthly", default_amount=Decimal("100.00"))
+
+        # bulk_create skips SyncTracked.save(), so stamp usn here
+        usn = current_usn(using)
+        groups = Chama.objects.bulk_create([
+            Chama(name=f"Chama {i}", description="bench", created_by=users[0], usn=usn) for i in range(chamas)
+        ])
+        memberships = Member.objects.bulk_create([
+            Member(user=user, chama=chama, role="admin" if user == users[0] else "member", usn=usn)
+            for chama in groups for user in users
+        ])
+        batch = []
+        for member in memberships:
+            batch += [Contribution(member=member, type=kind, amount=Decimal("100.00"), usn=usn)
+                      for _ in range(contributions)]
+            if len(batch) >= 5000:
+                Contribution.objects.bulk_create(batch)
+                batch = []
+        Contribution.objects.bulk_create(batch)
+
+    def context(self, tenant, run):
+        with tenant_shard(tenant):
+            admin = User.objects.filter(is_staff=True, email__endswith="@bench.local").order_by("id").first()
+            chama = Chama.objects.filter(created_by=admin).order_by("id").first()
+            member = Member.objects.filter(chama=chama, user=admin).first()
+            other = Member.objects.filter(chama=chama).exclude(user=admin).first()
+            return {
+                "run": run,
+                "email": admin.email,
+                "token": Token.objects.get(user=admin).key,
+                "chama": chama.pk,
+                "member": member.pk,
+                "member_user": (other or member).user_id,
+                "contribution": Contribution.objects.filter(member=member).values_list("pk", flat=True).first(),
+            }
+
+    # ────────────────────── running ──────────────────────
+    def request(self, client, host, ctx, scenario, i):
+        name, method, path, body, staff, expected = scenario
+        headers = {"HTTP_HOST": host}
+        if staff:
+            headers["HTTP_AUTHORIZATION"] = f"Token {ctx['token']}"
+        data = json.dumps(body(ctx, i)) if body else None
+        started = time.perf_counter()
+        response = client.generic(method, path.format(**ctx), data or "", content_type="application/json", **headers)
+        streaming = response.streaming
+        if streaming:
+            b"".join(response.streaming_content)
+        elapsed = time.perf_counter() - started
+        if response.status_code != expected:
+            raise CommandError(f"{name}: expected {expected}, got {response.status_code}: {response.content[:300]!r}")
+        match = SERVER_TIMING_RE.search(response.get("Server-Timing", ""))
+        return elapsed, int(match.group(1)) if match else None, streaming
+
+    def run_scenario(self, client, host, ctx, scenario, iterations, warmup):
+        for i in range(warmup):
+            self.request(client, host, ctx, scenario, -1 - i)
+        timings, queries, streaming = [], set(), False
+        started = time.perf_counter()
+        for i in range(iterations):
+            elapsed, count, streaming = self.request(client, host, ctx, scenario, i)
+            timings.append(elapsed)
+            queries.add(count)
+        total = time.perf_counter() - started
+        timings.sort()
+        return {
+            "queries": max(q for q in queries if q is not None) if queries - {None} else None,
+            "p50_ms": round(statistics.median(timings) * 1000, 2),
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+            "rps": round(iterations / total, 1),
+            "streaming": streaming,
+        }
+
+    def handle(self, *args, **options):
+        sizes = [_parse_size(size) for size in options["sizes"]]
+        scenarios = [s for s in SCENARIOS if not options["only"] or s[0].startswith(tuple(options["only"]))]
+        missing = uncovered_routes(SCENARIOS)
+        if missing:
+            self.stderr.write(self.style.WARNING(f"API routes without a scenario: {', '.join(sorted(missing))}"))
+
+        run = str(int(time.time()))
+        results = {}
+        client = HttpClient()
+        # Query counts come from Server-Timing; don't let profiling, tracing or
+        # the rate limiter (iterations x scenarios is well past any plan) skew timings
+        with override_settings(PERF_INSTRUMENTATION=True, PERF_SERVER_TIMING=True, PROFILE_TENANT_RATES={},
+                               MPESA_CALLBACK_TOKEN=CALLBACK_TOKEN, RATE_LIMIT_ENABLED=False):
+            for size in sizes:
+                tenant, host = self.seed(size, options["reuse"])
+                ctx = self.context(tenant, run)
+                label = "x".join(map(str, size))
+                results[label] = {}
+                self.stdout.write(f"\n{label} ({tenant.schema_name})")
+                self.stdout.write(f"  {'scenario':<28} {'queries':>7} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>8}")
+                for scenario in scenarios:
+                    result = self.run_scenario(client, host, ctx, scenario, options["iterations"], options["warmup"])
+                    results[label][scenario[0]] = result
+                    queries = "-" if result["queries"] is None else f"{result['queries']}{'+' if result['streaming'] else ''}"
+                    self.stdout.write(
+                        f"  {scenario[0]:<28} {queries:>7} "
+                        f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['rps']:>8.1f}"
+                    )
+                if options["drop"]:
+                    tenant.delete(force_drop=True)
+
+        failures = self.check_growth(results) + self.compare(results, options)
+        if options["update_baselines"]:
+            path = Path(options["baselines"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"\nBaselines written to {path}"))
+        if failures:
+            for failure in failures:
+                self.stderr.write(self.style.ERROR(f"  {failure}"))
+            raise CommandError(f"{len(failures)} benchmark check(s) failed")
+        self.stdout.write(self.style.SUCCESS("\nAll query budgets and latency checks passed"))
+
+    @staticmethod
+    def check_growth(results):
+        """Query counts must not grow between the smallest and larger datasets (streaming bodies aside)."""
+        labels = list(results)
+        failures = []
+        for label in labels[1:]:
+            for name, result in results[label].items():
+                if result["streaming"]:
+                    continue
+                smallest = results[labels[0]][name]["queries"]
+                if smallest is not None and result["queries"] is not None and result["queries"] > smallest:
+                    failures.append(f"{name}: {result['queries']} queries at {label} vs {smallest} at {labels[0]}")
+        return failures
+
+    def compare(self, results, options):
+        path = Path(options["baselines"])
+        if options["update_baselines"] or not path.exists():
+            if not options["update_baselines"]:
+                self.stdout.write(f"\nNo baselines at {path}; run with --update-baselines to record them")
+            return []
+        baselines = json.loads(path.read_text())
+        failures = []
+        for label, scenarios in results.items():
+            for name, result in scenarios.items():
+                base = baselines.get(label, {}).get(name)
+                if not base:
+                    continue
+                if base.get("queries") is not None and result["queries"] is not None \
+                        and result["queries"] > base["queries"]:
+                    failures.append(f"{label} {name}: {result['queries']} queries, budget {base['queries']}")
+                limit = base["p50_ms"] * (1 + options["threshold"])
+                if result["p50_ms"] > limit:
+                    failures.append(
+                        f"{label} {name}: p50 {result['p50_ms']:.2f} ms > {limit:.2f} ms "
+                        f"(baseline {base['p50_ms']:.2f} ms +{options['threshold']:.0%})"
+                    )
+        return failures
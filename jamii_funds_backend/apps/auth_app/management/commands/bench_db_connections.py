@@ -0,0 +1,60 @@
+# apps/auth_app/management/commands/bench_db_connections.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.auth_app.models import Client
+from apps.core.middleware import TenantConnectionMiddleware
+from apps.core.postgresql_backend import base as backend
+
+
+class Command(BaseCommand):
+    help = "Compare per-request connection setup: connect per request vs. persistent connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--queries", type=int, default=5, help="Queries per simulated request")
+        parser.add_argument("--schemas", nargs="*", help="Tenant schemas to rotate through (default: all tenants)")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def simulate(self, conn, schemas, requests, queries, persistent):
+        backend.reset_stats()
+        started = time.perf_counter()
+        for i in range(requests):
+            TenantConnectionMiddleware.reset()
+            conn.set_schema(schemas[i % len(schemas)])
+            for _ in range(queries):
+                if not persistent:
+                    conn.applied_search_path = None   # stock django-tenants SETs on every cursor
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+            TenantConnectionMiddleware.reset()
+            if not persistent:
+                conn.close()   # what CONN_MAX_AGE=0 does at request_finished
+        elapsed = time.perf_counter() - started
+        return elapsed, dict(backend.stats)
+
+    def handle(self, *args, **options):
+        conn = connections[options["database"]]
+        if not isinstance(conn, backend.DatabaseWrapper):
+            raise CommandError("DATABASES ENGINE must be apps.core.postgresql_backend")
+        schemas = options["schemas"] or list(
+            Client.objects.exclude(schema_name="public").values_list("schema_name", flat=True)
+        ) or ["public"]
+        requests, queries = options["requests"], options["queries"]
+
+        conn.close()
+        before, before_stats = self.simulate(conn, schemas, requests, queries, persistent=False)
+        conn.close()
+        after, after_stats = self.simulate(conn, schemas, requests, queries, persistent=True)
+        conn.close()
+
+        self.stdout.write(f"requests:      {requests} x {queries} queries over {len(schemas)} schema(s)")
+        for label, elapsed, stats in (("before", before, before_stats), ("after", after, after_stats)):
+            self.stdout.write(
+                f"{label + ':':<14} {elapsed * 1000 / requests:.2f} ms/request, "
+                f"{stats['connects']} connects, {stats['search_path_sets']} SET search_path"
+            )
+        self.stdout.write(f"speed-up:      {before / after:.1f}x")
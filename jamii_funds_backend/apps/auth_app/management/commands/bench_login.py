@@ -0,0 +1,50 @@
+# apps/auth_app/management/commands/bench_login.py
+import asyncio
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+from apps.auth_app import hashing
+
+
+class Command(BaseCommand):
+    help = "Compare login password verification throughput: request thread vs. hash pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=64)
+        parser.add_argument("--concurrency", type=int, default=64, help="Concurrent logins for the pooled run")
+
+    def handle(self, *args, **options):
+        logins = options["logins"]
+        cores = os.cpu_count() or 1
+        encoded = make_password("supersecret123")
+
+        # Before: one sync worker verifies each login in its request thread
+        started = time.perf_counter()
+        for _ in range(logins):
+            check_password("supersecret123", encoded)
+        before = logins / (time.perf_counter() - started)
+
+        # After: the async login view awaits verification in the hash pool
+        async def run():
+            semaphore = asyncio.Semaphore(options["concurrency"])
+
+            async def one():
+                async with semaphore:
+                    await hashing.averify_password("supersecret123", encoded)
+
+            await asyncio.gather(*(one() for _ in range(logins)))
+
+        hashing.get_executor()  # don't count pool start-up
+        started = time.perf_counter()
+        asyncio.run(run())
+        after = logins / (time.perf_counter() - started)
+
+        self.stdout.write(f"hasher:        {encoded.split('$', 1)[0]}")
+        self.stdout.write(f"cores:         {cores}")
+        self.stdout.write(f"hash pool:     {settings.LOGIN_HASH_EXECUTOR} x {settings.LOGIN_HASH_WORKERS}")
+        self.stdout.write(f"before:        {before:.1f} logins/s ({before / cores:.1f} per core, one worker)")
+        self.stdout.write(f"after:         {after:.1f} logins/s ({after / cores:.1f} per core)")
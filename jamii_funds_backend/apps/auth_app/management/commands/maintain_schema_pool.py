@@ -0,0 +1,28 @@
+# apps/auth_app/management/commands/maintain_schema_pool.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.auth_app import schema_pool
+
+
+class Command(BaseCommand):
+    help = "Keep TENANT_SCHEMA_POOL_SIZE ready tenant schemas pooled for signup"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep running and refill every --interval seconds")
+        parser.add_argument("--interval", type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        while True:
+            migrated = schema_pool.migrate_idle(verbosity=max(options["verbosity"] - 1, 0))
+            created = schema_pool.refill(verbosity=max(options["verbosity"] - 1, 0))
+            if migrated or created or options["verbosity"] > 1:
+                self.stdout.write(
+                    f"Schema pool: migrated {len(migrated)}, created {len(created)} "
+                    f"(target {settings.TENANT_SCHEMA_POOL_SIZE})"
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,38 @@
+# apps/auth_app/management/commands/move_tenant.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import get_tenant_model
+
+from apps.auth_app.sharding import move_tenant, shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Move a tenant's schema to another database shard and repoint Client.shard"
+
+    def add_arguments(self, parser):
+        parser.add_argument("schema_name")
+        parser.add_argument("target", help=f"Shard to move to ({', '.join(shard_aliases())})")
+        parser.add_argument("--drop-source", action="store_true",
+                            help="Drop the schema on the old shard once the copy is done")
+
+    def handle(self, *args, **options):
+        try:
+            tenant = get_tenant_model().objects.get(schema_name=options["schema_name"])
+        except get_tenant_model().DoesNotExist:
+            raise CommandError(f"No tenant with schema '{options['schema_name']}'")
+
+        source = tenant.shard
+        started = time.perf_counter()
+        try:
+            copied = move_tenant(tenant, options["target"], drop_source=options["drop_source"],
+                                 verbosity=max(options["verbosity"] - 1, 0))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for table, rows in copied.items():
+            self.stdout.write(f"  {table}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved '{tenant.schema_name}' from '{source}' to '{tenant.shard}' "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,149 @@
+# apps/auth_app/management/commands/parallel_tenant_command.py
+"""
+Run a management command in every tenant schema using a bounded process pool.
+
+    python manage.py parallel_tenant_command --processes 8 -- migrate --noinput
+    python manage.py parallel_tenant_command --resume -- migrate --noinput
+    python manage.py parallel_tenant_command -- clearsessions
+
+Each worker process keeps one DB connection per shard and switches
+search_path per tenant; every tenant runs against its Client.shard. Progress is recorded in a JSON state file after every schema so
+a failed or interrupted run can be resumed where it stopped.
+"""
+import argparse
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django_tenants.utils import get_public_schema_name, get_tenant_model, schema_exists
+
+from apps.auth_app.models import PooledSchema
+from apps.auth_app.schema_templates import template_schema
+from apps.auth_app.sharding import shard_aliases, tenant_shard
+
+MIGRATE_COMMANDS = ("migrate", "migrate_schemas")
+
+
+def _worker_init():
+    # Connections inherited from the parent must not be shared; each
+    # worker opens its own on first use and keeps it for every tenant.
+    for conn in connections.all():
+        conn.connection = None
+
+
+def run_for_schema(schema_name, shard, command, command_args):
+    started = time.perf_counter()
+    out = io.StringIO()
+    try:
+        if command in MIGRATE_COMMANDS:
+            call_command("migrate_schemas", "--tenant", f"--schema={schema_name}", f"--database={shard}",
+                         *command_args, stdout=out, stderr=out)
+        else:
+            with tenant_shard(get_tenant_model().objects.get(schema_name=schema_name)):
+                call_command(command, *command_args, stdout=out, stderr=out)
+        error = None
+    except Exception:
+        error = traceback.format_exc(limit=5)
+    finally:
+        connections[shard].set_schema_to_public()
+    return schema_name, error, out.getvalue()[-2000:], time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = "Run a management command (default: migrate) across tenant schemas in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--schemas", default=None, help="Comma separated schema names (default: all tenants)")
+        parser.add_argument("--state-file", default="parallel_tenant_command.json")
+        parser.add_argument("--resume", action="store_true", help="Skip schemas already done in --state-file")
+        parser.add_argument("--skip-public", action="store_true",
+                            help="For migrate: don't migrate the public schema first")
+        parser.add_argument("command_args", nargs=argparse.REMAINDER,
+                            help="Command to run and its arguments (default: migrate)")
+
+    def _save(self, path, state):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(state, fh, indent=2)
+        os.replace(tmp, path)
+
+    def handle(self, *args, **options):
+        command_args = options["command_args"]
+        if command_args and command_args[0] == "--":
+            command_args = command_args[1:]
+        command_args = command_args or ["migrate"]
+        command, command_args = command_args[0], command_args[1:]
+        state_file = options["state_file"]
+
+        state = {"command": [command] + command_args, "done": [], "failed": {}}
+        if options["resume"] and os.path.exists(state_file):
+            with open(state_file) as fh:
+                previous = json.load(fh)
+            if previous.get("command") != state["command"]:
+                raise CommandError(f"{state_file} was written for {previous.get('command')}, not {state['command']}")
+            state["done"] = previous.get("done", [])
+
+        if options["schemas"]:
+            schemas = [s.strip() for s in options["schemas"].split(",") if s.strip()]
+        else:
+            schemas = list(
+                get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+                .order_by("pk").values_list("schema_name", flat=True)
+            )
+        shards = dict(get_tenant_model().objects.filter(schema_name__in=schemas).values_list("schema_name", "shard"))
+        if command in MIGRATE_COMMANDS and not options["schemas"]:
+            # Keep the clone template and idle pooled schemas in step so
+            # signup can keep using them after the deploy
+            if schema_exists(template_schema()):
+                schemas.append(template_schema())
+            schemas.extend(PooledSchema.objects.order_by("pk").values_list("schema_name", flat=True))
+        done = set(state["done"])
+        pending = [s for s in schemas if s not in done]
+
+        if command in MIGRATE_COMMANDS and not options["skip_public"] and not done:
+            for alias in shard_aliases():
+                self.stdout.write(f"Migrating public schema on '{alias}'")
+                call_command("migrate_schemas", "--shared", f"--database={alias}", *command_args,
+                             stdout=self.stdout, stderr=self.stderr)
+
+        total = len(pending)
+        self.stdout.write(f"Running '{' '.join(state['command'])}' on {total} schemas "
+                          f"({len(done)} already done) with {options['processes']} processes")
+        self._save(state_file, state)
+
+        # Children must not inherit open connections
+        connections.close_all()
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options["processes"], initializer=_worker_init) as pool:
+            futures = [
+                pool.submit(run_for_schema, s, shards.get(s, DEFAULT_DB_ALIAS), command, command_args)
+                for s in pending
+            ]
+            for idx, future in enumerate(as_completed(futures), 1):
+                schema_name, error, output, elapsed = future.result()
+                if error:
+                    state["failed"][schema_name] = error
+                    self.stderr.write(self.style.ERROR(f"[{idx}/{total}] {schema_name} FAILED ({elapsed:.1f}s)"))
+                    self.stderr.write(error)
+                else:
+                    state["done"].append(schema_name)
+                    state["failed"].pop(schema_name, None)
+                    self.stdout.write(f"[{idx}/{total}] {schema_name} ok ({elapsed:.1f}s)")
+                    if options["verbosity"] > 1 and output:
+                        self.stdout.write(output)
+                self._save(state_file, state)
+
+        elapsed = time.perf_counter() - started
+        if state["failed"]:
+            raise CommandError(
+                f"{len(state['failed'])} of {total} schemas failed in {elapsed:.1f}s: "
+                f"{', '.join(sorted(state['failed']))}. Fix and re-run with --resume."
+            )
+        self.stdout.write(self.style.SUCCESS(f"All {total} schemas done in {elapsed:.1f}s"))
@@ -0,0 +1,233 @@
+# apps/auth_app/management/commands/profiles.py
+import io
+import pstats
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import profiling
+
+
+class _Loaded:
+    """Lets pstats.Stats load a stats dict read back from disk."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise CommandError(f"Invalid time '{value}' (use YYYY-MM-DD[THH:MM])")
+
+
+class Command(BaseCommand):
+    help = "Enable request profiling for a tenant, mint profiling tokens, and aggregate or diff stored profiles"
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest="action", required=True)
+
+        token = sub.add_parser("token", help="Print a signed X-Jamii-Profile header value")
+        token.add_argument("--tenant", help="Only valid for this schema (default: any tenant)")
+
+        enable = sub.add_parser("enable", help="Profile a share of a tenant's requests for a while")
+        enable.add_argument("tenant")
+        enable.add_argument("--rate", type=float, default=1.0)
+        enable.add_argument("--minutes", type=float, default=30)
+
+        disable = sub.add_parser("disable", help="Stop profiling a tenant")
+        disable.add_argument("tenant")
+
+        sub.add_parser("status", help="Show active toggles")
+
+        for name, text in (("list", "List stored profiles"), ("aggregate", "Merge stored profiles")):
+            command = sub.add_parser(name, help=text)
+            command.add_argument("paths", nargs="*", help=f"Profile files or directories (default: {settings.PROFILE_DIR})")
+            self.add_filters(command)
+            if name == "aggregate":
+                command.add_argument("--sort", default="cumulative", help="pstats sort key")
+                command.add_argument("--limit", type=int, default=30)
+                command.add_argument("--folded", help="Also write merged sampled stacks here (flamegraph input)")
+
+        diff = sub.add_parser("diff", help="Compare two sets of profiles, e.g. before/after a deploy")
+        diff.add_argument("before", help="Profile file or directory")
+        diff.add_argument("after", help="Profile file or directory")
+        diff.add_argument("--limit", type=int, default=30)
+        self.add_filters(diff)
+
+    @staticmethod
+    def add_filters(parser):
+        parser.add_argument("--tenant")
+        parser.add_argument("--view", help="Substring of the dotted view path")
+        parser.add_argument("--since", type=_parse_time)
+        parser.add_argument("--until", type=_parse_time)
+
+    # ────────────────────── loading ──────────────────────
+    def select(self, paths, options):
+        files = []
+        for path in map(Path, paths or [settings.PROFILE_DIR]):
+            if path.is_dir():
+                files += sorted(path.glob(f"*{profiling.SUFFIX}"))
+            elif path.exists():
+                files.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+        selected = []
+        for path in files:
+            profile = profiling.load(path)
+            meta = profile["meta"]
+            if options["tenant"] and meta["tenant"] != options["tenant"]:
+                continue
+            if options["view"] and options["view"] not in (meta["view"] or ""):
+                continue
+            if options["since"] and meta["ts"] < options["since"]:
+                continue
+            if options["until"] and meta["ts"] > options["until"]:
+                continue
+            selected.append((path, profile))
+        return selected
+
+    @staticmethod
+    def function_times(profiles):
+        """Average seconds per profiled request: {function: (tottime, cumtime)}."""
+        stats = [p["data"] for _, p in profiles if p["kind"] == "pstats"]
+        totals = {}
+        for data in stats:
+            for (filename, line, name), (_, _, tottime, cumtime, _) in data.items():
+                key = f"{name} ({filename}:{line})"
+                tot, cum = totals.get(key, (0.0, 0.0))
+                totals[key] = (tot + tottime, cum + cumtime)
+        return {k: (tot / len(stats), cum / len(stats)) for k, (tot, cum) in totals.items()}, len(stats)
+
+    @staticmethod
+    def frame_shares(profiles):
+        """Share of samples in which each frame is on the stack (inclusive)."""
+        counts, samples = {}, 0
+        for _, profile in profiles:
+            if profile["kind"] != "stacks":
+                continue
+            for stack, count in profile["data"].items():
+                samples += count
+                for frame in set(stack.split(";")):
+                    counts[frame] = counts.get(frame, 0) + count
+        return {k: v / samples for k, v in counts.items()} if samples else {}, samples
+
+    # ────────────────────── actions ──────────────────────
+    def handle(self, *args, **options):
+        getattr(self, f"do_{options['action']}")(options)
+
+    def do_token(self, options):
+        self.stdout.write(profiling.make_token(options["tenant"]))
+        self.stderr.write(f"Send as 'X-Jamii-Profile'; valid for {settings.PROFILE_TOKEN_MAX_AGE}s")
+
+    def do_enable(self, options):
+        profiling.enable(options["tenant"], options["rate"], options["minutes"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Profiling {options['rate']:.0%} of '{options['tenant']}' requests for {options['minutes']:g} min"
+        ))
+
+    def do_disable(self, options):
+        profiling.disable(options["tenant"])
+        self.stdout.write(self.style.SUCCESS(f"Profiling off for '{options['tenant']}'"))
+
+    def do_status(self, options):
+        active = profiling.active_toggles()
+        if not active:
+            self.stdout.write("No tenants toggled on")
+        for schema, (rate, until) in sorted(active.items()):
+            self.stdout.write(f"{schema}: {rate:.0%} until {datetime.fromtimestamp(until):%Y-%m-%d %H:%M:%S}")
+
+    def do_list(self, options):
+        for path, profile in self.select(options["paths"], options):
+            meta = profile["meta"]
+            self.stdout.write(
+                f"{datetime.fromtimestamp(meta['ts']):%Y-%m-%d %H:%M:%S}  {meta['tenant'] or 'public':<16} "
+                f"{meta['method']:<6} {meta['path']:<40} {meta['status']}  {meta['duration_ms']:>8.1f} ms  "
+                f"{meta['mode']:<8} {meta['trigger']:<7} {path.name}"
+            )
+
+    def do_aggregate(self, options):
+        profiles = self.select(options["paths"], options)
+        if not profiles:
+            raise CommandError("No profiles match")
+        durations = sorted(p["meta"]["duration_ms"] for _, p in profiles)
+        self.stdout.write(
+            f"{len(profiles)} profiles, median {durations[len(durations) // 2]:.1f} ms, "
+            f"max {durations[-1]:.1f} ms"
+        )
+
+        stats = [p["data"] for _, p in profiles if p["kind"] == "pstats"]
+        if stats:
+            out = io.StringIO()
+            merged = pstats.Stats(_Loaded(stats[0]), stream=out)
+            for data in stats[1:]:
+                merged.add(_Loaded(data))
+            merged.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
+            self.stdout.write(f"\ncProfile ({len(stats)} requests):")
+            self.stdout.write(out.getvalue())
+
+        shares, samples = self.frame_shares(profiles)
+        if samples:
+            leaves = {}
+            for _, profile in profiles:
+                if profile["kind"] == "stacks":
+                    for stack, count in profile["data"].items():
+                        leaf = stack.rsplit(";", 1)[-1]
+                        leaves[leaf] = leaves.get(leaf, 0) + count
+            self.stdout.write(f"\nSampled stacks ({samples} samples), self (leaf) share:")
+            for frame, count in sorted(leaves.items(), key=lambda kv: -kv[1])[:options["limit"]]:
+                self.stdout.write(f"  {count / samples:6.1%}  {frame}")
+            self.stdout.write("Inclusive share:")
+            for frame, share in sorted(shares.items(), key=lambda kv: -kv[1])[:options["limit"]]:
+                self.stdout.write(f"  {share:6.1%}  {frame}")
+            if options["folded"]:
+                merged = {}
+                for _, profile in profiles:
+                    if profile["kind"] == "stacks":
+                        for stack, count in profile["data"].items():
+                            merged[stack] = merged.get(stack, 0) + count
+                with open(options["folded"], "w") as fh:
+                    fh.writelines(f"{stack} {count}\n" for stack, count in merged.items())
+                self.stdout.write(f"Folded stacks written to {options['folded']}")
+
+    def do_diff(self, options):
+        before = self.select([options["before"]], options)
+        after = self.select([options["after"]], options)
+        if not before or not after:
+            raise CommandError("Both sides need at least one matching profile")
+
+        times_a, n_a = self.function_times(before)
+        times_b, n_b = self.function_times(after)
+        if n_a and n_b:
+            self.stdout.write(f"cProfile: {n_a} vs {n_b} requests, avg ms per request (tottime / cumtime):")
+            rows = []
+            for key in set(times_a) | set(times_b):
+                tot_a, cum_a = times_a.get(key, (0.0, 0.0))
+                tot_b, cum_b = times_b.get(key, (0.0, 0.0))
+                rows.append((tot_b - tot_a, cum_b - cum_a, tot_a, tot_b, key))
+            rows.sort(key=lambda row: -abs(row[0]))
+            for d_tot, d_cum, tot_a, tot_b, key in rows[:options["limit"]]:
+                self.stdout.write(
+                    f"  {d_tot * 1000:+9.2f} {d_cum * 1000:+9.2f}   "
+                    f"({tot_a * 1000:.2f} -> {tot_b * 1000:.2f})  {key}"
+                )
+
+        shares_a, samples_a = self.frame_shares(before)
+        shares_b, samples_b = self.frame_shares(after)
+        if samples_a and samples_b:
+            self.stdout.write(f"\nSampled: {samples_a} vs {samples_b} samples, change in share of samples:")
+            rows = sorted(
+                ((shares_b.get(k, 0.0) - shares_a.get(k, 0.0), k) for k in set(shares_a) | set(shares_b)),
+                key=lambda row: -abs(row[0]),
+            )
+            for delta, frame in rows[:options["limit"]]:
+                self.stdout.write(f"  {delta * 100:+6.1f} pp  {frame}")
+
+        if not (n_a and n_b) and not (samples_a and samples_b):
+            raise CommandError("The two sides have no profile kind in common (cprofile vs sample)")
@@ -0,0 +1,17 @@
+# apps/auth_app/management/commands/refresh_tenant_template.py
+from django.core.management.base import BaseCommand
+
+from apps.auth_app.schema_templates import refresh_template, template_is_current, template_schema
+
+
+class Command(BaseCommand):
+    help = "Create/migrate the template schema that new tenants are cloned from"
+
+    def handle(self, *args, **options):
+        refresh_template(verbosity=options["verbosity"])
+        if template_is_current():
+            self.stdout.write(self.style.SUCCESS(f"Template schema '{template_schema()}' is current"))
+        else:
+            self.stderr.write(self.style.WARNING(
+                f"Template schema '{template_schema()}' is still behind; tenants will be migrated from zero"
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0003_pooledschema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='shard',
+            field=models.CharField(db_index=True, default='default', max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0004_client_shard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='plan',
+            field=models.CharField(choices=[('free', 'Free'), ('standard', 'Standard'), ('premium', 'Premium'), ('enterprise', 'Enterprise')], default='standard', max_length=20),
+        ),
+    ]
@@ -1,13 +1,27 @@
 # apps/auth_app/models.py
 
 from django_tenants.models import TenantMixin, DomainMixin
-from django.db import models
+from django_tenants.utils import schema_exists
+from django.db import DEFAULT_DB_ALIAS, connections, models
 from django.utils.text import slugify
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
+from .schema_templates import migrate_schema, template_is_current
+
 
 # ────────────────────── CUSTOM USER ──────────────────────
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # update() sends no signals, so drop the users' cached tokens here
+        from .authentication import invalidate_users
+
+        pks = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        invalidate_users(getattr(connections[self.db], 'schema_name', 'public'), pks)
+        return rows
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
@@ -39,13 +53,27 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 # ────────────────────── TENANT MODEL (MUST INHERIT TenantMixin) ──────────────────────
+PLAN_CHOICES = (
+    ('free', 'Free'),
+    ('standard', 'Standard'),
+    ('premium', 'Premium'),
+    ('enterprise', 'Enterprise'),
+)
+
+
 class Client(TenantMixin):
     name = models.CharField(max_length=100)
     paid_until = models.DateField()
     on_trial = models.BooleanField(default=False)
     created_on = models.DateField(auto_now_add=True)
+    # DATABASES alias holding this tenant's schema (see auth_app.sharding)
+    shard = models.CharField(max_length=50, default=DEFAULT_DB_ALIAS, db_index=True)
+    # Picks the tenant's request limits (RATE_LIMIT_PLANS, apps/core/ratelimit.py)
+    plan = models.CharField(max_length=20, choices=PLAN_CHOICES, default='standard')
 
     auto_create_schema = True  # <--- REQUIRED
+    # False: skip the warm pool (pool refills, synthetic tenants)
+    use_schema_pool = True
     
 
     class Meta:
@@ -61,6 +89,29 @@ class Client(TenantMixin):
             self.schema_name = slugify(self.name).replace('-', '_')[:63] or 'tenant'
         super().save(*args, **kwargs)
 
+    def create_schema(self, check_if_exists=False, sync_schema=True, verbosity=1):
+        # Claim a warm pooled schema, else let django-tenants clone
+        # TENANT_BASE_SCHEMA with migrations faked, else migrate from zero
+        from .schema_pool import claim
+
+        if self.shard != DEFAULT_DB_ALIAS:
+            # Pool and template live on the default database only
+            if check_if_exists and schema_exists(self.schema_name, self.shard):
+                return False
+            if sync_schema:
+                migrate_schema(self.schema_name, verbosity=verbosity, database=self.shard)
+            return True
+
+        if check_if_exists and schema_exists(self.schema_name):
+            return False
+        if sync_schema and self.use_schema_pool and claim(self.schema_name):
+            return True
+        if sync_schema and not template_is_current():
+            # django-tenants would clone a stale base and fake the newer migrations
+            migrate_schema(self.schema_name, verbosity=verbosity)
+            return True
+        return super().create_schema(check_if_exists, sync_schema, verbosity)
+
 
 
 # ────────────────────── DOMAIN MODEL ──────────────────────
@@ -68,4 +119,16 @@ class Client(TenantMixin):
 
 class Domain(DomainMixin):
     class Meta:
-        app_label = 'auth_app'
\ No newline at end of file
+        app_label = 'auth_app'
+
+# ────────────────────── WARM SCHEMA POOL ──────────────────────
+class PooledSchema(models.Model):
+    """A migrated, unassigned tenant schema waiting to be claimed by signup."""
+    schema_name = models.CharField(max_length=63, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        app_label = 'auth_app'
+
+    def __str__(self):
+        return self.schema_name
@@ -0,0 +1,143 @@
+# apps/auth_app/provisioning.py
+"""
+Bulk user provisioning for roster imports.
+
+Users are inserted with bulk_create. Rows without a password get an
+unusable one plus an invite (uid + one-time token) for deferred setup.
+Supplied passwords are hashed in a bounded per-process thread pool
+(PBKDF2 releases the GIL, so threads use every core). The management
+command can hash in a process pool instead; web workers never fork.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+ROW_FIELDS = ("email", "first_name", "last_name", "password")
+
+_threads = None
+_threads_lock = threading.Lock()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+def _thread_pool():
+    global _threads
+    with _threads_lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(max_workers=settings.PROVISION_HASH_THREADS,
+                                          thread_name_prefix="provision-hash")
+        return _threads
+
+
+def hash_passwords(passwords, processes=None):
+    """
+    Hash raw passwords, preserving order: in the shared thread pool, or
+    in `processes` worker processes (management commands only).
+    """
+    if not passwords:
+        return []
+    if len(passwords) == 1 or processes == 1:
+        return [_hash(p) for p in passwords]
+    if processes:
+        # Workers set Django up themselves, so spawn/forkserver work too
+        with ProcessPoolExecutor(max_workers=processes, initializer=django.setup) as pool:
+            return list(pool.map(_hash, passwords, chunksize=max(1, len(passwords) // 64)))
+    return list(_thread_pool().map(_hash, passwords))
+
+
+def invalid_rows(rows):
+    """Error message for the first malformed row, or None."""
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            return f"users[{i}] must be an object"
+        for field in ROW_FIELDS:
+            if row.get(field) is not None and not isinstance(row[field], str):
+                return f"users[{i}].{field} must be a string"
+    return None
+
+
+def make_invite(user):
+    return {
+        "email": user.email,
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "token": default_token_generator.make_token(user),
+    }
+
+
+def provision_users(rows, processes=None):
+    """
+    Create users from dicts with email, first_name, last_name and an
+    optional password. Emails that already exist are skipped, including
+    ones created concurrently by another import.
+    Returns {"created": [...], "skipped": [...], "invites": [...]}.
+    """
+    by_email = {}
+    for row in rows:
+        email = (row.get("email") or "").strip().lower()
+        if email:
+            by_email.setdefault(email, row)
+
+    existing = set()
+    emails = list(by_email)
+    for i in range(0, len(emails), BATCH_SIZE):
+        existing.update(
+            e.lower() for e in
+            User.objects.filter(email__in=emails[i:i + BATCH_SIZE]).values_list("email", flat=True)
+        )
+
+    new_rows = [(email, row) for email, row in by_email.items() if email not in existing]
+    with_password = [(email, row) for email, row in new_rows if row.get("password")]
+    hashes = dict(zip(
+        (email for email, _ in with_password),
+        hash_passwords([row["password"] for _, row in with_password], processes=processes),
+    ))
+
+    users = []
+    for email, row in new_rows:
+        user = User(
+            email=email,
+            first_name=(row.get("first_name") or "")[:30],
+            last_name=(row.get("last_name") or "")[:30],
+        )
+        if email in hashes:
+            user.password = hashes[email]
+        else:
+            user.set_unusable_password()
+        users.append(user)
+
+    with transaction.atomic():
+        # Another import may have added some of these emails since the check above
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        # Conflicting rows get no pk; ours are the rows carrying our (salted, unique) password values
+        ours = {user.email: user for user in users}
+        for i in range(0, len(users), BATCH_SIZE):
+            for pk, email, password in User.objects.filter(
+                email__in=[user.email for user in users[i:i + BATCH_SIZE]]
+            ).values_list("pk", "email", "password"):
+                if ours[email].password == password:
+                    ours[email].pk = pk
+        raced = [user.email for user in users if user.pk is None]
+        users = [user for user in users if user.pk is not None]
+        # bulk_create skips Token.save(), which is where keys are normally generated
+        tokens = [Token(key=Token.generate_key(), user=user) for user in users]
+        Token.objects.bulk_create(tokens, batch_size=BATCH_SIZE)
+
+    return {
+        "created": [user.email for user in users],
+        "skipped": sorted(existing.union(raced)),
+        "invites": [make_invite(user) for user in users if not user.has_usable_password()],
+    }
@@ -0,0 +1,127 @@
+# apps/auth_app/replicas.py
+"""
+Read-replica routing for safe (GET/HEAD/OPTIONS) API requests.
+
+DATABASE_REPLICAS maps a primary alias (a shard) to its replica alias.
+ReplicaRoutingMiddleware activates the replica for safe requests unless
+the caller wrote within REPLICA_PIN_SECONDS or the replica lags by more
+than REPLICA_MAX_LAG seconds; ShardRouter.db_for_read then sends
+tenant reads there, with the tenant's search_path on that connection.
+"""
+import hashlib
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .sharding import current_shard
+
+_current_replica = ContextVar("current_replica", default=None)
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_lag = {}   # alias -> (checked_at, lag seconds or None when unreachable)
+_lag_lock = threading.Lock()
+
+
+def current_replica():
+    return _current_replica.get()
+
+
+def replica_for(alias):
+    return settings.DATABASE_REPLICAS.get(alias or DEFAULT_DB_ALIAS)
+
+
+def replica_lag(alias):
+    """Replication lag in seconds, re-measured at most every REPLICA_LAG_CHECK_INTERVAL."""
+    now = time.monotonic()
+    with _lag_lock:
+        checked_at, lag = _lag.get(alias, (None, None))
+    if checked_at is not None and now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+    except DatabaseError:
+        lag = None
+    with _lag_lock:
+        _lag[alias] = (now, lag)
+    return lag
+
+
+def replica_usable(alias):
+    lag = replica_lag(alias)
+    return lag is not None and lag <= settings.REPLICA_MAX_LAG
+
+
+# ────────────────────── READ-YOUR-WRITES PINNING ──────────────────────
+def pin_key(request):
+    """Identify the caller by auth header or session cookie; None for anonymous."""
+    ident = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not ident:
+        return None
+    return "replica:pin:" + hashlib.sha1(ident.encode()).hexdigest()
+
+
+def pin_to_primary(key):
+    if key:
+        cache.set(key, 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(key):
+    return bool(key) and cache.get(key) is not None
+
+
+def _activate(alias, tenant):
+    """Point the replica connection at tenant if the replica is healthy."""
+    if not replica_usable(alias):
+        return False
+    if tenant is not None:
+        connections[alias].set_tenant(tenant)
+    return True
+
+
+def _release(alias):
+    connections[alias].set_schema_to_public()
+
+
+@contextmanager
+def use_replica(tenant):
+    """Send tenant reads to the active shard's replica if it is healthy."""
+    alias = replica_for(current_shard())
+    if not alias or not _activate(alias, tenant):
+        yield None
+        return
+    token = _current_replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_replica.reset(token)
+        _release(alias)
+
+
+@asynccontextmanager
+async def ause_replica(tenant):
+    """use_replica() for async code (see sharding.atenant_shard)."""
+    alias = replica_for(current_shard())
+    if not alias or not await sync_to_async(_activate)(alias, tenant):
+        yield None
+        return
+    token = _current_replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_replica.reset(token)
+        await sync_to_async(_release)(alias)
@@ -0,0 +1,46 @@
+# apps/auth_app/routers.py
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django_tenants.routers import TenantSyncRouter
+from django_tenants.utils import get_public_schema_name
+
+from .replicas import current_replica
+from .sharding import current_shard, is_directory_model
+
+REPLICA_PRIMARIES = {replica: primary for primary, replica in settings.DATABASE_REPLICAS.items()}
+
+
+class ShardRouter(TenantSyncRouter):
+    """
+    TenantSyncRouter that also spreads tenant schemas over several databases.
+    Directory models (Client, Domain, PooledSchema) stay on `default`;
+    everything else follows the active tenant's shard, and reads go to
+    that shard's replica while ReplicaRoutingMiddleware has one active.
+    """
+
+    def db_for_read(self, model, **hints):
+        if is_directory_model(model):
+            return DEFAULT_DB_ALIAS
+        return current_replica() or current_shard()
+
+    def db_for_write(self, model, **hints):
+        if is_directory_model(model):
+            return DEFAULT_DB_ALIAS
+        return current_shard()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # A replica holds the same rows as its primary
+        primaries = {obj1._state.db, obj2._state.db}
+        primaries = {REPLICA_PRIMARIES.get(alias, alias) for alias in primaries}
+        return len(primaries) == 1 or None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Same rules as TenantSyncRouter, but for every shard, not just `default`.
+        # Answer definitively: TenantSyncRouter (next in line) rejects other aliases.
+        if db not in settings.DATABASES or db in REPLICA_PRIMARIES:
+            return False
+        if connections[db].schema_name == get_public_schema_name():
+            installed_apps = settings.SHARED_APPS
+        else:
+            installed_apps = settings.TENANT_APPS
+        return self.app_in_list(app_label, installed_apps)
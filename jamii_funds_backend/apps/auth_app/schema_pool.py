@@ -0,0 +1,68 @@
+# apps/auth_app/schema_pool.py
+"""
+Warm pool of ready, unassigned tenant schemas.
+
+`maintain_schema_pool` keeps TENANT_SCHEMA_POOL_SIZE migrated schemas
+named pool_<hex> on hand. Client.create_schema() claims the oldest one
+with SELECT ... FOR UPDATE SKIP LOCKED and renames it to the tenant's
+schema in the same transaction. ALTER SCHEMA ... RENAME only touches the
+catalog, so signup no longer waits on any table DDL.
+"""
+import uuid
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Client, PooledSchema
+from .schema_templates import migrate_schema, schema_is_current
+
+
+def _new_schema_name():
+    return f"pool_{uuid.uuid4().hex[:12]}"
+
+
+def create_pooled_schema(verbosity=0):
+    schema_name = _new_schema_name()
+    # Signup's own path (template clone or migrate), minus the pool; the Client is never saved
+    builder = Client(schema_name=schema_name)
+    builder.use_schema_pool = False
+    builder.create_schema(verbosity=verbosity)
+    PooledSchema.objects.create(schema_name=schema_name)
+    return schema_name
+
+
+def refill(verbosity=0):
+    """Top the pool up to TENANT_SCHEMA_POOL_SIZE; returns the schemas created."""
+    connection.set_schema_to_public()
+    missing = settings.TENANT_SCHEMA_POOL_SIZE - PooledSchema.objects.count()
+    return [create_pooled_schema(verbosity=verbosity) for _ in range(max(missing, 0))]
+
+
+def migrate_idle(verbosity=0):
+    """Bring pooled schemas that are behind up to the current migration state."""
+    connection.set_schema_to_public()
+    stale = [name for name in PooledSchema.objects.values_list("schema_name", flat=True)
+             if not schema_is_current(name)]
+    for schema_name in stale:
+        migrate_schema(schema_name, verbosity=verbosity)
+    return stale
+
+
+def claim(schema_name):
+    """
+    Rename the oldest current pooled schema to schema_name.
+    Returns False when the pool has nothing ready to hand out.
+    """
+    connection.set_schema_to_public()
+    with transaction.atomic():
+        pooled = (
+            PooledSchema.objects.select_for_update(skip_locked=True)
+            .order_by("created_at").first()
+        )
+        # A stale schema is left for maintain_schema_pool to migrate
+        if pooled is None or not schema_is_current(pooled.schema_name):
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER SCHEMA "{pooled.schema_name}" RENAME TO "{schema_name}"')
+        pooled.delete()
+    return True
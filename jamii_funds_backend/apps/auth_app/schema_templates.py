@@ -0,0 +1,72 @@
+# apps/auth_app/schema_templates.py
+"""
+Instant tenant provisioning from a template schema.
+
+TENANT_BASE_SCHEMA is a fully migrated tenant schema with no Client row.
+With TENANT_CREATION_FAKES_MIGRATIONS on, django-tenants'
+TenantMixin.create_schema() clones it (tables, indexes, sequences and
+seed rows) with the server-side clone_schema() and fakes the tenant
+migrations. Client.create_schema() only lets it do so while the template
+has every migration on disk recorded; otherwise it migrates from zero,
+since faking would skip the missing migrations.
+
+Keep the template current with `manage.py refresh_tenant_template`
+(parallel_tenant_command migrate also migrates it).
+"""
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django_tenants.utils import get_tenant_base_schema, schema_exists
+
+
+def template_schema():
+    return get_tenant_base_schema()
+
+
+@lru_cache(maxsize=1)
+def tenant_migrations():
+    """Every (app_label, name) migration shipped for TENANT_APPS."""
+    labels = {config.label for config in apps.get_app_configs() if config.name in settings.TENANT_APPS}
+    loader = MigrationLoader(None, ignore_no_migrations=True, load=True)
+    return frozenset(key for key in loader.disk_migrations if key[0] in labels)
+
+
+def schema_is_current(schema):
+    """True if schema exists and has every tenant migration recorded."""
+    if not schema or not schema_exists(schema):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_schema = %s AND table_name = 'django_migrations'",
+            [schema],
+        )
+        if cursor.fetchone() is None:
+            return False
+        cursor.execute(f'SELECT app, name FROM "{schema}".django_migrations')
+        applied = set(cursor.fetchall())
+    return tenant_migrations() <= applied
+
+
+def template_is_current():
+    return schema_is_current(template_schema())
+
+
+def migrate_schema(schema, verbosity=1, database=DEFAULT_DB_ALIAS):
+    """Create schema if needed and run all tenant migrations in it."""
+    conn = connections[database]
+    conn.set_schema_to_public()
+    if not schema_exists(schema, database):
+        with conn.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA "{schema}"')
+    call_command("migrate_schemas", tenant=True, schema_name=schema, database=database,
+                 interactive=False, verbosity=verbosity)
+    conn.set_schema_to_public()
+
+
+def refresh_template(verbosity=1):
+    """Create the template schema if needed and migrate it to the current state."""
+    migrate_schema(template_schema(), verbosity=verbosity)
@@ -0,0 +1,163 @@
+# apps/auth_app/sharding.py
+"""
+Tenant sharding across several Postgres databases.
+
+The `default` database is the directory: it holds Client, Domain and
+PooledSchema for every tenant. Each Client.shard names the DATABASES
+alias that holds that tenant's schema. While a tenant is active (see
+TenantShardMiddleware / tenant_shard()), ShardRouter sends every other
+model to that alias, whose connection has the tenant's search_path.
+"""
+import tempfile
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+_current_shard = ContextVar("current_shard", default=None)
+
+# Models that always live in the directory database
+DIRECTORY_MODELS = {"auth_app.client", "auth_app.domain", "auth_app.pooledschema"}
+
+
+def shard_aliases():
+    """Writable DATABASES aliases that can hold tenant schemas (read replicas excluded)."""
+    replicas = set(settings.DATABASE_REPLICAS.values())
+    return [alias for alias in settings.DATABASES if alias not in replicas]
+
+
+def current_shard():
+    return _current_shard.get()
+
+
+def is_directory_model(model):
+    return model._meta.label_lower in DIRECTORY_MODELS
+
+
+def shard_for(tenant):
+    return getattr(tenant, "shard", None) or DEFAULT_DB_ALIAS
+
+
+def _release(alias):
+    if alias != DEFAULT_DB_ALIAS:
+        connections[alias].set_schema_to_public()
+
+
+@contextmanager
+def tenant_shard(tenant):
+    """Route queries to the tenant's shard with its schema on the search_path."""
+    alias = shard_for(tenant)
+    connection = connections[alias]
+    connection.set_tenant(tenant)
+    token = _current_shard.set(alias)
+    try:
+        yield connection
+    finally:
+        _current_shard.reset(token)
+        _release(alias)
+
+
+@asynccontextmanager
+async def atenant_shard(tenant):
+    """
+    tenant_shard() for async code. Connections are per thread, so the
+    schema is set from the request's thread-sensitive executor, where the
+    async ORM runs its queries; the contextvar stays in the event loop.
+    """
+    alias = shard_for(tenant)
+    await sync_to_async(lambda: connections[alias].set_tenant(tenant))()
+    token = _current_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_shard.reset(token)
+        await sync_to_async(_release)(alias)
+
+
+# ────────────────────── TENANT MOVES ──────────────────────
+def _tenant_models():
+    """Concrete tenant-app models (incl. M2M tables), parents before children."""
+    models = [
+        m for m in apps.get_models(include_auto_created=True)
+        if m._meta.app_config.name in settings.TENANT_APPS
+        and not is_directory_model(m) and not m._meta.proxy and m._meta.managed
+    ]
+    ordered, seen = [], set()
+
+    def visit(model):
+        if model in seen:
+            return
+        seen.add(model)
+        for field in model._meta.concrete_fields:
+            related = field.related_model if field.is_relation else None
+            if related is not None and related is not model and related in models:
+                visit(related)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+def copy_schema_rows(schema_name, source, target):
+    """COPY every tenant table of schema_name from one alias to another."""
+    source_conn, target_conn = connections[source], connections[target]
+    source_conn.set_schema(schema_name)
+    target_conn.set_schema(schema_name)
+    with source_conn.cursor() as cursor:
+        cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = %s", [schema_name])
+        existing = {row[0] for row in cursor.fetchall()}
+    copied = {}
+    with transaction.atomic(using=target):
+        for model in _tenant_models():
+            if model._meta.db_table not in existing:
+                continue
+            table = f'"{schema_name}"."{model._meta.db_table}"'
+            with tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024) as buf:
+                with source_conn.cursor() as cursor:
+                    cursor.copy_expert(f"COPY {table} TO STDOUT", buf)
+                buf.seek(0)
+                with target_conn.cursor() as cursor:
+                    cursor.execute(f"TRUNCATE {table} CASCADE")
+                    cursor.copy_expert(f"COPY {table} FROM STDIN", buf)
+                    pk = model._meta.pk
+                    if pk.get_internal_type() in ("AutoField", "BigAutoField", "SmallAutoField"):
+                        cursor.execute(
+                            f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({pk.column}), 0) + 1, false) "
+                            f"FROM {table}",
+                            [table, pk.column],
+                        )
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                    copied[model._meta.db_table] = cursor.fetchone()[0]
+    source_conn.set_schema_to_public()
+    target_conn.set_schema_to_public()
+    return copied
+
+
+def move_tenant(tenant, target, drop_source=False, verbosity=0):
+    """
+    Move a tenant's schema to another shard and repoint Client.shard.
+    Writes to the tenant during the copy are lost; run it while the
+    tenant is in maintenance.
+    """
+    from .schema_templates import migrate_schema
+
+    source = tenant.shard or DEFAULT_DB_ALIAS
+    if target == source:
+        return {}
+    if target not in shard_aliases():
+        raise ValueError(f"Unknown shard '{target}'")
+
+    migrate_schema(tenant.schema_name, verbosity=verbosity, database=target)
+    copied = copy_schema_rows(tenant.schema_name, source, target)
+
+    type(tenant).objects.filter(pk=tenant.pk).update(shard=target)
+    tenant.shard = target
+
+    if drop_source:
+        with connections[source].cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA "{tenant.schema_name}" CASCADE')
+    return copied
@@ -0,0 +1,314 @@
+# apps/auth_app/synthetic.py
+"""
+Synthetic tenants for scale testing (`manage.py generate_tenants`).
+
+Each tenant's schema is cloned from the template schema, without taking
+from the warm pool that signup uses. Its rows are then streamed into
+Postgres with COPY, one statement per table. Rows are produced by
+generators and encoded in batches, so memory stays flat whatever the
+size, and Python's per-object ORM overhead is avoided entirely.
+
+Everything about a tenant is drawn from random.Random("<seed>:<schema>").
+The same seed and options therefore give the same data, whatever the
+process count or the order in which tenants are built.
+
+Sizes come from distribution specs (see distribution()):
+chamas per tenant, members per chama, contributions per member.
+
+A tenant's Domain is created only after its rows are loaded, so a tenant
+without one was left half-built by an interrupted run and is rebuilt.
+"""
+import io
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from apps.chamas.models import Chama, Member
+from apps.contributions.models import Contribution, ContributionType
+from apps.payments.models import Payment
+from apps.sync.models import current_usn
+
+from .models import Client, Domain, User
+from .sharding import tenant_shard
+
+FIRST_NAMES = ["Wanjiru", "Otieno", "Achieng", "Kamau", "Njeri", "Mwangi", "Akinyi", "Kiprono",
+               "Chebet", "Mutua", "Wambui", "Omondi", "Auma", "Kiptoo", "Nyambura", "Barasa"]
+LAST_NAMES = ["Kariuki", "Odhiambo", "Wafula", "Njoroge", "Ochieng", "Kipchumba", "Muthoni",
+              "Onyango", "Cheruiyot", "Wekesa", "Gitau", "Adhiambo"]
+CHAMA_WORDS = ["Umoja", "Tujenge", "Harambee", "Amani", "Baraka", "Jamii", "Upendo", "Neema", "Imani"]
+CONTRIBUTION_TYPES = [("Monthly", Decimal("1000.00")), ("Welfare", Decimal("200.00")),
+                      ("Merry-go-round", Decimal("500.00")), ("Loan repayment", Decimal("2500.00"))]
+AMOUNT_MULTIPLIERS = [1, 1, 1, 1, 2, 0.5, 3]
+UNUSABLE_PASSWORD = "!synthetic"
+COPY_BATCH = 5000   # rows encoded per chunk
+
+
+def distribution(spec):
+    """
+    Parse a size spec into rng -> int (never negative):
+      "7"            always 7
+      "2-10"         uniform integer in [2, 10]
+      "exp:12"       exponential with mean 12 (long tail, like real groups)
+      "normal:20,5"  normal with mean 20 and sd 5
+    """
+    spec = str(spec).strip()
+    try:
+        if spec.startswith("exp:"):
+            mean = float(spec[4:])
+            return lambda rng: int(round(rng.expovariate(1 / mean))) if mean > 0 else 0
+        if spec.startswith("normal:"):
+            mean, sd = (float(x) for x in spec[7:].split(","))
+            return lambda rng: max(0, int(round(rng.gauss(mean, sd))))
+        if "-" in spec:
+            low, high = (int(x) for x in spec.split("-"))
+            return lambda rng: rng.randint(low, high)
+        value = int(spec)
+        return lambda rng: value
+    except ValueError:
+        raise ValueError(f"Invalid distribution '{spec}' (use N, A-B, exp:MEAN or normal:MEAN,SD)")
+
+
+# ────────────────────── COPY PLUMBING ──────────────────────
+def _encode(value):
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    return str(value)
+
+
+class RowStream(io.RawIOBase):
+    """File-like view of a row generator in COPY text format, for copy_expert()."""
+
+    def __init__(self, rows):
+        self._chunks = self._encode_chunks(rows)
+        self._buffer = memoryview(b"")
+        self.rows = 0
+
+    def _encode_chunks(self, rows):
+        batch = []
+        for row in rows:
+            batch.append("\t".join(map(_encode, row)))
+            if len(batch) >= COPY_BATCH:
+                self.rows += len(batch)
+                yield ("\n".join(batch) + "\n").encode()
+                batch = []
+        if batch:
+            self.rows += len(batch)
+            yield ("\n".join(batch) + "\n").encode()
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _columns(model, names):
+    return [model._meta.get_field(name).column for name in names]
+
+
+def copy_rows(cursor, schema, model, fields, rows):
+    """COPY rows (tuples in `fields` order) into model's table in schema; returns the row count."""
+    table = f'"{schema}"."{model._meta.db_table}"'
+    columns = ", ".join(f'"{c}"' for c in _columns(model, fields))
+    stream = RowStream(rows)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", io.BufferedReader(stream, 1 << 20))
+    return stream.rows
+
+
+def _next_id(cursor, schema, model):
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{schema}"."{model._meta.db_table}"')
+    return cursor.fetchone()[0] + 1
+
+
+def _reset_sequence(cursor, schema, model):
+    table = f'"{schema}"."{model._meta.db_table}"'
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}",
+        [table],
+    )
+
+
+# ────────────────────── GENERATION ──────────────────────
+class TenantGenerator:
+    def __init__(self, schema, seed, chamas, members, contributions, payment_ratio=0.3,
+                 failed_ratio=0.05, end=None, days=365, password=None):
+        self.schema = schema
+        self.rng = random.Random(f"{seed}:{schema}")
+        self.chamas = chamas
+        self.members = members
+        self.contributions = contributions
+        self.payment_ratio = payment_ratio
+        self.failed_ratio = failed_ratio
+        self.end = datetime.combine(end, time()) if end else datetime(2025, 12, 31)
+        self.days = days
+        self.password = password   # encoded; set on the first user only
+
+    def _moment(self):
+        return self.end - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def _phone(self):
+        return f"2547{self.rng.randrange(10 ** 8):08d}"
+
+    def plan(self):
+        """Draw the tenant's shape: [(users in chama, contributions per member)] per chama."""
+        rng = self.rng
+        shape = []
+        for _ in range(max(1, self.chamas(rng))):
+            size = max(1, self.members(rng))
+            shape.append([self.contributions(rng) for _ in range(size)])
+        return shape
+
+    def load(self, using=DEFAULT_DB_ALIAS):
+        rng, schema = self.rng, self.schema
+        shape = self.plan()
+        counts = {}
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            usn = current_usn(using)
+            ids = {model: _next_id(cursor, schema, model)
+                   for model in (User, ContributionType, Chama, Member, Contribution, Payment)}
+
+            # Users: enough for the largest chama, plus people in several groups
+            user_count = max(len(members) for members in shape)
+            user_count += user_count // 4
+            user_ids = list(range(ids[User], ids[User] + user_count))
+            phones = {uid: self._phone() for uid in user_ids}
+
+            def users():
+                for n, uid in enumerate(user_ids):
+                    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                    password = self.password if n == 0 and self.password else UNUSABLE_PASSWORD
+                    yield (uid, password, n == 0, f"{first.lower()}.{last.lower()}.{uid}@{schema}.example",
+                           first, last, True, n == 0, self._moment())
+
+            counts["users"] = copy_rows(cursor, schema, User, [
+                "id", "password", "is_superuser", "email", "first_name", "last_name",
+                "is_active", "is_staff", "date_joined"], users())
+
+            type_ids = list(range(ids[ContributionType], ids[ContributionType] + len(CONTRIBUTION_TYPES)))
+            counts["contribution_types"] = copy_rows(cursor, schema, ContributionType, [
+                "id", "name", "description", "default_amount", "is_fixed"],
+                ((tid, name, "", amount, True) for tid, (name, amount) in zip(type_ids, CONTRIBUTION_TYPES)))
+            defaults = dict(zip(type_ids, (amount for _, amount in CONTRIBUTION_TYPES)))
+
+            # Members are drawn first so chamas, members, contributions and
+            # payments can each stream in a single COPY
+            chama_rows, member_rows = [], []
+            member_id = ids[Member]
+            for offset, contributions in enumerate(shape):
+                chama_id = ids[Chama] + offset
+                people = rng.sample(user_ids, len(contributions))
+                created_at = self._moment()
+                chama_rows.append((chama_id, f"{rng.choice(CHAMA_WORDS)} {rng.choice(CHAMA_WORDS)} {offset + 1}",
+                                   "", people[0], created_at, usn))
+                for n, (uid, count) in enumerate(zip(people, contributions)):
+                    member_rows.append((member_id, uid, chama_id, "admin" if n == 0 else "member",
+                                        created_at, usn, count))
+                    member_id += 1
+
+            counts["chamas"] = copy_rows(cursor, schema, Chama, [
+                "id", "name", "description", "created_by", "created_at", "usn"], iter(chama_rows))
+            counts["members"] = copy_rows(cursor, schema, Member, [
+                "id", "user", "chama", "role", "joined_at", "usn"], (row[:6] for row in member_rows))
+
+            # Contributions and their STK payments come from one pass, so draw
+            # them once and keep the payments to COPY afterwards
+            payment_rows = []
+            next_payment = [ids[Payment]]
+
+            def contributions():
+                cid = ids[Contribution]
+                for mid, uid, _, _, _, _, count in member_rows:
+                    for _ in range(count):
+                        type_id = rng.choice(type_ids)
+                        amount = (defaults[type_id] * Decimal(str(rng.choice(AMOUNT_MULTIPLIERS)))).quantize(
+                            Decimal("0.01"))
+                        moment = self._moment()
+                        reference = None
+                        if rng.random() < self.payment_ratio:
+                            pid = next_payment[0]
+                            next_payment[0] += 1
+                            reference = f"ws_CO_{schema}_{pid}"
+                            status = "Failed" if rng.random() < self.failed_ratio else "Completed"
+                            payment_rows.append((pid, mid, phones[uid], phones[uid], amount, reference,
+                                                 f"{pid}-{rng.randrange(10 ** 6)}", status, moment, usn))
+                        yield (cid, mid, type_id, amount, moment, reference, usn)
+                        cid += 1
+
+            counts["contributions"] = copy_rows(cursor, schema, Contribution, [
+                "id", "member", "type", "amount", "date", "reference", "usn"], contributions())
+            counts["payments"] = copy_rows(cursor, schema, Payment, [
+                "id", "member", "phone_number", "msisdn", "amount", "checkout_request_id",
+                "merchant_request_id", "status", "created_at", "usn"], iter(payment_rows))
+
+            for model in ids:
+                _reset_sequence(cursor, schema, model)
+        with connections[using].cursor() as cursor:
+            for model in ids:
+                cursor.execute(f'ANALYZE "{schema}"."{model._meta.db_table}"')
+        return counts
+
+
+def create_tenant(schema, name, shard=DEFAULT_DB_ALIAS, on_trial=False, domain=None, paid_until=None):
+    """Client + schema without drawing from the signup pool (template clone, else migrate)."""
+    tenant = Client(schema_name=schema, name=name, shard=shard, on_trial=on_trial,
+                    paid_until=paid_until or datetime(2099, 12, 31).date())
+    tenant.use_schema_pool = False
+    tenant.save(verbosity=0)
+    if domain:
+        Domain.objects.create(domain=domain, tenant=tenant, is_primary=True)
+    return tenant
+
+
+def drop_tenant(tenant):
+    """Drop the tenant's schema on its shard and delete the Client."""
+    with connections[tenant.shard or DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS "{tenant.schema_name}" CASCADE')
+    tenant.delete()
+
+
+def generate_tenant(index, options):
+    """Create and fill one synthetic tenant; returns (schema, counts or None if it was already complete)."""
+    schema = f"{options['prefix']}_{index:05d}"
+    existing = Client.objects.filter(schema_name=schema).first()
+    if existing is not None:
+        if Domain.objects.filter(tenant=existing).exists():
+            return schema, None
+        drop_tenant(existing)
+    rng = random.Random(f"{options['seed']}:{schema}:tenant")
+    shards = options["shards"]
+    tenant = create_tenant(
+        schema, f"Synthetic {index}", shard=shards[index % len(shards)],
+        on_trial=rng.random() < options["trial_ratio"],
+    )
+    generator = TenantGenerator(
+        schema, options["seed"],
+        chamas=distribution(options["chamas"]),
+        members=distribution(options["members"]),
+        contributions=distribution(options["contributions"]),
+        payment_ratio=options["payment_ratio"],
+        failed_ratio=options["failed_ratio"],
+        end=options["end_date"],
+        days=options["days"],
+        password=options.get("password_hash"),
+    )
+    with tenant_shard(tenant) as connection:
+        counts = generator.load(connection.alias)
+    # Marks the tenant complete (see the module docstring)
+    Domain.objects.create(domain=f"{schema.replace('_', '-')}.{options['domain_suffix']}",
+                          tenant=tenant, is_primary=True)
+    return schema, counts
+
@@ -1,8 +1,11 @@
 # apps/auth_app/urls.py
 from django.urls import path
-from .views import register, login
+from .views import register, login, provision, accept_invite, token_cache_stats
 
 urlpatterns = [
     path('register/', register, name='register'),
     path('login/', login, name='login'),
+    path('provision/', provision, name='provision'),
+    path('invite/accept/', accept_invite, name='accept-invite'),
+    path('token-cache/', token_cache_stats, name='token-cache-stats'),
 ]
\ No newline at end of file
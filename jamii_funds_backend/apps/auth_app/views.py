@@ -1,14 +1,24 @@
 # apps/auth_app/views.py
+import json
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth import authenticate
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.utils.http import urlsafe_base64_decode
+from django.http import HttpResponseNotAllowed, JsonResponse
 
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 
+from .authentication import token_cache
+from .provisioning import invalid_rows, provision_users
+from .hashing import HashPoolBusy, averify_password
+
 User = get_user_model()
 
 
@@ -62,9 +72,7 @@ def register(request):
     }, status=status.HTTP_201_CREATED)
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def login(request):
+async def login(request):
     """
     Login with email + password → returns token
     POST /api/auth/login/
@@ -72,26 +80,51 @@ def login(request):
         "email": "john@example.com",
         "password": "supersecret123"
     }
+    Async view: the password check runs in the bounded hash pool
+    (apps.auth_app.hashing) so it never blocks a request worker.
     """
-    email = request.data.get('email')
-    password = request.data.get('password')
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = None
+    else:
+        data = request.POST
+    if not hasattr(data, 'get'):
+        data = {}
+    email = data.get('email')
+    password = data.get('password')
 
     if not email or not password:
-        return Response({
+        return JsonResponse({
             'error': 'Email and password are required'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # authenticate() works with your custom user model automatically
-    user = authenticate(request, email=email, password=password)
+    user = await User._default_manager.filter(email=email).afirst()
 
-    if not user:
-        return Response({
+    try:
+        valid, new_encoded = await averify_password(password, user.password if user else None)
+    except HashPoolBusy:
+        return JsonResponse({
+            'error': 'Too many login attempts in progress, please retry'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+
+    if not valid or not user.is_active:
+        return JsonResponse({
             'error': 'Invalid credentials'
         }, status=status.HTTP_401_UNAUTHORIZED)
 
-    token, _ = Token.objects.get_or_create(user=user)
+    if new_encoded:
+        # Migrate the user to LOGIN_PREFERRED_HASHER
+        user.password = new_encoded
+        await user.asave(update_fields=['password'])
 
-    return Response({
+    token, _ = await Token.objects.aget_or_create(user=user)
+
+    return JsonResponse({
         'success': True,
         'token': token.key,
         'user': {
@@ -100,4 +133,104 @@ def login(request):
             'first_name': user.first_name,
             'last_name': user.last_name,
         }
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+    }, status=status.HTTP_200_OK)
+
+
+# csrf_exempt() is not async-aware in Django 4.2, so mark the view directly
+login.csrf_exempt = True
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def provision(request):
+    """
+    Bulk-create users for a roster import (admin only)
+    POST /api/auth/provision/
+    {
+        "users": [
+            {"email": "jane@example.com", "first_name": "Jane", "last_name": "Doe"},
+            {"email": "john@example.com", "password": "supersecret123"}
+        ]
+    }
+    Users without a password get an invite (uid + token) for /api/auth/invite/accept/.
+    """
+    rows = request.data.get('users')
+    if not isinstance(rows, list) or not rows:
+        return Response({
+            'error': 'A non-empty "users" list is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > settings.PROVISION_MAX_ROWS:
+        return Response({
+            'error': f'At most {settings.PROVISION_MAX_ROWS} users per request; '
+                     'use manage.py provision_users for larger rosters'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    error = invalid_rows(rows)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = provision_users(rows)
+
+    return Response({
+        'success': True,
+        'created': len(result['created']),
+        'skipped': result['skipped'],
+        'invites': result['invites'],
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def accept_invite(request):
+    """
+    Set the password of a provisioned user → returns token
+    POST /api/auth/invite/accept/
+    {
+        "uid": "MTI",
+        "token": "c5f2bo-...",
+        "password": "supersecret123"
+    }
+    """
+    uid = request.data.get('uid')
+    invite_token = request.data.get('token')
+    password = request.data.get('password')
+
+    if not uid or not invite_token or not password:
+        return Response({
+            'error': 'uid, token and password are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user = User.objects.get(pk=urlsafe_base64_decode(uid).decode())
+    except (TypeError, ValueError, OverflowError, User.DoesNotExist):
+        user = None
+
+    if user is None or not default_token_generator.check_token(user, invite_token):
+        return Response({
+            'error': 'Invalid or expired invite'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        validate_password(password, user)
+    except ValidationError as e:
+        return Response({
+            'error': e.messages
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    user.set_password(password)
+    user.save(update_fields=['password'])
+    token, _ = Token.objects.get_or_create(user=user)
+
+    return Response({
+        'success': True,
+        'token': token.key,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def token_cache_stats(request):
+    """
+    Hit/miss counters for CachedTokenAuthentication in this worker
+    GET /api/auth/token-cache/
+    """
+    return Response(token_cache.stats())
\ No newline at end of file
@@ -0,0 +1,87 @@
+# apps/chamas/management/commands/bench_json_rendering.py
+import datetime
+import json
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from apps.api.renderers import FastJSONRenderer
+from apps.chamas.models import Chama, Member
+from apps.chamas.serializers import ChamaListFlatSerializer, ChamaListSerializer
+from apps.contributions.models import Contribution, ContributionType
+from apps.contributions.serializers import ContributionFlatSerializer, ContributionSerializer
+
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = "Compare DRF serializers + JSONRenderer against flat serializers + orjson on large list payloads (no database needed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def chamas(self, rows):
+        User = get_user_model()
+        user = User(id=1, email="founder@example.com", first_name="Wanjiku", last_name="Kamau")
+        created = datetime.datetime(2025, 1, 1, 9, 30, 15, 123456)
+        instances, tuples = [], []
+        for i in range(rows):
+            chama = Chama(id=i, name=f"Chama {i}", description="Weekly merry-go-round", created_at=created)
+            chama.created_by = user
+            chama.num_members, chama.user_is_member = 12 + i % 30, bool(i % 2)
+            instances.append(chama)
+            tuples.append((i, chama.name, chama.description, user.id, user.email, user.first_name,
+                           user.last_name, created, chama.num_members, chama.user_is_member))
+        request = SimpleNamespace(user=user, method="GET", GET={})
+        drf = lambda: ChamaListSerializer(instances, many=True, context={"request": request}).data  # noqa: E731
+        flat = lambda: [ChamaListFlatSerializer.to_row(values) for values in tuples]  # noqa: E731
+        return drf, flat
+
+    def contributions(self, rows):
+        User = get_user_model()
+        user = User(id=1, email="member@example.com")
+        chama = Chama(id=1, name="Umoja")
+        member = Member(id=1, role="member")
+        member.user, member.chama = user, chama
+        kind = ContributionType(id=1, name="Monthly", default_amount=Decimal("500.00"))
+        date = datetime.datetime(2025, 3, 1, 18, 0, 5, 42)
+        instances, tuples = [], []
+        for i in range(rows):
+            contribution = Contribution(id=i, amount=Decimal("500.00"), date=date, reference=f"ws_CO_{i:08d}")
+            contribution.member, contribution.type = member, kind
+            instances.append(contribution)
+            tuples.append((i, user.email, chama.name, member.role, kind.name, contribution.amount, date,
+                           contribution.reference))
+        drf = lambda: ContributionSerializer(instances, many=True).data  # noqa: E731
+        flat = lambda: [ContributionFlatSerializer.to_row(values) for values in tuples]  # noqa: E731
+        return drf, flat
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        for name, build in (("chama list", self.chamas), ("contribution history", self.contributions)):
+            drf, flat = build(rows)
+            before, before_body = _best(lambda: drf_renderer.render(drf()), repeat)
+            render_only, _ = _best(lambda: fast_renderer.render(drf()), repeat)
+            after, after_body = _best(lambda: fast_renderer.render(flat()), repeat)
+            same = json.loads(before_body) == json.loads(after_body)
+
+            self.stdout.write(f"{name} ({rows} rows, {len(after_body) / 1024:.0f} KiB):")
+            self.stdout.write(f"  ModelSerializer + JSONRenderer:  {before * 1000:8.1f} ms")
+            self.stdout.write(f"  ModelSerializer + orjson:        {render_only * 1000:8.1f} ms  ({before / render_only:.1f}x)")
+            self.stdout.write(f"  FlatSerializer + orjson:         {after * 1000:8.1f} ms  ({before / after:.1f}x)")
+            self.stdout.write(f"  identical output:                {same}")
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamas', '0002_auto_20251119_1549'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chama',
+            name='usn',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='usn',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -2,7 +2,9 @@
 from django.db import models
 from django.conf import settings
 
-class Chama(models.Model):
+from apps.sync.models import SyncTracked
+
+class Chama(SyncTracked):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     created_by = models.ForeignKey(
@@ -20,7 +22,7 @@ class Chama(models.Model):
     def __str__(self):
         return self.name
 
-class Member(models.Model):
+class Member(SyncTracked):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     chama = models.ForeignKey(Chama, on_delete=models.CASCADE, related_name='membership')
     role = models.CharField(
@@ -35,4 +37,4 @@ class Member(models.Model):
       
 
     def __str__(self):
-        return f"{self.user.username} in {self.chama.name} ({self.role})"
\ No newline at end of file
+        return f"{self.user.email} in {self.chama.name} ({self.role})"
\ No newline at end of file
@@ -1,6 +1,9 @@
 # chamas/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+from apps.api.flat import FlatSerializer
+from apps.api.sparse import SparseFieldsMixin
 from .models import Chama, Member
 
 User = get_user_model()
@@ -10,64 +13,135 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id',  'email', 'first_name', 'last_name')
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(), source='user', write_only=True, required=False
     )
+    collapsed_fields = {'user': lambda: serializers.PrimaryKeyRelatedField(read_only=True)}
 
     class Meta:
         model = Member
         fields = ('id', 'user', 'user_id', 'role', 'joined_at')
         read_only_fields = ('joined_at',)
 
-class ChamaListSerializer(serializers.ModelSerializer):
-    member_count = serializers.SerializerMethodField()
-    is_member = serializers.SerializerMethodField()
-    created_by = UserSerializer(read_only=True)
+    @classmethod
+    def setup_user(cls, queryset, request, expanded):
+        return queryset.select_related('user') if expanded else queryset
 
-    class Meta:
-        model = Chama
-        fields = ('id', 'name', 'description', 'created_by', 'created_at', 'member_count', 'is_member')
+class MemberFlatSerializer(FlatSerializer):
+    """MemberSerializer's read output from values_list() rows (roster streaming)."""
+    fields = {
+        'id': 'id',
+        'user': {
+            'id': 'user__id',
+            'email': 'user__email',
+            'first_name': 'user__first_name',
+            'last_name': 'user__last_name',
+        },
+        'role': 'role',
+        'joined_at': 'joined_at',
+    }
+    collapsed = {'user': 'user_id'}
 
-    def get_member_count(self, obj):
-        return obj.membership.count()
+def _own_membership(request):
+    return Member.objects.filter(chama=OuterRef('pk'), user=request.user)
 
-    def get_is_member(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.membership.filter(user=request.user).exists()
-        return False
+class ChamaFieldsMixin(SparseFieldsMixin):
+    """?fields= / ?expand= plus the queryset work behind each chama field."""
+    collapsed_fields = {
+        'created_by': lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+        'members': lambda: serializers.PrimaryKeyRelatedField(source='membership', many=True, read_only=True),
+    }
 
-class ChamaDetailSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
-    members = MemberSerializer(source='membership', many=True, read_only=True)
-    member_count = serializers.SerializerMethodField()
-    is_member = serializers.SerializerMethodField()
-    current_user_role = serializers.SerializerMethodField()
+    @classmethod
+    def setup_created_by(cls, queryset, request, expanded):
+        return queryset.select_related('created_by') if expanded else queryset
 
-    class Meta:
-        model = Chama
-        fields = ('id', 'name', 'description', 'created_by', 'created_at',
-                  'members', 'member_count', 'is_member', 'current_user_role')
+    @classmethod
+    def setup_members(cls, queryset, request, expanded):
+        members = Member.objects.select_related('user') if expanded else Member.objects.only('id', 'chama_id')
+        return queryset.prefetch_related(Prefetch('membership', queryset=members))
+
+    @classmethod
+    def setup_member_count(cls, queryset, request, expanded):
+        return queryset.annotate(num_members=Count('membership'))
 
+    @classmethod
+    def setup_is_member(cls, queryset, request, expanded):
+        if not request.user.is_authenticated:
+            return queryset
+        return queryset.annotate(user_is_member=Exists(_own_membership(request)))
+
+    @classmethod
+    def setup_current_user_role(cls, queryset, request, expanded):
+        if not request.user.is_authenticated:
+            return queryset
+        return queryset.annotate(user_role=Subquery(_own_membership(request).values('role')[:1]))
+
+    # The getters use the annotations above when present
     def get_member_count(self, obj):
+        if hasattr(obj, 'num_members'):
+            return obj.num_members
         return obj.membership.count()
 
     def get_is_member(self, obj):
+        if hasattr(obj, 'user_is_member'):
+            return obj.user_is_member
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.membership.filter(user=request.user).exists()
         return False
 
     def get_current_user_role(self, obj):
+        if hasattr(obj, 'user_role'):
+            return obj.user_role
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             membership = obj.membership.filter(user=request.user).first()
             return membership.role if membership else None
         return None
 
+class ChamaListSerializer(ChamaFieldsMixin, serializers.ModelSerializer):
+    member_count = serializers.SerializerMethodField()
+    is_member = serializers.SerializerMethodField()
+    created_by = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Chama
+        fields = ('id', 'name', 'description', 'created_by', 'created_at', 'member_count', 'is_member')
+
+class ChamaListFlatSerializer(FlatSerializer):
+    """ChamaListSerializer output from one annotated values_list() query."""
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'created_by': {
+            'id': 'created_by__id',
+            'email': 'created_by__email',
+            'first_name': 'created_by__first_name',
+            'last_name': 'created_by__last_name',
+        },
+        'created_at': 'created_at',
+        'member_count': 'num_members',      # annotations, see views.chama_list
+        'is_member': 'user_is_member',
+    }
+    collapsed = {'created_by': 'created_by_id'}
+
+class ChamaDetailSerializer(ChamaFieldsMixin, serializers.ModelSerializer):
+    created_by = UserSerializer(read_only=True)
+    members = MemberSerializer(source='membership', many=True, read_only=True)
+    member_count = serializers.SerializerMethodField()
+    is_member = serializers.SerializerMethodField()
+    current_user_role = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Chama
+        fields = ('id', 'name', 'description', 'created_by', 'created_at',
+                  'members', 'member_count', 'is_member', 'current_user_role')
+
 class ChamaCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Chama
-        fields = ('name', 'description')
\ No newline at end of file
+        fields = ('name', 'description')
@@ -1,25 +1,37 @@
 # apps/chamas/views.py
+import logging
 
 from django.db import connection
+from django.db.models import Count, Exists, OuterRef
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.authentication import SessionAuthentication
+
+from apps.api.renderers import json_response
+from apps.api.sparse import SparseFieldsViewSetMixin
+from apps.api.streaming import streaming_json_response, wants_stream
+from apps.auth_app.authentication import CachedTokenAuthentication
+from apps.core.async_api import async_endpoint
 
 from .models import Chama, Member
 from .serializers import (
     ChamaListSerializer,
+    ChamaListFlatSerializer,
+    MemberFlatSerializer,
     ChamaDetailSerializer,
     ChamaCreateUpdateSerializer,
     MemberSerializer
 )
 from .permissions import IsAdminMember, IsCreatorOrAdmin
 
+logger = logging.getLogger(__name__)
+
 
-class ChamaViewSet(viewsets.ModelViewSet):
+class ChamaViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Chama.objects.all().order_by('-created_at')
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = []
     lookup_field = 'pk'
 
@@ -31,26 +43,9 @@ class ChamaViewSet(viewsets.ModelViewSet):
         return ChamaCreateUpdateSerializer
     
     def list(self, request, *args, **kwargs):
-        print("=== LIST ACTION DEBUG ===")
-        print(f"User: {request.user}")
-        print(f"User authenticated: {request.user.is_authenticated}")
-        print(f"User email: {getattr(request.user, 'email', 'No email')}")
-        print(f"Action: {self.action}")
-        print(f"Permissions: {self.get_permissions()}")
-        print("AUTH HEADER:", request.headers.get("Authorization"))
-        print("USER:", request.user)
-        print("AUTHENTICATED:", request.user.is_authenticated)
-
-        # Check current schema
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT current_schema();")
-            schema = cursor.fetchone()[0]
-            print(f"Current schema: {schema}")
-        
-        # Make sure to return the super() call
-        response = super().list(request, *args, **kwargs)
-        print(f"Response status: {response.status_code}")
-        return response
+        logger.debug("Chama list: user=%s authenticated=%s action=%s schema=%s",
+                     request.user, request.user.is_authenticated, self.action, connection.schema_name)
+        return super().list(request, *args, **kwargs)
     
 
     def get_permissions(self):
@@ -74,55 +69,31 @@ class ChamaViewSet(viewsets.ModelViewSet):
 
 
     def create(self, request, *args, **kwargs):
-        print("=== API CREATE DEBUG ===")
-        
-        # Debug: Check current schema
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT current_schema();")
-            schema = cursor.fetchone()[0]
-            print(f"Current schema: {schema}")
-        
-        # Debug: Check if table exists in current schema
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_schema_tables()
+        return super().create(request, *args, **kwargs)
+
+    @staticmethod
+    def _log_schema_tables():
+        """Debug aid for tenant routing: does the active schema have chamas_chama?"""
+        schema = connection.schema_name
         with connection.cursor() as cursor:
             cursor.execute("""
                 SELECT table_name 
                 FROM information_schema.tables 
-                WHERE table_schema = %s AND table_name = 'chamas_chama'
+                WHERE table_schema = %s
+                ORDER BY table_name
             """, [schema])
-            
-            if cursor.fetchone():
-                print(f"✓ chamas_chama exists in {schema}")
-            else:
-                print(f"✗ chamas_chama does NOT exist in {schema}")
-                # List available tables
-                cursor.execute("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_schema = %s
-                    ORDER BY table_name
-                """, [schema])
-                tables = [t[0] for t in cursor.fetchall()]
-                print(f"Available tables in {schema}: {tables}")
-        
-        print("=== END DEBUG ===")
-        
-        return super().create(request, *args, **kwargs)
+            tables = [t[0] for t in cursor.fetchall()]
+        if 'chamas_chama' in tables:
+            logger.debug("Chama create: chamas_chama exists in %s", schema)
+        else:
+            logger.debug("Chama create: chamas_chama does NOT exist in %s; tables: %s", schema, tables)
 
     def perform_create(self, serializer):
-        print("=== PERFORM_CREATE DEBUG ===")
-        print(f"User: {self.request.user.email}")
-        print(f"User ID: {self.request.user.id}")
-        
-        # Check if user exists in current schema
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        user_exists = User.objects.filter(id=self.request.user.id).exists()
-        print(f"User exists in current schema: {user_exists}")
-        
         chama = serializer.save(created_by=self.request.user)
         Member.objects.create(user=self.request.user, chama=chama, role='admin')
-        print(f"✓ Created chama: {chama.name}")
-        print("=== END PERFORM_CREATE DEBUG ===")
+        logger.debug("Created chama %s (user %s)", chama.name, self.request.user.email)
 
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
@@ -149,8 +120,12 @@ class ChamaViewSet(viewsets.ModelViewSet):
     def members(self, request, pk=None):
         chama = self.get_object()
         if request.method == 'GET':
-            members = chama.membership.all()
-            serializer = MemberSerializer(members, many=True)
+            if wants_stream(request):
+                # Full roster in constant memory
+                return streaming_json_response(request, MemberFlatSerializer.for_request(request),
+                                               chama.membership.order_by('id'))
+            members = MemberSerializer.optimize_queryset(chama.membership.all(), request)
+            serializer = MemberSerializer(members, many=True, context={'request': request})
             return Response(serializer.data)
 
         user_id = request.data.get('user_id')
@@ -164,4 +139,23 @@ class ChamaViewSet(viewsets.ModelViewSet):
             member.save()
             return Response(MemberSerializer(member).data)
         except Member.DoesNotExist:
-            return Response({"detail": "Member not found"}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return Response({"detail": "Member not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+@async_endpoint(['GET'], fallback=ChamaViewSet.as_view({'post': 'create'}))
+async def chama_list(request):
+    """
+    GET /api/chamas/ on the async stack: one annotated query instead of
+    two per chama; POST still goes to ChamaViewSet.create.
+    """
+    serializer = ChamaListFlatSerializer.for_request(request)
+    chamas = Chama.objects.order_by('-created_at')
+    # Only pay for the annotations the response includes (?fields=)
+    if 'member_count' in serializer.fields:
+        chamas = chamas.annotate(num_members=Count('membership'))
+    if 'is_member' in serializer.fields:
+        chamas = chamas.annotate(
+            user_is_member=Exists(Member.objects.filter(chama=OuterRef('pk'), user=request.user)))
+    if wants_stream(request):
+        return streaming_json_response(request, serializer, chamas)
+    return json_response(await serializer.arows(chamas))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('chamas', '0002_auto_20251119_1549'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContributionType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('description', models.TextField(blank=True)),
+                ('default_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_fixed', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Contribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='chamas.member')),
+                ('type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='contributions.contributiontype')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contribution',
+            name='usn',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0002_contribution_usn'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contribution',
+            name='reference',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
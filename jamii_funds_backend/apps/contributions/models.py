@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from apps.chamas.models import Chama, Member
+from apps.sync.models import SyncTracked
 
 
 class ContributionType(models.Model):
@@ -13,12 +14,13 @@ class ContributionType(models.Model):
         return self.name
 
 
-class Contribution(models.Model):
+class Contribution(SyncTracked):
     member = models.ForeignKey(Member, on_delete=models.CASCADE)
     type = models.ForeignKey(ContributionType, on_delete=models.SET_NULL, null=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     date = models.DateTimeField(auto_now_add=True)
-    reference = models.CharField(max_length=100, blank=True, null=True)
+    # STK CheckoutRequestID / M-Pesa receipt; looked up on every callback
+    reference = models.CharField(max_length=100, blank=True, null=True, db_index=True)
 
 
     def __str__(self):
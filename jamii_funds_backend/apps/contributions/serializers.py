@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import ContributionType, Contribution
+from apps.api.flat import FlatSerializer
+from apps.api.sparse import SparseFieldsMixin
 from apps.chamas.models import Member
 
 
@@ -10,7 +12,12 @@ class ContributionTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class ContributionSerializer(serializers.ModelSerializer):
+class ContributionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    collapsed_fields = {
+        'member': lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+        'type': lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+    }
+
     member = serializers.StringRelatedField()
     member_id = serializers.PrimaryKeyRelatedField(
         queryset=Member.objects.all(), source='member', write_only=True
@@ -31,4 +38,28 @@ class ContributionSerializer(serializers.ModelSerializer):
             'date',
             'reference'
         ]
-        read_only_fields = ['id', 'date']
\ No newline at end of file
+        read_only_fields = ['id', 'date']
+
+    @classmethod
+    def setup_member(cls, queryset, request, expanded):
+        # str(member) reads the user's email and the chama's name
+        return queryset.select_related('member__user', 'member__chama') if expanded else queryset
+
+    @classmethod
+    def setup_type(cls, queryset, request, expanded):
+        return queryset.select_related('type') if expanded else queryset
+
+
+class ContributionFlatSerializer(FlatSerializer):
+    """ContributionSerializer's read output from values_list() rows."""
+    fields = {
+        'id': 'id',
+        # str(member), see Member.__str__
+        'member': (('member__user__email', 'member__chama__name', 'member__role'),
+                   lambda email, chama, role: f"{email} in {chama} ({role})"),
+        'type': 'type__name',
+        'amount': 'amount',
+        'date': 'date',
+        'reference': 'reference',
+    }
+    collapsed = {'member': 'member_id', 'type': 'type_id'}
@@ -1,58 +1,101 @@
+from django.http import JsonResponse
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import action
-from rest_framework.response import Response
 from .models import Contribution
-from .serializers import ContributionSerializer
-from apps.payments.services.stk_push import initiate_stk_push
+from .serializers import ContributionFlatSerializer, ContributionSerializer
+from apps.api.renderers import json_response
+from apps.api.sparse import SparseFieldsViewSetMixin
+from apps.api.streaming import streaming_json_response, wants_stream
+from apps.core.async_api import async_endpoint
+from apps.payments.services.stk_push import ainitiate_stk_push
+from apps.payments.services.callback_auth import callback_url as daraja_callback_url
+from apps.payments.services.circuit import DarajaUnavailable
+from apps.payments.models import Payment
+from apps.chamas.models import Member
 
-class ContributionViewSet(viewsets.ModelViewSet):
+class ContributionViewSet(SparseFieldsViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """Read-only: rows are only written by contribute() and the Daraja callbacks."""
     queryset = Contribution.objects.all()
     serializer_class = ContributionSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         # Only show contributions for user's chamas
-        return self.queryset.filter(member=self.request.user)
-
-    def perform_create(self, serializer):
-        # Auto-assign member
-        serializer.save(member=self.request.user)
-
-    @action(detail=False, methods=['post'])
-    def contribute(self, request):
-        """
-        Custom endpoint: /api/contributions/contribute/
-        Body: { "chama_id": 1, "amount": 500, "phone": "254712345678" }
-        """
-        chama_id = request.data.get('chama_id')
-        amount = request.data.get('amount')
-        phone = request.data.get('phone')
-
-        if not all([chama_id, amount, phone]):
-            return Response({"error": "Missing fields"}, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            from apps.chamas.models import Chama
-            chama = Chama.objects.get(id=chama_id, members=request.user)
-        except Chama.DoesNotExist:
-            return Response({"error": "Invalid or unauthorized chama"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Initiate STK Push
-        callback_url = f"{request.scheme}://{request.get_host()}/api/payments/c2b/"
-        response = initiate_stk_push(phone, amount, f"Contribution to {chama.name}", callback_url)
-
-        if response.get("ResponseCode") == "0":
-            # Save pending contribution
-            contribution = Contribution.objects.create(
-                member=request.user,
-                chama=chama,
-                amount=amount
-            )
-            return Response({
-                "message": "STK Push sent",
-                "checkout_request_id": response["CheckoutRequestID"],
-                "contribution_id": contribution.id
-            })
-        else:
-            return Response({"error": "STK Push failed"}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return self.queryset.filter(member__user=self.request.user)
+
+
+@async_endpoint(['GET'])
+async def contribution_list(request):
+    """GET /api/contributions/ on the async stack."""
+    serializer = ContributionFlatSerializer.for_request(request)
+    contributions = Contribution.objects.filter(member__user=request.user)
+    if wants_stream(request):
+        return streaming_json_response(request, serializer, contributions.order_by('id'))
+    return json_response(await serializer.arows(contributions))
+
+
+@async_endpoint(['GET'])
+async def contribution_export(request):
+    """
+    Every contribution in the tenant, streamed (staff only)
+    GET /api/contributions/export/
+    """
+    if not request.user.is_staff:
+        return JsonResponse({"detail": "You do not have permission to perform this action."},
+                            status=status.HTTP_403_FORBIDDEN)
+    serializer = ContributionFlatSerializer.for_request(request)
+    return streaming_json_response(request, serializer, Contribution.objects.order_by('id'))
+
+
+@async_endpoint(['POST'])
+async def contribute(request):
+    """
+    Custom endpoint: /api/contributions/contribute/
+    Body: { "chama_id": 1, "amount": 500, "phone": "254712345678" }
+    Async: the worker keeps serving other requests while Daraja answers.
+    """
+    chama_id = request.data.get('chama_id')
+    amount = request.data.get('amount')
+    phone = request.data.get('phone')
+
+    if not all([chama_id, amount, phone]):
+        return JsonResponse({"error": "Missing fields"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        member = await Member.objects.select_related('chama').aget(chama_id=chama_id, user=request.user)
+    except (Member.DoesNotExist, ValueError):
+        return JsonResponse({"error": "Invalid or unauthorized chama"}, status=status.HTTP_400_BAD_REQUEST)
+    chama = member.chama
+
+    # Initiate STK Push
+    callback_url = daraja_callback_url(request, "/api/payments/c2b/")
+    try:
+        response = await ainitiate_stk_push(phone, amount, f"Contribution to {chama.name}", callback_url)
+    except DarajaUnavailable as exc:
+        return JsonResponse(
+            {"error": "M-Pesa is temporarily unavailable, please retry shortly"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    if response.get("ResponseCode") == "0":
+        # Save pending payment + contribution
+        await Payment.objects.acreate(
+            member=member,
+            phone_number=phone,
+            amount=amount,
+            checkout_request_id=response["CheckoutRequestID"],
+            merchant_request_id=response.get("MerchantRequestID"),
+        )
+        contribution = await Contribution.objects.acreate(
+            member=member,
+            amount=amount,
+            reference=response["CheckoutRequestID"]
+        )
+        return JsonResponse({
+            "message": "STK Push sent",
+            "checkout_request_id": response["CheckoutRequestID"],
+            "contribution_id": contribution.id
+        })
+    else:
+        return JsonResponse({"error": "STK Push failed"}, status=status.HTTP_400_BAD_REQUEST)
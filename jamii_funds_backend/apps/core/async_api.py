@@ -0,0 +1,96 @@
+# apps/core/async_api.py
+"""
+Plumbing for the async (ASGI) hot-path endpoints.
+
+DRF 3.15 views are sync-only, so the hot endpoints are plain Django async
+views wrapped in @async_endpoint: authentication as DRF's defaults do it
+(CachedTokenAuthentication, then the session user with CSRF enforced on
+unsafe methods), run in the request's thread-sensitive executor so it
+sees the tenant's connection, and a sync DRF view for the methods they do
+not handle.
+"""
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework.request import Request
+
+from apps.auth_app.authentication import CachedTokenAuthentication
+
+_authenticator = CachedTokenAuthentication()
+_session_authenticator = SessionAuthentication()
+
+
+def _authenticate(request):
+    result = _authenticator.authenticate(request)
+    if result is None:
+        # Raises PermissionDenied when an unsafe request fails the CSRF check
+        result = _session_authenticator.authenticate(Request(request))
+    return result
+
+
+async def aauthenticate(request):
+    """
+    Set request.user/request.auth from the token or the session; returns an
+    error string or None. PermissionDenied propagates for a failed CSRF check.
+    """
+    if getattr(request, '_force_auth_user', None) is not None:
+        # Already authenticated by the caller (batch sub-requests), as in DRF's force_authenticate
+        request.user, request.auth = request._force_auth_user, getattr(request, '_force_auth_token', None)
+        return None
+    try:
+        result = await sync_to_async(_authenticate)(request)
+    except AuthenticationFailed as exc:
+        return str(exc.detail)
+    if result is None:
+        return "Authentication credentials were not provided."
+    request.user, request.auth = result
+    return None
+
+
+def request_data(request):
+    """JSON or form body as a dict (empty when unparsable)."""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = None
+    else:
+        data = request.POST
+    return data if hasattr(data, 'get') else {}
+
+
+def async_endpoint(methods, fallback=None):
+    """
+    Serve `methods` from the decorated coroutine and everything else from
+    the sync `fallback` view (405 without one).
+    """
+    methods = [m.upper() for m in methods]
+
+    def decorator(handler):
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in methods:
+                if fallback is None:
+                    return HttpResponseNotAllowed(methods)
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+            try:
+                error = await aauthenticate(request)
+            except PermissionDenied as exc:
+                return JsonResponse({'detail': str(exc.detail)}, status=status.HTTP_403_FORBIDDEN)
+            if error:
+                return JsonResponse({'detail': error}, status=status.HTTP_401_UNAUTHORIZED,
+                                    headers={'WWW-Authenticate': _authenticator.authenticate_header(request)})
+            request.data = request_data(request)
+            return await handler(request, *args, **kwargs)
+
+        # CSRF is checked in aauthenticate() for session requests only, as DRF does;
+        # csrf_exempt() is not async-aware in Django 4.2. The sync fallback is a DRF
+        # view and enforces CSRF for session auth itself.
+        view.csrf_exempt = True
+        return view
+    return decorator
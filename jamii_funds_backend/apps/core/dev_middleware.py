@@ -1,20 +1,31 @@
 # apps/core/dev_middleware.py
+import logging
+
+from asgiref.sync import sync_to_async
 from django_tenants.utils import get_tenant_model
 from django.db import connection
 
-class ForceKibeMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-        
-    def __call__(self, request):
-        # Always force kibe schema for development
+from .middleware import AsyncCapableMiddleware
+
+logger = logging.getLogger(__name__)
+
+class ForceKibeMiddleware(AsyncCapableMiddleware):
+    def force_kibe(self, request):
+        # Always force kibe schema for development. request.tenant too:
+        # TenantShardMiddleware re-applies it to the shard's connection.
         try:
             TenantModel = get_tenant_model()
             kibe_tenant = TenantModel.objects.get(schema_name='kibe')
+            request.tenant = kibe_tenant
             connection.set_tenant(kibe_tenant)
-            print(f"✓ ForceKibeMiddleware: Set schema to kibe")
+            logger.debug("ForceKibeMiddleware: set schema to kibe")
         except Exception as e:
-            print(f"ForceKibeMiddleware warning: {e}")
-        
-        response = self.get_response(request)
-        return response
\ No newline at end of file
+            logger.warning("ForceKibeMiddleware: %s", e)
+
+    def handle(self, request):
+        self.force_kibe(request)
+        return self.get_response(request)
+
+    async def ahandle(self, request):
+        await sync_to_async(self.force_kibe)(request)
+        return await self.get_response(request)
@@ -0,0 +1,138 @@
+# apps/core/instrumentation.py
+"""
+Per-request performance records.
+
+InstrumentationMiddleware opens a RequestProfile for each request and
+keeps it in a contextvar. Two things add to it:
+  * record_query, an execute wrapper the Postgres backend installs on
+    every connection, counts statements and DB time and keeps the
+    PERF_SLOW_QUERIES slowest;
+  * record_http(), called by the Daraja client (payments.services.circuit),
+    adds outbound HTTP time.
+asgiref copies the context into sync_to_async threads, so queries run by
+async views and by batch sub-requests are counted too.
+
+When the response is ready, the request is recorded in the metrics
+registry (apps.core.metrics), and one structured line goes to the
+"jamii.perf" logger at INFO, or at WARNING past PERF_SLOW_REQUEST_MS. Queries run by a
+streaming body after the response has been returned are not counted.
+"""
+import heapq
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger("jamii.perf")
+
+_current = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    __slots__ = ("started", "queries", "db_time", "slowest", "http_calls", "http_time", "_lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = []   # min-heap of (seconds, seq, sql)
+        self.http_calls = 0
+        self.http_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, sql, seconds):
+        with self._lock:
+            self.queries += 1
+            self.db_time += seconds
+            item = (seconds, self.queries, sql)
+            if len(self.slowest) < settings.PERF_SLOW_QUERIES:
+                heapq.heappush(self.slowest, item)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def add_http(self, seconds):
+        with self._lock:
+            self.http_calls += 1
+            self.http_time += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_profile():
+    return _current.get()
+
+
+def start():
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - started)
+
+
+def record_http(seconds):
+    profile = _current.get()
+    if profile is not None:
+        profile.add_http(seconds)
+
+
+def view_label(request):
+    """(dotted view path, DRF viewset action or None) for the resolved view."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None, None
+    cls = getattr(match.func, "cls", None)
+    actions = getattr(match.func, "actions", None) or {}
+    view = f"{cls.__module__}.{cls.__name__}" if cls else match._func_path
+    return view, actions.get(request.method.lower())
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def finish(request, response, profile):
+    total = profile.elapsed()
+    if settings.PERF_SERVER_TIMING:
+        response["Server-Timing"] = (
+            f'db;dur={_ms(profile.db_time)};desc="{profile.queries} queries", '
+            f"http;dur={_ms(profile.http_time)}, total;dur={_ms(total)}"
+        )
+    view, action = view_label(request)
+    metrics.observe_request(request, response, profile, view, action)
+    level = logging.WARNING if total * 1000 >= settings.PERF_SLOW_REQUEST_MS else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    tenant = getattr(request, "tenant", None)
+    logger.log(level, "%s %s %s", request.method, request.path, response.status_code, extra={
+        "tenant": getattr(tenant, "schema_name", None),
+        "view": view,
+        "action": action,
+        "status": response.status_code,
+        "duration_ms": _ms(total),
+        "queries": profile.queries,
+        "db_ms": _ms(profile.db_time),
+        "http_calls": profile.http_calls,
+        "http_ms": _ms(profile.http_time),
+        "slow_queries": [
+            {"ms": _ms(seconds), "sql": sql[:settings.PERF_SQL_MAX_LENGTH]}
+            for seconds, _, sql in sorted(profile.slowest, reverse=True)
+        ],
+    })
@@ -0,0 +1,95 @@
+# apps/core/logs.py
+"""
+Logging plumbing shared by every app (wired up in settings.LOGGING).
+
+BackgroundHandler puts each record on a bounded queue and returns. A
+QueueListener thread formats it and writes it to stdout. A slow or
+blocked stdout therefore never stalls a request. Records are dropped,
+and counted, when the queue is full, rather than blocking the caller.
+
+This module is imported while settings are being configured, so it must
+not import models or anything that needs the app registry.
+"""
+import atexit
+import copy
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are merged in."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class BackgroundHandler(QueueHandler):
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        # Started lazily and per process, so forked workers get their own thread
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._listener = QueueListener(self.queue, self.target)
+                self._listener.start()
+                atexit.register(self._listener.stop)
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Resolve args and tracebacks now (they may not outlive the call);
+        # leave JSON encoding to the listener.
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def flush(self, timeout=1.0):
+        """Wait (briefly) until queued records are written."""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.target.flush()
@@ -0,0 +1,385 @@
+# apps/core/metrics.py
+"""
+In-process metrics registry exposed in Prometheus text format.
+
+Counters, gauges and histograms are updated in memory: a lock and a dict
+update, with no I/O on the request path. Labels are passed as keyword
+arguments, e.g. REQUEST_LATENCY.observe(0.12, view=..., action=..., tier=...).
+
+Several worker processes: set METRICS_DIR to a directory shared by the
+workers on the host. Every METRICS_FLUSH_SECONDS a background thread
+writes this process's values to <METRICS_DIR>/<pid>-<uuid>.json,
+replacing the file atomically. The uuid is drawn once per process, so a
+new worker that reuses a dead one's pid never overwrites its totals. The scrape endpoint (/metrics) merges every file:
+  * counters and histograms are summed over all files, including those
+    of workers that have exited, so totals never go backwards;
+  * gauges are summed over live processes only.
+Empty METRICS_DIR at deploy time, like prometheus_client's multiprocess
+mode. Without METRICS_DIR only the scraped process is reported.
+
+Per-tenant labels would give one series per tenant, so latency is
+labelled by tenant tier (tenant_tier()) instead.
+"""
+import atexit
+import bisect
+import glob
+import hmac
+import logging
+import os
+import threading
+import time
+import uuid
+
+import orjson
+from django.conf import settings
+from django.http import HttpResponse
+from django_tenants.utils import get_public_schema_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = f"{settings.METRICS_NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}   # label values tuple -> value
+        self._functions = []
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def collect_from(self, function):
+        """
+        Read values at flush/scrape time instead of on every update.
+        function() returns {label values tuple: number}.
+        """
+        self._functions.append(function)
+        return function
+
+    def samples(self):
+        """[(label values, value)] for this process."""
+        with self._lock:
+            samples = [(list(key), self._copy(value)) for key, value in self._values.items()]
+        for function in self._functions:
+            try:
+                samples += [(list(key), value) for key, value in function().items()]
+            except Exception:
+                logger.exception("Metric %s: collector %s failed", self.name, function.__name__)
+        return samples
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2]]
+
+
+# ────────────────────── REGISTRY & MULTI-PROCESS STORE ──────────────────────
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._pid = None
+        self._file = None   # (pid, file name) of the process that drew it
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        return {
+            name: {
+                "kind": metric.kind,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": metric.samples(),
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    # Files in METRICS_DIR
+    def _path(self):
+        pid = os.getpid()
+        if self._file is None or self._file[0] != pid:
+            # Drawn again after a fork
+            self._file = (pid, f"{pid}-{uuid.uuid4().hex}.json")
+        return os.path.join(settings.METRICS_DIR, self._file[1])
+
+    def flush(self):
+        if not settings.METRICS_DIR:
+            return
+        path = self._path()
+        tmp = f"{path}.tmp"
+        pid = os.getpid()
+        with open(tmp, "wb") as fh:
+            fh.write(orjson.dumps({"pid": pid, "started": _process_start(pid), "metrics": self.snapshot()}))
+        os.replace(tmp, path)
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Could not write metrics to %s", settings.METRICS_DIR)
+
+    def ensure_flusher(self):
+        """Start this process's flush thread (once per pid, so forked workers get one too)."""
+        if not settings.METRICS_DIR or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            threading.Thread(target=self._flush_forever, name="metrics-flush", daemon=True).start()
+            atexit.register(self.flush)
+            self._pid = os.getpid()
+
+    def collect(self):
+        """Merged snapshot of every process (or just this one without METRICS_DIR)."""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+        self.flush()
+        merged = {}
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+            try:
+                with open(path, "rb") as fh:
+                    data = orjson.loads(fh.read())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            live = _alive(data["pid"], data.get("started"))
+            for name, metric in data["metrics"].items():
+                if metric["kind"] == "gauge" and not live:
+                    continue
+                target = merged.setdefault(name, dict(metric, samples={}))
+                for labels, value in metric["samples"]:
+                    key = tuple(labels)
+                    target["samples"][key] = _add(metric["kind"], target["samples"].get(key), value)
+        for metric in merged.values():
+            metric["samples"] = [(list(key), value) for key, value in metric["samples"].items()]
+        return merged
+
+
+def _process_start(pid):
+    """Kernel start time of pid (Linux only), to tell a reused pid from the process that wrote a file."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as fh:
+            return int(fh.read().rsplit(b")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _alive(pid, started=None):
+    if started is not None:
+        return _process_start(pid) == started
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _add(kind, total, value):
+    if total is None:
+        return value
+    if kind == "histogram":
+        return [[a + b for a, b in zip(total[0], value[0])], total[1] + value[1], total[2] + value[2]]
+    return total + value
+
+
+registry = Registry()
+
+
+# ────────────────────── EXPOSITION ──────────────────────
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collected):
+    lines = []
+    for name, metric in sorted(collected.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labelnames"]
+        for values, value in metric["samples"]:
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(metric["buckets"]) + [float("inf")], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(names, values, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, values)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _authorized(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        return settings.DEBUG
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    return hmac.compare_digest(header, f"Bearer {token}")
+
+
+def metrics_view(request):
+    """GET /metrics — Prometheus scrape target (Bearer METRICS_TOKEN)."""
+    if not _authorized(request):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    collected = registry.collect()
+    collected[f"{settings.METRICS_NAMESPACE}_mpesa_callback_backlog"] = {
+        "kind": "gauge",
+        "help": "STK pushes accepted by Daraja whose callback has not arrived.",
+        "labelnames": [],
+        "samples": [([], callback_backlog(collected))],
+    }
+    return HttpResponse(render(collected), content_type=CONTENT_TYPE)
+
+
+# ────────────────────── APPLICATION METRICS ──────────────────────
+def tenant_tier(tenant):
+    """Low-cardinality label for a tenant: public, trial or its plan."""
+    if tenant is None or tenant.schema_name == get_public_schema_name():
+        return "public"
+    if getattr(tenant, "on_trial", False):
+        return "trial"
+    return getattr(tenant, "plan", None) or "paid"
+
+
+def status_class(code):
+    return f"{code // 100}xx" if code else "error"
+
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled.",
+    ("view", "action", "method", "status", "tier"))
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time from the outermost middleware to the response.",
+    ("view", "action", "tier"))
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Database time per request.",
+    ("view", "action", "tier"))
+REQUEST_QUERIES = Histogram(
+    "http_request_queries", "SQL statements per request.",
+    ("view", "action"), buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+MPESA_LATENCY = Histogram(
+    "mpesa_request_duration_seconds", "Outbound Daraja request latency.",
+    ("path", "status"), buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0))
+MPESA_STK_PUSHES = Counter(
+    "mpesa_stk_pushes_total", "STK push requests by Daraja ResponseCode outcome.",
+    ("outcome",))
+MPESA_CALLBACKS = Counter(
+    "mpesa_callbacks_total", "Daraja callbacks received.",
+    ("kind", "outcome"))
+CALLBACKS_IN_PROGRESS = Gauge(
+    "mpesa_callbacks_in_progress", "Daraja callbacks being applied right now.")
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Lookups of in-process caches, by result.",
+    ("cache", "result"))
+RATE_LIMITED = Counter(
+    "rate_limited_total", "Requests rejected with 429 by the rate limiter.",
+    ("scope", "tier"))
+QUEUE_DEPTH = Gauge(
+    "queue_depth", "Work waiting in in-process queues.",
+    ("queue",))
+
+
+def observe_request(request, response, profile, view, action):
+    tier = tenant_tier(getattr(request, "tenant", None))
+    view = view or "unresolved"
+    action = action or ""
+    REQUESTS.inc(view=view, action=action, method=request.method,
+                 status=status_class(response.status_code), tier=tier)
+    REQUEST_LATENCY.observe(profile.elapsed(), view=view, action=action, tier=tier)
+    REQUEST_DB_TIME.observe(profile.db_time, view=view, action=action, tier=tier)
+    REQUEST_QUERIES.observe(profile.queries, view=view, action=action)
+    registry.ensure_flusher()
+
+
+def callback_backlog(collected):
+    """STK pushes Daraja accepted minus STK callbacks received, across all workers."""
+    pushes = collected.get(MPESA_STK_PUSHES.name, {}).get("samples", [])
+    callbacks = collected.get(MPESA_CALLBACKS.name, {}).get("samples", [])
+    accepted = sum(value for labels, value in pushes if labels == ["accepted"])
+    received = sum(value for labels, value in callbacks if labels[:1] == ["stk"])
+    return max(0, accepted - received)
+
+
+@QUEUE_DEPTH.collect_from
+def _log_queue_depth():
+    from .logs import BackgroundHandler
+    handlers = {h for name in ("apps", "jamii.perf") for h in logging.getLogger(name).handlers
+                if isinstance(h, BackgroundHandler)}
+    return {("log_records",): sum(h.queue.qsize() for h in handlers)}
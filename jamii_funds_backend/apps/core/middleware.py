@@ -1,18 +1,108 @@
+import logging
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.http import HttpResponseForbidden
 from datetime import date, datetime
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django_tenants.middleware import TenantMiddleware
 from django_tenants.utils import get_tenant_model
-from django.db import connection
+from django.db import connection, connections
 
-class HeaderTenantMiddleware:
+from apps.auth_app.replicas import ause_replica, is_pinned, pin_key, pin_to_primary, replica_for, use_replica
+from apps.auth_app.sharding import atenant_shard, current_shard, tenant_shard
+
+from . import instrumentation, profiling, ratelimit
+
+logger = logging.getLogger(__name__)
+
+class AsyncCapableMiddleware:
     """
-    Custom middleware that reads tenant from X-Tenant header
-    Runs AFTER TenantMainMiddleware
+    Base for middleware that runs natively under WSGI and ASGI, so an
+    async view is not pushed back onto a thread by the middleware chain.
+    Subclasses implement handle() and ahandle(). Anything touching a
+    connection must go through sync_to_async() in ahandle(): connections
+    are per thread and the async ORM runs in the thread-sensitive executor.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-        
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.ahandle(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def ahandle(self, request):
+        raise NotImplementedError
+
+class InstrumentationMiddleware(AsyncCapableMiddleware):
+    """
+    Outermost middleware: records query count, DB time, outbound HTTP time
+    and the resolved view for each request (see apps.core.instrumentation).
+    """
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        profile, token = instrumentation.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        instrumentation.finish(request, response, profile)
+        return response
+
+    async def ahandle(self, request):
+        profile, token = instrumentation.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        instrumentation.finish(request, response, profile)
+        return response
+
+class TenantConnectionMiddleware(AsyncCapableMiddleware):
+    """
+    Starts and ends every request with all open connections on the public
+    schema, so a persistent connection never carries the previous
+    request's tenant. Only the in-memory schema changes here; the backend
+    sends SET search_path once, when a query actually needs another path.
+    """
+    @staticmethod
+    def reset():
+        for conn in connections.all(initialized_only=True):
+            if hasattr(conn, 'set_schema_to_public'):
+                conn.set_schema_to_public()
+
+    def handle(self, request):
+        self.reset()
+        try:
+            return self.get_response(request)
+        finally:
+            self.reset()
+
+    async def ahandle(self, request):
+        await sync_to_async(self.reset)()
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(self.reset)()
+
+class HeaderTenantMiddleware(AsyncCapableMiddleware):
+    """
+    Custom middleware that reads tenant from X-Tenant header
+    Runs AFTER TenantMainMiddleware
+    """
+    def apply_header(self, request):
         # TenantMainMiddleware has already set the schema
         # Now we check if we should override it with header
         
@@ -27,23 +117,121 @@ class HeaderTenantMiddleware:
                 tenant = model.objects.get(schema_name=tenant_header)
                 request.tenant = tenant
                 connection.set_tenant(tenant)
-                print(f"✓ HeaderTenantMiddleware: Override schema to {tenant.schema_name}")
+                logger.debug("HeaderTenantMiddleware: override schema to %s", tenant.schema_name)
             except model.DoesNotExist:
-                print(f"HeaderTenantMiddleware: Tenant '{tenant_header}' not found")
-        
+                logger.warning("HeaderTenantMiddleware: tenant '%s' not found", tenant_header)
+
+    def handle(self, request):
+        self.apply_header(request)
+        return self.get_response(request)
+
+    async def ahandle(self, request):
+        await sync_to_async(self.apply_header)(request)
+        return await self.get_response(request)
+
+class RateLimitMiddleware(AsyncCapableMiddleware):
+    """
+    Answers 429 with Retry-After once the tenant, or the API token within
+    it, is over its plan's limit (see apps.core.ratelimit).
+    """
+    def __init__(self, get_response):
+        if not settings.RATE_LIMIT_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        return ratelimit.check(request) or self.get_response(request)
+
+    async def ahandle(self, request):
+        # A shared cache is network I/O; keep it off the event loop
+        limited = await sync_to_async(ratelimit.check, thread_sensitive=False)(request)
+        return limited or await self.get_response(request)
+
+class TenantShardMiddleware(AsyncCapableMiddleware):
+    """
+    Routes the request's queries to the database holding request.tenant
+    (Client.shard) with the tenant schema on that connection's search_path.
+    """
+    def handle(self, request):
+        tenant = getattr(request, 'tenant', None)
+        if tenant is None:
+            return self.get_response(request)
+        with tenant_shard(tenant):
+            return self.get_response(request)
+
+    async def ahandle(self, request):
+        tenant = getattr(request, 'tenant', None)
+        if tenant is None:
+            return await self.get_response(request)
+        async with atenant_shard(tenant):
+            return await self.get_response(request)
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """
+    Serves safe requests from the shard's read replica. Callers that wrote
+    recently stay pinned to the primary so they read their own writes.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def handle(self, request):
+        if not replica_for(current_shard()):
+            # No replica for this shard: nothing to route, nothing to pin
+            return self.get_response(request)
+        key = pin_key(request)
+        if request.method in self.SAFE_METHODS and not is_pinned(key):
+            with use_replica(getattr(request, 'tenant', None)):
+                return self.get_response(request)
+
         response = self.get_response(request)
+        if request.method not in self.SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(key)
+        return response
+
+    async def ahandle(self, request):
+        if not replica_for(current_shard()):
+            return await self.get_response(request)
+        key = pin_key(request)
+        # The pin lives in the shared cache; keep it off the event loop
+        if request.method in self.SAFE_METHODS and not await sync_to_async(is_pinned, thread_sensitive=False)(key):
+            async with ause_replica(getattr(request, 'tenant', None)):
+                return await self.get_response(request)
+
+        response = await self.get_response(request)
+        if request.method not in self.SAFE_METHODS and response.status_code < 400:
+            await sync_to_async(pin_to_primary, thread_sensitive=False)(key)
         return response
 
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """
+    Profiles requests selected by a signed header, a per-tenant sample
+    rate or an admin toggle (see apps.core.profiling). Runs after the
+    tenant middlewares so it knows the tenant.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILE_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        trigger = profiling.trigger_for(request)
+        if trigger is None:
+            return self.get_response(request)
+        return profiling.profile_sync(request, self.get_response, trigger)
+
+    async def ahandle(self, request):
+        trigger = profiling.trigger_for(request)
+        if trigger is None:
+            return await self.get_response(request)
+        return await profiling.profile_async(request, self.get_response, trigger)
+
 class TrialMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         # Debug current tenant
-        if hasattr(request, 'tenant'):
-            print(f"TrialMiddleware - Current tenant: {getattr(request.tenant, 'schema_name', 'None')}")
-        else:
-            print("TrialMiddleware - No tenant set")
+        logger.debug("TrialMiddleware - current tenant: %s",
+                     getattr(getattr(request, 'tenant', None), 'schema_name', None))
             
         TenantModel = get_tenant_model()
         
@@ -0,0 +1,133 @@
+# apps/core/postgresql_backend/base.py
+"""
+django-tenants backend tuned for persistent connections.
+
+django-tenants runs `SET search_path` before every cursor (or once per
+set_tenant() with TENANT_LIMIT_SET_CALLS). This wrapper remembers the
+search_path actually in force on the physical connection and only sends
+SET when the active tenant needs a different one, so a reused
+connection (CONN_MAX_AGE) costs one round trip per tenant switch.
+
+What counts as "in force" is conservative:
+  * nothing, after connect/close, rollback or savepoint rollback
+    (a rolled-back SET is undone by Postgres);
+  * with TRANSACTION_POOLING (pgbouncer pool_mode=transaction) the
+    server connection can change between transactions, so nothing is
+    trusted once one ends.
+
+With TRANSACTION_POOLING a session-level SET is never sent: it would stay
+on the server connection and apply to whichever client pgbouncer hands it
+to next. Inside a transaction the backend sends SET LOCAL once. In
+autocommit, each statement is sent as "SET LOCAL search_path = ...; <sql>".
+Postgres runs a multi-statement simple query as one implicit transaction,
+so the setting covers exactly that statement. This relies on psycopg2's
+client-side parameter binding; psycopg 3 is rejected in this mode.
+"""
+import threading
+
+import django.db.utils
+from django.core.exceptions import ImproperlyConfigured
+from django_tenants.postgresql_backend import base as tenant_backend
+
+from apps.core.instrumentation import record_query
+
+stats = {"connects": 0, "search_path_sets": 0, "search_path_skips": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key):
+    with _stats_lock:
+        stats[key] += 1
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in stats:
+            stats[key] = 0
+
+
+class DatabaseWrapper(tenant_backend.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        self.applied_search_path = None
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.append(record_query)
+        if self.transaction_pooling:
+            self.execute_wrappers.append(self._scope_search_path)
+
+    @property
+    def transaction_pooling(self):
+        return bool(self.settings_dict.get("TRANSACTION_POOLING"))
+
+    def get_new_connection(self, conn_params):
+        if self.transaction_pooling and tenant_backend.is_psycopg3:
+            raise ImproperlyConfigured("TRANSACTION_POOLING needs psycopg2 (multi-statement queries)")
+        self.applied_search_path = None
+        _count("connects")
+        return super().get_new_connection(conn_params)
+
+    def _search_path_sql(self, statement):
+        return "{} search_path = {}".format(statement, ",".join(f"'{s}'" for s in self._get_cursor_search_paths()))
+
+    def _scope_search_path(self, execute, sql, params, many, context):
+        # Autocommit under a transaction pooler: bind the search_path to this
+        # statement's implicit transaction (see the module docstring)
+        if self.get_autocommit() and self.schema_name:
+            _count("search_path_sets")
+            sql = f"{self._search_path_sql('SET LOCAL')}; {sql}"
+        return execute(sql, params, many, context)
+
+    def close(self):
+        self.applied_search_path = None
+        super().close()
+
+    def _rollback(self):
+        self.applied_search_path = None
+        super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+        self.applied_search_path = None
+        super()._savepoint_rollback(sid)
+
+    def _commit(self):
+        super()._commit()
+        if self.transaction_pooling:
+            self.applied_search_path = None
+
+    def _set_autocommit(self, autocommit):
+        super()._set_autocommit(autocommit)
+        if self.transaction_pooling:
+            self.applied_search_path = None
+
+    def _cursor(self, name=None):
+        # Skip django-tenants' _cursor; the search_path is handled here
+        cursor = tenant_backend.original_backend.DatabaseWrapper._cursor(self, name=name)
+
+        if not self.schema_name:
+            raise ImproperlyConfigured("Database schema not set. Did you forget "
+                                       "to call set_schema() or set_tenant()?")
+        in_transaction = not self.get_autocommit()
+        if self.transaction_pooling and not in_transaction:
+            # Each statement carries its own SET LOCAL (_scope_search_path)
+            return cursor
+        search_paths = self._get_cursor_search_paths()
+        if search_paths == self.applied_search_path:
+            _count("search_path_skips")
+            return cursor
+
+        statement = "SET LOCAL" if self.transaction_pooling else "SET"
+        if name or tenant_backend.is_psycopg3:
+            # Named cursors can only be used once
+            cursor_for_search_path = self.connection.cursor()
+        else:
+            cursor_for_search_path = cursor
+        try:
+            cursor_for_search_path.execute(self._search_path_sql(statement))
+        except (django.db.utils.DatabaseError, tenant_backend.psycopg.InternalError):
+            # The transaction is already aborted; the rollback will follow
+            self.applied_search_path = None
+        else:
+            _count("search_path_sets")
+            self.applied_search_path = search_paths
+        if name or tenant_backend.is_psycopg3:
+            cursor_for_search_path.close()
+        return cursor
@@ -0,0 +1,236 @@
+# apps/core/profiling.py
+"""
+On-demand profiling of real production requests.
+
+ProfilingMiddleware profiles a request when one of these triggers matches:
+  * header: the request carries X-Jamii-Profile with a token from
+    `manage.py profiles token`. Tokens are signed with SECRET_KEY, expire
+    after PROFILE_TOKEN_MAX_AGE, and may be limited to one tenant;
+  * rate: a fraction of the tenant's requests, from PROFILE_TENANT_RATES;
+  * toggle: an admin switched on the tenant at runtime (`manage.py profiles
+    enable`, or POST /api/profiling/). Toggles live in the shared cache and
+    are re-read at most every PROFILE_TOGGLE_REFRESH seconds.
+
+Sync requests run under cProfile in PROFILE_MODE "cprofile" (the default).
+In "sample" mode they are sampled every PROFILE_SAMPLE_INTERVAL seconds
+instead. Async requests are always sampled: cProfile only sees one thread,
+and an async request runs on two. Samples are taken from the request's
+thread-sensitive executor, which belongs to this request alone, and from
+the event loop thread, which other requests share ("[event loop]" stacks).
+
+Each profile is written to PROFILE_DIR as gzip-compressed marshal data
+with tenant/view metadata, off the request thread. `manage.py profiles
+aggregate|diff` reads them back.
+"""
+import cProfile
+import gzip
+import logging
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .instrumentation import view_label
+
+logger = logging.getLogger(__name__)
+
+HEADER = "HTTP_X_JAMII_PROFILE"
+TOKEN_SALT = "jamii.profile"
+TOGGLES_KEY = "profiling:toggles"
+SUFFIX = ".prof.gz"
+
+
+# ────────────────────── TRIGGERS ──────────────────────
+def make_token(schema=None):
+    """Signed header value; schema=None works for every tenant."""
+    return signing.dumps({"schema": schema}, salt=TOKEN_SALT, compress=True)
+
+
+def _token_allows(value, schema):
+    try:
+        data = signing.loads(value, salt=TOKEN_SALT, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return data.get("schema") in (None, schema)
+
+
+class _Toggles:
+    """Process-local copy of the cache-backed toggles (schema -> (rate, until))."""
+
+    def __init__(self):
+        self.values = {}
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def rate(self, schema):
+        now = time.monotonic()
+        if now - self.loaded_at >= settings.PROFILE_TOGGLE_REFRESH:
+            with self._lock:
+                if now - self.loaded_at >= settings.PROFILE_TOGGLE_REFRESH:
+                    self.values = cache.get(TOGGLES_KEY) or {}
+                    self.loaded_at = now
+        rate, until = self.values.get(schema, (0.0, 0))
+        return rate if until > time.time() else 0.0
+
+
+toggles = _Toggles()
+
+
+def enable(schema, rate=1.0, minutes=30):
+    current = {k: v for k, v in (cache.get(TOGGLES_KEY) or {}).items() if v[1] > time.time()}
+    current[schema] = (float(rate), time.time() + minutes * 60)
+    cache.set(TOGGLES_KEY, current, timeout=None)
+    return current
+
+
+def disable(schema):
+    current = cache.get(TOGGLES_KEY) or {}
+    current.pop(schema, None)
+    cache.set(TOGGLES_KEY, current, timeout=None)
+    return current
+
+
+def active_toggles():
+    return {k: v for k, v in (cache.get(TOGGLES_KEY) or {}).items() if v[1] > time.time()}
+
+
+def trigger_for(request):
+    """Why this request should be profiled ("header", "rate", "toggle"), or None."""
+    schema = getattr(getattr(request, "tenant", None), "schema_name", None)
+    value = request.META.get(HEADER)
+    if value and _token_allows(value, schema):
+        return "header"
+    rate = settings.PROFILE_TENANT_RATES.get(schema, 0.0)
+    if rate and random.random() < rate:
+        return "rate"
+    rate = toggles.rate(schema)
+    if rate and random.random() < rate:
+        return "toggle"
+    return None
+
+
+# ────────────────────── CAPTURE ──────────────────────
+def _frame_label(code):
+    filename = code.co_filename
+    for prefix in sys.path:
+        if prefix and filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts folded stacks ("root;...;leaf") of the given threads on a timer."""
+
+    def __init__(self, threads, interval):
+        self.threads = threads          # thread ident -> stack prefix
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, prefix in self.threads.items():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    key = ";".join(([prefix] if prefix else []) + stack[::-1])
+                    self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _save(meta, kind, data):
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = "{}-{}-{}{}".format(
+        time.strftime("%Y%m%dT%H%M%S", time.gmtime(meta["ts"])), meta["tenant"] or "public",
+        uuid.uuid4().hex[:8], SUFFIX)
+    try:
+        with gzip.open(directory / name, "wb") as fh:
+            fh.write(marshal.dumps({"meta": meta, "kind": kind, "data": data}))
+    except OSError:
+        logger.exception("Could not write profile %s", name)
+
+
+def _store(request, response, trigger, mode, started, kind, data):
+    view, action = view_label(request)
+    meta = {
+        "ts": time.time(),
+        "tenant": getattr(getattr(request, "tenant", None), "schema_name", None),
+        "view": view,
+        "action": action,
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "trigger": trigger,
+        "mode": mode,
+        "pid": os.getpid(),
+    }
+    # Compression and disk I/O stay off the request thread
+    threading.Thread(target=_save, args=(meta, kind, data), name="profile-writer", daemon=True).start()
+    logger.info("Profiled %s %s (%s, %s)", request.method, request.path, trigger, mode)
+
+
+def load(path):
+    with gzip.open(path, "rb") as fh:
+        return marshal.loads(fh.read())
+
+
+def profile_sync(request, get_response, trigger):
+    started = time.perf_counter()
+    if settings.PROFILE_MODE == "sample":
+        sampler = StackSampler({threading.get_ident(): None}, settings.PROFILE_SAMPLE_INTERVAL)
+        sampler.start()
+        try:
+            response = get_response(request)
+        finally:
+            sampler.stop()
+        _store(request, response, trigger, "sample", started, "stacks", sampler.stacks)
+        return response
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    _store(request, response, trigger, "cprofile", started, "pstats", profiler.stats)
+    return response
+
+
+async def profile_async(request, get_response, trigger):
+    started = time.perf_counter()
+    worker = await sync_to_async(threading.get_ident)()
+    sampler = StackSampler({worker: "[request thread]", threading.get_ident(): "[event loop]"},
+                           settings.PROFILE_SAMPLE_INTERVAL)
+    sampler.start()
+    try:
+        response = await get_response(request)
+    finally:
+        sampler.stop()
+    _store(request, response, trigger, "sample", started, "stacks", sampler.stacks)
+    return response
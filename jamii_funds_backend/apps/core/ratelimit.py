@@ -0,0 +1,141 @@
+# apps/core/ratelimit.py
+"""
+Per-tenant and per-token request limits, enforced by RateLimitMiddleware.
+
+Each scope (the tenant, and the API token if the request carries one)
+gets RATE_LIMIT_PLANS[tenant.plan] requests per RATE_LIMIT_WINDOW. A
+sliding window is approximated from two fixed-window counters: the
+previous window's count is weighted by how much of it still overlaps the
+sliding window. A check costs three cache operations (add, incr, get)
+whatever the traffic, and no database query: the plan is read from
+request.tenant, which the tenant middleware has already loaded.
+
+Counting is incr-first, so concurrent workers never over-admit. Rejected
+requests count too: a client that keeps retrying stays limited until it
+backs off.
+
+Counters live in the RATE_LIMIT_CACHE cache so every worker shares them.
+If that cache errors, this process switches to its own in-memory counters
+for RATE_LIMIT_FALLBACK_SECONDS. Limits then apply per process rather
+than globally, but requests are neither failed nor left unlimited.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import JsonResponse
+
+from .metrics import RATE_LIMITED, tenant_tier
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rl"
+
+
+class _Store:
+    """The shared cache, falling back to process-local counters while it is failing."""
+
+    def __init__(self):
+        self.local = LocMemCache("jamii-ratelimit", {"OPTIONS": {"MAX_ENTRIES": 100000}})
+        self.failed_until = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, cache, current, previous, window):
+        # add() is a no-op when the key exists; incr() is atomic in shared backends
+        cache.add(current, 0, timeout=window * 2)
+        try:
+            count = cache.incr(current)
+        except ValueError:      # expired between add() and incr()
+            cache.set(current, 1, timeout=window * 2)
+            count = 1
+        return count, cache.get(previous, 0)
+
+    def count(self, current, previous, window):
+        """Increment `current`; return (current count, previous count)."""
+        if time.monotonic() >= self.failed_until:
+            try:
+                return self._count(caches[settings.RATE_LIMIT_CACHE], current, previous, window)
+            except Exception:
+                with self._lock:
+                    if time.monotonic() >= self.failed_until:
+                        logger.warning("Rate limit cache unavailable; counting per process for %ss",
+                                       settings.RATE_LIMIT_FALLBACK_SECONDS, exc_info=True)
+                    self.failed_until = time.monotonic() + settings.RATE_LIMIT_FALLBACK_SECONDS
+        return self._count(self.local, current, previous, window)
+
+
+store = _Store()
+
+
+def hit(scope, limit, window, now=None):
+    """
+    Count one request against scope. Returns seconds until the scope may
+    send again: 0.0 when this request is allowed.
+    """
+    now = time.time() if now is None else now
+    index, elapsed = divmod(now, window)
+    index = int(index)
+    current, previous = store.count(f"{KEY_PREFIX}:{scope}:{index}", f"{KEY_PREFIX}:{scope}:{index - 1}", window)
+    weight = (window - elapsed) / window
+    if previous * weight + current <= limit:
+        return 0.0
+    if previous and current < limit:
+        # The previous window's share shrinks as time passes; wait until
+        # one more request fits
+        return max(window * (1 - (limit - current - 1) / previous) - elapsed, 0.001)
+    return window - elapsed
+
+
+def token_scope(request):
+    """Short digest of the request's API token (never the key itself), or None."""
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    keyword, _, key = header.partition(" ")
+    if keyword not in ("Token", "Bearer") or not key.strip():
+        return None
+    return hashlib.blake2b(key.strip().encode(), digest_size=8).hexdigest()
+
+
+def exempt(request):
+    return request.path.startswith(settings.RATE_LIMIT_EXEMPT_PATHS)
+
+
+def check(request):
+    """A 429 response if the request is over its tenant's or token's limit, else None."""
+    tenant = getattr(request, "tenant", None)
+    if tenant is None or exempt(request):
+        return None
+    plan = getattr(tenant, "plan", None) or "standard"
+    tenant_limit, token_limit = settings.RATE_LIMIT_PLANS.get(plan, settings.RATE_LIMIT_PLANS["standard"])
+    window = settings.RATE_LIMIT_WINDOW
+    scopes = [("tenant", f"t:{tenant.schema_name}", tenant_limit)]
+    token = token_scope(request)
+    if token:
+        scopes.append(("token", f"k:{tenant.schema_name}:{token}", token_limit))
+
+    for scope, key, limit in scopes:
+        if not limit:
+            continue
+        wait = hit(key, limit, window)
+        if wait:
+            return too_many_requests(tenant, scope, limit, window, wait)
+    return None
+
+
+def too_many_requests(tenant, scope, limit, window, wait):
+    RATE_LIMITED.inc(scope=scope, tier=tenant_tier(tenant))
+    retry_after = max(1, math.ceil(wait))
+    response = JsonResponse(
+        {"detail": f"Request limit for this {scope} reached ({limit} per {window}s). "
+                   f"Try again in {retry_after}s."},
+        status=429,
+    )
+    response["Retry-After"] = str(retry_after)
+    response["RateLimit-Limit"] = str(limit)
+    response["RateLimit-Remaining"] = "0"
+    response["RateLimit-Reset"] = str(retry_after)
+    return response
@@ -1,10 +1,15 @@
 # apps/core/views.py
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from django_tenants.utils import schema_context
-from .models import Client, Domain
-from django.db import connection
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from apps.auth_app.models import Client, Domain
+from . import profiling
 import re
 from datetime import date
 
@@ -13,7 +18,6 @@ def signup(request):
         name = request.POST['name'].strip()
         subdomain = request.POST['subdomain'].lower().strip()
         email = request.POST['email'].strip()
-        phone = request.POST['phone'].strip()
         password = request.POST['password']
 
         # Validation
@@ -21,31 +25,29 @@ def signup(request):
             messages.error(request, "Subdomain can only contain letters, numbers, and hyphens")
             return render(request, 'core/signup.html')
 
-        if Client.objects.filter(subdomain=subdomain).exists():
+        schema_name = subdomain.replace('-', '_')
+        domain_name = f"{subdomain}.127.0.0.1:8000"
+        if (Client.objects.filter(schema_name=schema_name).exists()
+                or Domain.objects.filter(domain=domain_name).exists()):
             messages.error(request, "This subdomain is already taken!")
             return render(request, 'core/signup.html')
 
-        # 1. Create the tenant
+        # 1. Create the tenant. save() claims a warm pooled schema, or clones
+        #    the template schema (see auth_app.schema_pool / schema_templates)
         tenant = Client(
-            schema_name=subdomain.replace('-', '_'),
+            schema_name=schema_name,
             name=name,
-            subdomain=subdomain,
             on_trial=True,
             paid_until=date.today()
         )
         tenant.save()
 
         # 2. Create domain (for local dev)
-        domain_name = f"{subdomain}.127.0.0.1:8000"
         Domain.objects.create(domain=domain_name, tenant=tenant, is_primary=True)
 
-        # 3. Create schema
-        tenant.create_schema()
-
-        # 4. Create superuser inside the new tenant
+        # 3. Create superuser inside the new tenant
         with schema_context(tenant.schema_name):
-            User.objects.create_superuser(
-                username=email.split('@')[0],
+            get_user_model().objects.create_superuser(
                 email=email,
                 password=password
             )
@@ -53,4 +55,27 @@ def signup(request):
         messages.success(request, f"Success! Your chama is ready at http://{subdomain}.127.0.0.1:8000")
         return redirect('signup')
 
-    return render(request, 'core/signup.html')
\ No newline at end of file
+    return render(request, 'core/signup.html')
+
+
+@api_view(["GET", "POST", "DELETE"])
+@permission_classes([IsAdminUser])
+def profiling_toggle(request):
+    """
+    Admin toggle for request profiling of the current tenant
+    POST {"rate": 0.2, "minutes": 30} to start, DELETE to stop
+    """
+    schema = request.tenant.schema_name
+    if request.method == "POST":
+        try:
+            rate = float(request.data.get("rate", 1.0))
+            minutes = float(request.data.get("minutes", 30))
+        except (TypeError, ValueError):
+            return Response({"detail": "rate and minutes must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < rate <= 1 or not 0 < minutes <= settings.PROFILE_TOGGLE_MAX_MINUTES:
+            return Response({"detail": "Invalid rate or minutes"}, status=status.HTTP_400_BAD_REQUEST)
+        profiling.enable(schema, rate, minutes)
+    elif request.method == "DELETE":
+        profiling.disable(schema)
+    rate, until = profiling.active_toggles().get(schema, (0.0, None))
+    return Response({"tenant": schema, "rate": rate, "until": until})
@@ -0,0 +1,171 @@
+# apps/payments/events.py
+"""
+Payment status fan-out for the SSE endpoint (views.payment_events).
+
+Each worker keeps an in-process hub of asyncio queues keyed by
+(schema, checkout_request_id). publish_payment() runs once the payment
+update commits. It feeds the local subscribers and sends a NOTIFY on
+PAYMENT_EVENTS_CHANNEL. A listener thread in every other worker turns
+that NOTIFY back into a local publish. Each message carries the id of the
+worker that sent it, so a worker skips its own NOTIFY.
+
+An idle subscriber costs one queue and one suspended coroutine, so a
+worker can hold thousands of them (capped by SSE_MAX_SUBSCRIBERS).
+"""
+import asyncio
+import json
+import select
+import threading
+import time
+import uuid
+
+import psycopg2
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router, transaction
+
+from apps.contributions.models import Contribution
+from apps.core.metrics import QUEUE_DEPTH
+
+from .models import Payment
+
+PAYMENT_EVENTS_CHANNEL = "payment_events"
+TERMINAL_STATUSES = {"Completed", "Failed"}
+
+_origin = uuid.uuid4().hex
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass   # a subscriber that stopped reading only misses intermediate states
+
+
+class PaymentEventHub:
+    def __init__(self):
+        self._subscribers = {}   # (schema, checkout_request_id) -> {(loop, queue)}
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def subscribe(self, key):
+        """Register a queue on the running loop; None when the worker is full."""
+        queue = asyncio.Queue(maxsize=16)
+        with self._lock:
+            if self.size >= settings.SSE_MAX_SUBSCRIBERS:
+                return None
+            self._subscribers.setdefault(key, set()).add((asyncio.get_running_loop(), queue))
+            self.size += 1
+        return queue
+
+    def unsubscribe(self, key, queue):
+        with self._lock:
+            entries = self._subscribers.get(key, set())
+            for entry in [e for e in entries if e[1] is queue]:
+                entries.discard(entry)
+                self.size -= 1
+            if not entries:
+                self._subscribers.pop(key, None)
+
+    def publish(self, key, event):
+        """Deliver to local subscribers; safe to call from any thread."""
+        with self._lock:
+            targets = list(self._subscribers.get(key, ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                pass   # loop already closed
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": self.size, "checkouts": len(self._subscribers)}
+
+
+hub = PaymentEventHub()
+QUEUE_DEPTH.collect_from(lambda: {("sse_subscribers",): hub.size})
+
+
+def payment_event(payment):
+    contribution_id = (
+        Contribution.objects.filter(reference=payment.checkout_request_id)
+        .values_list("id", flat=True).first()
+    )
+    return {
+        "checkout_request_id": payment.checkout_request_id,
+        "status": payment.status,
+        "amount": str(payment.amount),
+        "contribution_id": contribution_id,
+    }
+
+
+def publish_payment(payment):
+    """Push payment's current state to every subscribed client once it commits."""
+    key = (connection.schema_name, payment.checkout_request_id)
+    event = payment_event(payment)
+
+    def send():
+        hub.publish(key, event)
+        if settings.PAYMENT_EVENTS_NOTIFY:
+            message = json.dumps({"origin": _origin, "schema": key[0], "event": event})
+            with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [PAYMENT_EVENTS_CHANNEL, message])
+
+    transaction.on_commit(send, using=router.db_for_write(Payment))
+
+
+# ────────────────────── LISTEN/NOTIFY BRIDGE ──────────────────────
+class NotifyListener(threading.Thread):
+    """Relays other workers' NOTIFYs into this worker's hub."""
+    daemon = True
+
+    def __init__(self):
+        super().__init__(name="payment-events-listener")
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except psycopg2.Error:
+                time.sleep(1)   # database restart or network blip; reconnect
+
+    def listen(self):
+        params = connections[DEFAULT_DB_ALIAS].get_connection_params()
+        conn = psycopg2.connect(**params)
+        try:
+            conn.set_session(autocommit=True)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {PAYMENT_EVENTS_CHANNEL}")
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self.dispatch(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def dispatch(payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == _origin:
+            return
+        event = message.get("event") or {}
+        hub.publish((message.get("schema"), event.get("checkout_request_id")), event)
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listener():
+    """Start this worker's listener thread on first use."""
+    global _listener
+    if not settings.PAYMENT_EVENTS_NOTIFY or _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is None:
+            _listener = NotifyListener()
+            _listener.start()
@@ -0,0 +1,68 @@
+# apps/payments/management/commands/loadtest_contribute.py
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(samples))) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = "Drive POST /api/contributions/contribute/ end to end and report latency and throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running API")
+        parser.add_argument("--token", required=True, help="API token of a member of --chama")
+        parser.add_argument("--tenant", default=None, help="Schema name sent as X-Tenant")
+        parser.add_argument("--chama", type=int, required=True)
+        parser.add_argument("--phone", default="254712345678")
+        parser.add_argument("--amount", default="100")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+
+    def handle(self, *args, **options):
+        url = options["url"].rstrip("/") + "/api/contributions/contribute/"
+        headers = {"Authorization": f"Token {options['token']}"}
+        if options["tenant"]:
+            headers["X-Tenant"] = options["tenant"]
+        body = {"chama_id": options["chama"], "amount": options["amount"], "phone": options["phone"]}
+
+        local = threading.local()
+        statuses = Counter()
+        latencies = []
+        lock = threading.Lock()
+
+        def one(_):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+            start = time.perf_counter()
+            try:
+                code = session.post(url, json=body, headers=headers, timeout=30).status_code
+            except requests.RequestException:
+                code = "error"
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[code] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(one, range(options["requests"])))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(f"requests:    {len(latencies)} in {wall:.2f}s (concurrency {options['concurrency']})")
+        self.stdout.write(f"throughput:  {len(latencies) / wall:.1f} req/s")
+        self.stdout.write(f"p50 latency: {percentile(latencies, 50) * 1000:.1f} ms")
+        self.stdout.write(f"p99 latency: {percentile(latencies, 99) * 1000:.1f} ms")
+        self.stdout.write("status:      " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items(), key=str)))
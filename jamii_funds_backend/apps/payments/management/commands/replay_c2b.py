@@ -0,0 +1,35 @@
+# apps/payments/management/commands/replay_c2b.py
+import json
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import schema_context
+
+from apps.payments.services.c2b import BATCH_SIZE, match_deposits
+
+
+def _read(path):
+    with open(path) as fh:
+        text = fh.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class Command(BaseCommand):
+    help = "Replay Daraja C2B confirmation payloads (JSON array or JSON lines) into a tenant"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--schema", required=True, help="Tenant schema to attribute deposits in")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        confirmations = _read(options["path"])
+        with schema_context(options["schema"]):
+            deposits = match_deposits(confirmations, batch_size=options["batch_size"])
+
+        matched = sum(1 for d in deposits if d.member_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(confirmations)} confirmations: {len(deposits)} new, "
+            f"{matched} matched, {len(deposits) - matched} unmatched"
+        ))
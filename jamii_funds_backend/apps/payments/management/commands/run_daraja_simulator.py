@@ -0,0 +1,38 @@
+# apps/payments/management/commands/run_daraja_simulator.py
+from django.core.management.base import BaseCommand
+
+from apps.payments.simulator import DarajaSimulator
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Daraja server (set MPESA_BASE_URL to its URL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+        parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, 0..jitter seconds")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+        parser.add_argument("--callback-delay", type=float, default=1.0, help="Seconds before the STK callback fires")
+        parser.add_argument("--callback-failure-rate", type=float, default=0.0,
+                            help="Fraction of callbacks reported as cancelled by the user")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        simulator = DarajaSimulator(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            jitter=options["jitter"],
+            failure_rate=options["failure_rate"],
+            callback_delay=options["callback_delay"],
+            callback_failure_rate=options["callback_failure_rate"],
+            seed=options["seed"],
+        )
+        self.stdout.write(f"Daraja simulator listening on {simulator.url}")
+        try:
+            simulator.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            simulator.shutdown()
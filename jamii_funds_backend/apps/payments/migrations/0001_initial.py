@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('chamas', '0002_auto_20251119_1549'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number', models.CharField(max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('checkout_request_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('merchant_request_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('status', models.CharField(default='Pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='chamas.member')),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamas', '0002_auto_20251119_1549'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='msisdn',
+            field=models.CharField(blank=True, db_index=True, max_length=15),
+        ),
+        migrations.CreateModel(
+            name='C2BDeposit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trans_id', models.CharField(max_length=50, unique=True)),
+                ('trans_time', models.CharField(blank=True, max_length=20)),
+                ('msisdn', models.CharField(blank=True, db_index=True, max_length=15)),
+                ('bill_ref_number', models.CharField(blank=True, max_length=100)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('first_name', models.CharField(blank=True, max_length=100)),
+                ('matched_by', models.CharField(blank=True, choices=[('reference', 'Account reference'), ('msisdn', 'Phone number'), ('', 'Unmatched')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='chamas.member')),
+                ('payment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='payments.payment')),
+            ],
+        ),
+    ]
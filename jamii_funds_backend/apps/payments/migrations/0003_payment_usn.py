@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_payment_msisdn_c2bdeposit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='usn',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
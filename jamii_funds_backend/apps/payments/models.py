@@ -1,18 +1,49 @@
 from django.db import models
 
 from apps.chamas.models import Member
+from apps.sync.models import SyncTracked
+from .services.msisdn import normalize_msisdn
 
-    
-class Payment(models.Model):
+
+class Payment(SyncTracked):
     member = models.ForeignKey(Member, on_delete=models.CASCADE)
     phone_number = models.CharField(max_length=20)
+    # phone_number normalized to 2547XXXXXXXX, used for payer lookups
+    msisdn = models.CharField(max_length=15, blank=True, db_index=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
 
-    checkout_request_id = models.CharField(max_length=200, null=True, blank=True)
+    # Daraja's STK id; looked up by every callback and the SSE stream. Null for C2B deposits.
+    checkout_request_id = models.CharField(max_length=200, null=True, blank=True, unique=True)
     merchant_request_id = models.CharField(max_length=200, null=True, blank=True)
 
     status = models.CharField(max_length=20, default="Pending")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.msisdn = normalize_msisdn(self.phone_number)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.member} - {self.amount} ({self.status})"
+
+
+class C2BDeposit(models.Model):
+    """A paybill deposit received through the Daraja C2B confirmation URL."""
+    trans_id = models.CharField(max_length=50, unique=True)
+    trans_time = models.CharField(max_length=20, blank=True)
+    msisdn = models.CharField(max_length=15, blank=True, db_index=True)
+    bill_ref_number = models.CharField(max_length=100, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    first_name = models.CharField(max_length=100, blank=True)
+
+    member = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True)
+    payment = models.OneToOneField(Payment, on_delete=models.SET_NULL, null=True, blank=True)
+    matched_by = models.CharField(
+        max_length=20,
+        choices=(('reference', 'Account reference'), ('msisdn', 'Phone number'), ('', 'Unmatched')),
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
-        return f"{self.member} - {self.amount} ({self.status})"
\ No newline at end of file
+        return f"{self.trans_id} - {self.amount} ({self.matched_by or 'unmatched'})"
@@ -1,4 +1,4 @@
 # apps/payments/services/__init__.py
-from .stk_push import initiate_stk_push
+from .stk_push import ainitiate_stk_push, aquery_stk_push, initiate_stk_push, query_stk_push
 
-__all__ = ["initiate_stk_push"]
+__all__ = ["initiate_stk_push", "query_stk_push", "ainitiate_stk_push", "aquery_stk_push"]
@@ -0,0 +1,145 @@
+# apps/payments/services/c2b.py
+"""
+Attribute paybill (C2B) deposits to chama members.
+
+Deposits are matched first by account reference ("C<chama>-<member>"),
+then by the payer's MSISDN against earlier payments. All lookups are
+batched and go through indexed columns, so replaying thousands of
+confirmations costs a handful of queries per batch.
+"""
+import re
+from decimal import Decimal
+
+from django.db import router, transaction
+
+from apps.chamas.models import Member
+from apps.contributions.models import Contribution
+from apps.payments.models import C2BDeposit, Payment
+from apps.sync.models import current_usn
+from .msisdn import normalize_msisdn
+
+BATCH_SIZE = 1000
+
+# "C12-345", "C12/345", "C12M345", "C12 345" or just "C12". The C prefix is
+# required so a phone number typed as the reference is not read as a chama.
+ACCOUNT_REF_RE = re.compile(r"^C(\d+)(?:\s*[-/ ]?\s*M?(\d+))?$", re.IGNORECASE)
+
+
+def parse_account_reference(reference):
+    """Return (chama_id, member_id); either may be None."""
+    match = ACCOUNT_REF_RE.match((reference or "").strip())
+    if not match:
+        return None, None
+    chama_id, member_id = match.groups()
+    return int(chama_id), int(member_id) if member_id else None
+
+
+def _row(confirmation):
+    chama_id, member_id = parse_account_reference(confirmation.get("BillRefNumber"))
+    return {
+        "trans_id": str(confirmation.get("TransID") or "").strip(),
+        "trans_time": str(confirmation.get("TransTime") or ""),
+        "msisdn": normalize_msisdn(confirmation.get("MSISDN")),
+        "bill_ref_number": str(confirmation.get("BillRefNumber") or "")[:100],
+        "amount": Decimal(str(confirmation.get("TransAmount") or 0)),
+        "first_name": str(confirmation.get("FirstName") or "")[:100],
+        "chama_id": chama_id,
+        "member_id": member_id,
+    }
+
+
+def _match_batch(rows):
+    trans_ids = [row["trans_id"] for row in rows]
+    seen = set(C2BDeposit.objects.filter(trans_id__in=trans_ids).values_list("trans_id", flat=True))
+    fresh = {}
+    for row in rows:
+        if row["trans_id"] and row["trans_id"] not in seen:
+            fresh.setdefault(row["trans_id"], row)
+    rows = list(fresh.values())
+    if not rows:
+        return []
+
+    # Members named by account reference: {(chama_id, member_id)}
+    referenced = set(
+        Member.objects.filter(pk__in={row["member_id"] for row in rows if row["member_id"]})
+        .values_list("chama_id", "pk")
+    )
+
+    # Most recent member paying from each MSISDN, overall and per chama
+    by_msisdn, by_msisdn_chama = {}, {}
+    payers = (
+        Payment.objects.filter(msisdn__in={row["msisdn"] for row in rows if row["msisdn"]})
+        .order_by("-created_at")
+        .values_list("msisdn", "member_id", "member__chama_id")
+    )
+    for msisdn, member_id, chama_id in payers:
+        by_msisdn.setdefault(msisdn, member_id)
+        by_msisdn_chama.setdefault((msisdn, chama_id), member_id)
+
+    deposits, payments, contributions = [], [], []
+    for row in rows:
+        member_id, matched_by = None, ""
+        if (row["chama_id"], row["member_id"]) in referenced:
+            member_id, matched_by = row["member_id"], "reference"
+        elif row["chama_id"] and (row["msisdn"], row["chama_id"]) in by_msisdn_chama:
+            member_id, matched_by = by_msisdn_chama[(row["msisdn"], row["chama_id"])], "msisdn"
+        elif not row["chama_id"] and row["msisdn"] in by_msisdn:
+            member_id, matched_by = by_msisdn[row["msisdn"]], "msisdn"
+
+        deposit = C2BDeposit(
+            trans_id=row["trans_id"],
+            trans_time=row["trans_time"],
+            msisdn=row["msisdn"],
+            bill_ref_number=row["bill_ref_number"],
+            amount=row["amount"],
+            first_name=row["first_name"],
+            member_id=member_id,
+            matched_by=matched_by,
+        )
+        deposits.append(deposit)
+        if member_id:
+            # bulk_create skips Payment.save(), so set msisdn here
+            payments.append(Payment(
+                member_id=member_id,
+                phone_number=row["msisdn"],
+                msisdn=row["msisdn"],
+                amount=row["amount"],
+                merchant_request_id=row["trans_id"],
+                status="Completed",
+            ))
+            contributions.append(Contribution(
+                member_id=member_id,
+                amount=row["amount"],
+                reference=row["trans_id"],
+            ))
+
+    with transaction.atomic(using=router.db_for_write(Payment)):
+        # bulk_create skips SyncTracked.save() too
+        usn = current_usn(router.db_for_write(Payment))
+        for obj in (*payments, *contributions):
+            obj.usn = usn
+        Payment.objects.bulk_create(payments)
+        Contribution.objects.bulk_create(contributions)
+        payment_iter = iter(payments)
+        for deposit in deposits:
+            if deposit.member_id:
+                deposit.payment = next(payment_iter)
+        C2BDeposit.objects.bulk_create(deposits)
+    return deposits
+
+
+def match_deposits(confirmations, batch_size=BATCH_SIZE):
+    """
+    Record and attribute Daraja C2B confirmation payloads.
+    Duplicate TransIDs are ignored; returns the newly created deposits.
+    """
+    created = []
+    batch = []
+    for confirmation in confirmations:
+        batch.append(_row(confirmation))
+        if len(batch) >= batch_size:
+            created.extend(_match_batch(batch))
+            batch = []
+    if batch:
+        created.extend(_match_batch(batch))
+    return created
@@ -0,0 +1,39 @@
+# apps/payments/services/callback_auth.py
+"""
+Only Daraja may call the callback endpoints: they create Completed
+payments and contributions, so a forged POST would credit a member.
+
+Every callback URL we hand to Daraja carries MPESA_CALLBACK_TOKEN as
+?token=. Register the C2B confirmation/validation URLs with it too.
+MPESA_CALLBACK_ALLOWED_IPS optionally restricts the source addresses
+(Safaricom publishes its callback IPs). When both are set, both must
+match. When neither is set, callbacks are only accepted with DEBUG on.
+"""
+import hmac
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+
+def callback_url(request, path):
+    """Absolute URL for a Daraja callback on this host, with the shared token."""
+    url = f"{request.scheme}://{request.get_host()}{path}"
+    if settings.MPESA_CALLBACK_TOKEN:
+        url += "?" + urlencode({"token": settings.MPESA_CALLBACK_TOKEN})
+    return url
+
+
+def client_ip(request):
+    # Behind a proxy, REMOTE_ADDR must already be the client's (e.g. via the proxy's real-IP module)
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def is_daraja(request):
+    token, allowed = settings.MPESA_CALLBACK_TOKEN, settings.MPESA_CALLBACK_ALLOWED_IPS
+    if not token and not allowed:
+        return settings.DEBUG
+    if token and not hmac.compare_digest(request.GET.get("token", "").encode(), token.encode()):
+        return False
+    if allowed and client_ip(request) not in allowed:
+        return False
+    return True
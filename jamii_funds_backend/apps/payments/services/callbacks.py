@@ -0,0 +1,32 @@
+# apps/payments/services/callbacks.py
+from apps.payments.events import publish_payment
+from apps.payments.models import Payment
+from apps.sync.models import TxidCurrent
+
+
+def apply_stk_callback(payload):
+    """
+    Apply a Daraja STK callback to the matching Payment.
+    Returns the matching Payment, or None if the callback is unknown.
+    """
+    # Daraja must always get a 200, so a malformed body is just unmatched
+    body = payload.get("Body") if isinstance(payload, dict) else None
+    callback = body.get("stkCallback") if isinstance(body, dict) else None
+    if not isinstance(callback, dict):
+        return None
+    checkout_request_id = callback.get("CheckoutRequestID")
+    if not checkout_request_id or not isinstance(checkout_request_id, str):
+        return None
+
+    payment = Payment.objects.filter(checkout_request_id=checkout_request_id).first()
+    if payment is None:
+        return None
+
+    new_status = "Completed" if str(callback.get("ResultCode")) == "0" else "Failed"
+    # Only a Pending payment settles; a repeated or late callback is a no-op.
+    # update() skips SyncTracked.save(), so stamp the usn here.
+    settled = Payment.objects.filter(pk=payment.pk, status="Pending").update(status=new_status, usn=TxidCurrent())
+    if settled:
+        payment.status = new_status
+        publish_payment(payment)
+    return payment
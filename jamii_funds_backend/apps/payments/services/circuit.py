@@ -0,0 +1,258 @@
+# apps/payments/services/circuit.py
+"""
+Rate limiting and circuit breaking for outbound Daraja traffic.
+
+State lives in Django's cache so every worker shares one bucket and one
+breaker; point CACHES at Redis or the database cache in production (the
+default LocMemCache only coordinates threads inside one process).
+
+aguarded_request() is the async twin used by the async payment views; it
+shares the same bucket and breaker and sends through httpx.
+"""
+import asyncio
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.instrumentation import record_http
+from apps.core.metrics import MPESA_LATENCY, status_class
+
+
+class DarajaUnavailable(Exception):
+    """Raised instead of calling Daraja when the breaker is open or we are throttled."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _CacheLock:
+    """Best-effort cross-process mutex built on cache.add()."""
+
+    def __init__(self, key, timeout=1.0):
+        self.key = key
+        self.timeout = timeout
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while not cache.add(self.key, 1, timeout=5):
+            if time.monotonic() > deadline:
+                raise DarajaUnavailable("Rate limiter busy")
+            time.sleep(0.005)
+        return self
+
+    def __exit__(self, *exc):
+        cache.delete(self.key)
+
+
+def _incr(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+class TokenBucket:
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.key = f"daraja:bucket:{name}"
+
+    def _take(self):
+        """Take one token; return 0 on success or the seconds until one is available."""
+        with _CacheLock(f"{self.key}:lock"):
+            now = time.time()
+            tokens, stamp = cache.get(self.key) or (self.burst, now)
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            if tokens >= 1:
+                cache.set(self.key, (tokens - 1, now), timeout=3600)
+                return 0
+            cache.set(self.key, (tokens, now), timeout=3600)
+            return (1 - tokens) / self.rate
+
+    def acquire(self, max_wait=0.0):
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._take()
+            if not wait:
+                _incr(f"{self.key}:allowed")
+                return
+            if time.monotonic() + wait > deadline:
+                _incr(f"{self.key}:throttled")
+                raise DarajaUnavailable("Daraja rate limit reached", retry_after=max(1, int(wait + 0.999)))
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait=0.0):
+        # _take() may spin on the cache lock, so keep it off the event loop
+        take = sync_to_async(self._take, thread_sensitive=False)
+        incr = sync_to_async(_incr, thread_sensitive=False)
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = await take()
+            if not wait:
+                await incr(f"{self.key}:allowed")
+                return
+            if time.monotonic() + wait > deadline:
+                await incr(f"{self.key}:throttled")
+                raise DarajaUnavailable("Daraja rate limit reached", retry_after=max(1, int(wait + 0.999)))
+            await asyncio.sleep(wait)
+
+    def snapshot(self):
+        tokens, stamp = cache.get(self.key) or (self.burst, time.time())
+        return {
+            "tokens": min(self.burst, tokens + (time.time() - stamp) * self.rate),
+            "rate": self.rate,
+            "burst": self.burst,
+            "allowed_total": cache.get(f"{self.key}:allowed", 0),
+            "throttled_total": cache.get(f"{self.key}:throttled", 0),
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, threshold, cooldown):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.key = f"daraja:breaker:{name}"
+
+    def state(self):
+        opened_at = cache.get(f"{self.key}:opened_at")
+        if opened_at is None:
+            return self.CLOSED
+        if time.time() - opened_at < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_call(self):
+        state = self.state()
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and cache.add(f"{self.key}:probe", 1, timeout=self.cooldown):
+            # Let exactly one worker probe Daraja; everyone else fails fast
+            return
+        _incr(f"{self.key}:rejected")
+        opened_at = cache.get(f"{self.key}:opened_at") or time.time()
+        retry_after = max(1, int(self.cooldown - (time.time() - opened_at) + 0.999))
+        raise DarajaUnavailable("Daraja circuit breaker is open", retry_after=retry_after)
+
+    def record_success(self):
+        if cache.get(f"{self.key}:failures"):
+            cache.delete_many([f"{self.key}:failures", f"{self.key}:opened_at", f"{self.key}:probe"])
+
+    def record_failure(self):
+        _incr(f"{self.key}:failures_total")
+        failures = _incr(f"{self.key}:failures")
+        if self.state() == self.HALF_OPEN or failures >= self.threshold:
+            if self.state() != self.OPEN:
+                _incr(f"{self.key}:opened_total")
+            cache.set(f"{self.key}:opened_at", time.time(), timeout=None)
+            cache.delete(f"{self.key}:probe")
+
+    def snapshot(self):
+        return {
+            "state": self.state(),
+            "consecutive_failures": cache.get(f"{self.key}:failures", 0),
+            "failures_total": cache.get(f"{self.key}:failures_total", 0),
+            "opened_total": cache.get(f"{self.key}:opened_total", 0),
+            "rejected_total": cache.get(f"{self.key}:rejected", 0),
+        }
+
+
+bucket = TokenBucket("outbound", settings.MPESA_RATE_LIMIT, settings.MPESA_RATE_BURST)
+breaker = CircuitBreaker("outbound", settings.MPESA_BREAKER_THRESHOLD, settings.MPESA_BREAKER_COOLDOWN)
+
+
+def _observe(url, started, response):
+    elapsed = time.perf_counter() - started
+    record_http(elapsed)
+    MPESA_LATENCY.observe(elapsed, path=urlsplit(url).path,
+                          status=status_class(response.status_code if response is not None else None))
+
+
+def guarded_request(method, url, **kwargs):
+    """
+    requests.request() behind the shared rate limiter and circuit breaker.
+    Timeouts, connection errors and 5xx responses count as failures.
+    """
+    breaker.before_call()
+    bucket.acquire(max_wait=settings.MPESA_RATE_MAX_WAIT)
+    kwargs.setdefault("timeout", settings.MPESA_TIMEOUT)
+    started, response = time.perf_counter(), None
+    try:
+        response = requests.request(method, url, **kwargs)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise DarajaUnavailable("Daraja request failed", retry_after=1)
+    finally:
+        _observe(url, started, response)
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+# One pooled client per event loop; a client cannot be shared across loops.
+# Under WSGI, async_to_sync runs every request in a throwaway loop, so each
+# client must be closed with its loop (see _close_with_loop).
+_async_clients = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(loop, client):
+    # An open async generator is closed by loop.shutdown_asyncgens(), which
+    # asyncio.run() (async_to_sync, uvicorn) awaits before closing the loop
+    try:
+        yield
+    finally:
+        _async_clients.pop(loop, None)
+        await client.aclose()
+
+
+async def _async_client():
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=settings.MPESA_MAX_CONNECTIONS))
+        closer = _close_with_loop(loop, client)
+        await closer.asend(None)
+        entry = _async_clients[loop] = (client, closer)
+    return entry[0]
+
+
+async def aguarded_request(method, url, **kwargs):
+    """guarded_request() without blocking the event loop while Daraja answers."""
+    # The breaker's state lives in the (blocking) cache, like the bucket's
+    await sync_to_async(breaker.before_call, thread_sensitive=False)()
+    await bucket.aacquire(max_wait=settings.MPESA_RATE_MAX_WAIT)
+    kwargs.setdefault("timeout", settings.MPESA_TIMEOUT)
+    client = await _async_client()
+    started, response = time.perf_counter(), None
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        await sync_to_async(breaker.record_failure, thread_sensitive=False)()
+        raise DarajaUnavailable("Daraja request failed", retry_after=1)
+    finally:
+        _observe(url, started, response)
+    if response.status_code >= 500:
+        await sync_to_async(breaker.record_failure, thread_sensitive=False)()
+    else:
+        await sync_to_async(breaker.record_success, thread_sensitive=False)()
+    return response
+
+
+def metrics():
+    return {"rate_limiter": bucket.snapshot(), "circuit_breaker": breaker.snapshot()}
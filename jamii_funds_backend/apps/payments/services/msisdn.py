@@ -0,0 +1,17 @@
+# apps/payments/services/msisdn.py
+
+
+def normalize_msisdn(phone):
+    """
+    Normalize a Kenyan phone number to 2547XXXXXXXX form.
+    These are the rules initiate_stk_push has always applied, plus
+    stripping whitespace and a leading '+'.
+    """
+    if not phone:
+        return ""
+    phone = "".join(str(phone).split()).lstrip("+")
+    # Format phone: remove leading 0, add 254
+    phone = phone.lstrip("0")
+    if not phone.startswith("254"):
+        phone = "254" + phone
+    return phone
@@ -1,49 +1,50 @@
 # apps/payments/services/stk_push.py
-import requests
 import base64
 import datetime
 from django.conf import settings
 
+from apps.core.metrics import MPESA_STK_PUSHES
 
-def get_access_token():
-    """Get OAuth token from M-Pesa"""
+from .circuit import aguarded_request, guarded_request
+from .msisdn import normalize_msisdn
+
+
+def _api_url(path):
+    return f"{settings.MPESA_BASE_URL.rstrip('/')}{path}"
+
+
+def _password(timestamp):
+    shortcode = settings.MPESA_SHORTCODE
+    passkey = settings.MPESA_PASSKEY
+    data_to_encode = shortcode + passkey + timestamp
+    return base64.b64encode(data_to_encode.encode()).decode()
+
+
+def _timestamp():
+    return datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+
+
+def _token_request():
     consumer_key = settings.MPESA_CONSUMER_KEY
     consumer_secret = settings.MPESA_CONSUMER_SECRET
-    api_url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
+    api_url = _api_url("/oauth/v1/generate?grant_type=client_credentials")
 
     auth_str = f"{consumer_key}:{consumer_secret}"
     auth_token = base64.b64encode(auth_str.encode()).decode()
 
     headers = {"Authorization": f"Basic {auth_token}"}
-    response = requests.get(api_url, headers=headers)
-    return response.json().get("access_token")
+    return api_url, headers
 
 
-def initiate_stk_push(phone, amount, account_ref, callback_url):
-    """
-    Initiate STK Push
-    Docs: https://developer.safaricom.co.ke/APIs/STKPush
-    """
-    access_token = get_access_token()
-    if not access_token:
-        return {"ResponseCode": "1", "error": "Failed to get token"}
-
-    # Format phone: remove leading 0, add 254
-    phone = phone.lstrip("0")
-    if not phone.startswith("254"):
-        phone = "254" + phone
+def _stk_push_payload(phone, amount, account_ref, callback_url):
+    phone = normalize_msisdn(phone)
 
     # Generate password
     shortcode = settings.MPESA_SHORTCODE
-    passkey = settings.MPESA_PASSKEY
-    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    data_to_encode = shortcode + passkey + timestamp
-    encoded_password = base64.b64encode(data_to_encode.encode()).decode()
+    timestamp = _timestamp()
+    encoded_password = _password(timestamp)
 
-    api_url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-    headers = {"Authorization": f"Bearer {access_token}"}
-
-    payload = {
+    return {
         "BusinessShortCode": shortcode,
         "Password": encoded_password,
         "Timestamp": timestamp,
@@ -57,5 +58,94 @@ def initiate_stk_push(phone, amount, account_ref, callback_url):
         "TransactionDesc": f"Contribution to {account_ref}",
     }
 
-    response = requests.post(api_url, json=payload, headers=headers)
-    return response.json()
\ No newline at end of file
+
+def _counted(result):
+    # Accepted pushes minus STK callbacks is the callback backlog (apps.core.metrics)
+    MPESA_STK_PUSHES.inc(outcome="accepted" if str(result.get("ResponseCode")) == "0" else "rejected")
+    return result
+
+
+def _query_payload(checkout_request_id):
+    timestamp = _timestamp()
+    return {
+        "BusinessShortCode": settings.MPESA_SHORTCODE,
+        "Password": _password(timestamp),
+        "Timestamp": timestamp,
+        "CheckoutRequestID": checkout_request_id,
+    }
+
+
+def get_access_token():
+    """Get OAuth token from M-Pesa"""
+    api_url, headers = _token_request()
+    response = guarded_request("GET", api_url, headers=headers)
+    return response.json().get("access_token")
+
+
+def initiate_stk_push(phone, amount, account_ref, callback_url):
+    """
+    Initiate STK Push
+    Docs: https://developer.safaricom.co.ke/APIs/STKPush
+    """
+    access_token = get_access_token()
+    if not access_token:
+        return {"ResponseCode": "1", "error": "Failed to get token"}
+
+    api_url = _api_url("/mpesa/stkpush/v1/processrequest")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    payload = _stk_push_payload(phone, amount, account_ref, callback_url)
+
+    response = guarded_request("POST", api_url, json=payload, headers=headers)
+    return _counted(response.json())
+
+
+def query_stk_push(checkout_request_id):
+    """
+    Query the status of an STK Push
+    Docs: https://developer.safaricom.co.ke/APIs/MpesaExpressQuery
+    """
+    access_token = get_access_token()
+    if not access_token:
+        return {"ResponseCode": "1", "error": "Failed to get token"}
+
+    api_url = _api_url("/mpesa/stkpushquery/v1/query")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    payload = _query_payload(checkout_request_id)
+
+    response = guarded_request("POST", api_url, json=payload, headers=headers)
+    return response.json()
+
+
+# ────────────────────── ASYNC (used by the async payment views) ──────────────────────
+async def aget_access_token():
+    api_url, headers = _token_request()
+    response = await aguarded_request("GET", api_url, headers=headers)
+    return response.json().get("access_token")
+
+
+async def ainitiate_stk_push(phone, amount, account_ref, callback_url):
+    """initiate_stk_push() over the async HTTP client."""
+    access_token = await aget_access_token()
+    if not access_token:
+        return {"ResponseCode": "1", "error": "Failed to get token"}
+
+    api_url = _api_url("/mpesa/stkpush/v1/processrequest")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    payload = _stk_push_payload(phone, amount, account_ref, callback_url)
+
+    response = await aguarded_request("POST", api_url, json=payload, headers=headers)
+    return _counted(response.json())
+
+
+async def aquery_stk_push(checkout_request_id):
+    """query_stk_push() over the async HTTP client."""
+    access_token = await aget_access_token()
+    if not access_token:
+        return {"ResponseCode": "1", "error": "Failed to get token"}
+
+    api_url = _api_url("/mpesa/stkpushquery/v1/query")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    payload = _query_payload(checkout_request_id)
+
+    response = await aguarded_request("POST", api_url, json=payload, headers=headers)
+    return response.json()
@@ -0,0 +1,202 @@
+# apps/payments/simulator.py
+"""
+In-process fake of the Daraja endpoints used by apps.payments.services.
+
+Serves OAuth, STK push processrequest and query, and fires the STK
+callback back at CallBackURL. Latency and failure rates are configurable
+so the payment path can be benchmarked without network access.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+class DarajaSimulator:
+    def __init__(self, host="127.0.0.1", port=8001, latency=0.0, jitter=0.0,
+                 failure_rate=0.0, callback_delay=1.0, callback_failure_rate=0.0,
+                 seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.callback_delay = callback_delay
+        self.callback_failure_rate = callback_failure_rate
+        self.random = random.Random(seed)
+        self.tokens = set()
+        self.pushes = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # ────────────────────── behaviour ──────────────────────
+    def _roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def _sleep(self):
+        delay = self.latency
+        if self.jitter:
+            with self.lock:
+                delay += self.random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens.add(token)
+        return {"access_token": token, "expires_in": "3599"}
+
+    def process_request(self, payload):
+        merchant_request_id = f"{self.random.randint(10000, 99999)}-{uuid.uuid4().hex[:8]}"
+        checkout_request_id = f"ws_CO_{uuid.uuid4().hex[:20]}"
+        push = {
+            "MerchantRequestID": merchant_request_id,
+            "CheckoutRequestID": checkout_request_id,
+            "Amount": payload.get("Amount"),
+            "PhoneNumber": payload.get("PhoneNumber"),
+            "CallBackURL": payload.get("CallBackURL"),
+            "ResultCode": None,
+        }
+        with self.lock:
+            self.pushes[checkout_request_id] = push
+
+        timer = threading.Timer(self.callback_delay, self.send_callback, args=[checkout_request_id])
+        timer.daemon = True
+        timer.start()
+
+        return {
+            "MerchantRequestID": merchant_request_id,
+            "CheckoutRequestID": checkout_request_id,
+            "ResponseCode": "0",
+            "ResponseDescription": "Success. Request accepted for processing",
+            "CustomerMessage": "Success. Request accepted for processing",
+        }
+
+    def query(self, payload):
+        with self.lock:
+            push = self.pushes.get(payload.get("CheckoutRequestID"))
+        if push is None:
+            return 404, {"errorCode": "404.001.04", "errorMessage": "Invalid CheckoutRequestID"}
+        if push["ResultCode"] is None:
+            return 500, {"errorCode": "500.001.1001", "errorMessage": "The transaction is being processed"}
+        return 200, {
+            "ResponseCode": "0",
+            "ResponseDescription": "The service request has been accepted successsfully",
+            "MerchantRequestID": push["MerchantRequestID"],
+            "CheckoutRequestID": push["CheckoutRequestID"],
+            "ResultCode": str(push["ResultCode"]),
+            "ResultDesc": _result_desc(push["ResultCode"]),
+        }
+
+    def send_callback(self, checkout_request_id):
+        with self.lock:
+            push = self.pushes[checkout_request_id]
+        result_code = 1032 if self._roll(self.callback_failure_rate) else 0
+        with self.lock:
+            push["ResultCode"] = result_code
+
+        callback = {
+            "MerchantRequestID": push["MerchantRequestID"],
+            "CheckoutRequestID": checkout_request_id,
+            "ResultCode": result_code,
+            "ResultDesc": _result_desc(result_code),
+        }
+        if result_code == 0:
+            callback["CallbackMetadata"] = {"Item": [
+                {"Name": "Amount", "Value": push["Amount"]},
+                {"Name": "MpesaReceiptNumber", "Value": uuid.uuid4().hex[:10].upper()},
+                {"Name": "TransactionDate", "Value": int(time.strftime("%Y%m%d%H%M%S"))},
+                {"Name": "PhoneNumber", "Value": push["PhoneNumber"]},
+            ]}
+
+        if not push["CallBackURL"]:
+            return
+        try:
+            requests.post(push["CallBackURL"], json={"Body": {"stkCallback": callback}}, timeout=10)
+        except requests.RequestException:
+            pass
+
+
+def _result_desc(result_code):
+    if result_code == 0:
+        return "The service request is processed successfully."
+    return "Request cancelled by user"
+
+
+def _handler_for(simulator):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self):
+            auth = self.headers.get("Authorization", "")
+            return auth.startswith("Bearer ") and auth[len("Bearer "):] in simulator.tokens
+
+        def _fail(self):
+            if simulator._roll(simulator.failure_rate):
+                self._send(503, {"errorCode": "503.001.01", "errorMessage": "Service Unavailable"})
+                return True
+            return False
+
+        def do_GET(self):
+            simulator._sleep()
+            if not self.path.startswith("/oauth/v1/generate"):
+                return self._send(404, {"errorMessage": "Not Found"})
+            if self._fail():
+                return
+            if not self.headers.get("Authorization", "").startswith("Basic "):
+                return self._send(400, {"errorMessage": "Invalid Authentication passed"})
+            self._send(200, simulator.issue_token())
+
+        def do_POST(self):
+            simulator._sleep()
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"errorMessage": "Bad Request - Invalid JSON"})
+
+            if self.path not in ("/mpesa/stkpush/v1/processrequest", "/mpesa/stkpushquery/v1/query"):
+                return self._send(404, {"errorMessage": "Not Found"})
+            if not self._authorized():
+                return self._send(401, {"errorCode": "404.001.03", "errorMessage": "Invalid Access Token"})
+            if self._fail():
+                return
+
+            if self.path == "/mpesa/stkpush/v1/processrequest":
+                return self._send(200, simulator.process_request(payload))
+            code, body = simulator.query(payload)
+            self._send(code, body)
+
+    return Handler
@@ -1,11 +1,10 @@
-from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from .views import MpesaTransactionViewSet, mpesa_callback
-
-router = DefaultRouter()
-router.register(r"transactions", MpesaTransactionViewSet)
+from django.urls import path
+from .views import mpesa_callback, c2b_validation, c2b_confirmation, daraja_status, payment_events
 
 urlpatterns = [
-    path("", include(router.urls)),
     path("c2b/", mpesa_callback, name="c2b"),
-]
\ No newline at end of file
+    path("c2b/validation/", c2b_validation, name="c2b-validation"),
+    path("c2b/confirmation/", c2b_confirmation, name="c2b-confirmation"),
+    path("daraja/status/", daraja_status, name="daraja-status"),
+    path("stk/<str:checkout_request_id>/events/", payment_events, name="payment-events"),
+]
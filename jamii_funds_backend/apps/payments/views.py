@@ -1,19 +1,138 @@
-from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+import asyncio
+import json
+import logging
+from decimal import InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.db import IntegrityError
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
-#from .models import MpesaTransaction
-from .serializers import MpesaTransactionSerializer
+from apps.core.async_api import async_endpoint
+from apps.core.metrics import CALLBACKS_IN_PROGRESS, MPESA_CALLBACKS
+from .events import TERMINAL_STATUSES, ensure_listener, hub, payment_event
+from .models import Payment
+from .services.callback_auth import is_daraja
+from .services.callbacks import apply_stk_callback
+from .services import circuit
+from .services.c2b import match_deposits
 
+logger = logging.getLogger(__name__)
 
-class MpesaTransactionViewSet(viewsets.ReadOnlyModelViewSet):
-    #queryset = MpesaTransaction.objects.all()
-    serializer_class = MpesaTransactionSerializer
 
 @api_view(["POST"])
 @csrf_exempt
+@authentication_classes([])
 @permission_classes([AllowAny])
 def mpesa_callback(request):
-    # Simplified callback
-    return Response({"status": "received"}, status=status.HTTP_200_OK)
\ No newline at end of file
+    if not is_daraja(request):
+        return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+    # Daraja expects a 200 even for callbacks we cannot match
+    CALLBACKS_IN_PROGRESS.inc()
+    try:
+        payment = apply_stk_callback(request.data)
+    finally:
+        CALLBACKS_IN_PROGRESS.dec()
+    MPESA_CALLBACKS.inc(kind="stk", outcome="matched" if payment else "unmatched")
+    return Response({"status": "received"}, status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@csrf_exempt
+@authentication_classes([])
+@permission_classes([AllowAny])
+def c2b_validation(request):
+    if not is_daraja(request):
+        return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+    # Accept every paybill deposit; attribution happens on confirmation
+    return Response({"ResultCode": 0, "ResultDesc": "Accepted"})
+
+
+@api_view(["POST"])
+@csrf_exempt
+@authentication_classes([])
+@permission_classes([AllowAny])
+def c2b_confirmation(request):
+    if not is_daraja(request):
+        return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+    CALLBACKS_IN_PROGRESS.inc()
+    try:
+        created = match_deposits([request.data])
+        outcome = "recorded" if created else "duplicate"
+    except IntegrityError:
+        # The same TransID confirmed concurrently; the other request recorded it
+        outcome = "duplicate"
+    except (InvalidOperation, AttributeError):
+        # Malformed payload (bad TransAmount, not an object); a retry won't fix it
+        logger.warning("Unreadable C2B confirmation: %r", request.data)
+        outcome = "invalid"
+    finally:
+        CALLBACKS_IN_PROGRESS.dec()
+    MPESA_CALLBACKS.inc(kind="c2b", outcome=outcome)
+    return Response({"ResultCode": 0, "ResultDesc": "Success"})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def daraja_status(request):
+    """Shared rate limiter and circuit breaker state for outbound Daraja calls"""
+    return Response(circuit.metrics())
+
+
+def _sse(event, retry=None):
+    lines = [f"retry: {retry}"] if retry else []
+    lines += ["event: payment", f"data: {json.dumps(event)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def _payment_stream(key, queue, initial):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SSE_MAX_SECONDS
+    try:
+        yield _sse(initial, retry=3000)
+        current = initial["status"]
+        while current not in TERMINAL_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(settings.SSE_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            current = event["status"]
+            yield _sse(event)
+    finally:
+        hub.unsubscribe(key, queue)
+
+
+@async_endpoint(["GET"])
+async def payment_events(request, checkout_request_id):
+    """
+    Server-Sent Events stream of one STK push's status, replacing polling
+    GET /api/payments/stk/<checkout_request_id>/events/
+    Sends the current state, then every change until Completed/Failed.
+    """
+    key = (request.tenant.schema_name, checkout_request_id)
+    # Subscribe before reading the current state so no transition is missed
+    queue = hub.subscribe(key)
+    if queue is None:
+        return JsonResponse({"error": "Too many open status streams, please retry"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "5"})
+    payment = await Payment.objects.filter(
+        checkout_request_id=checkout_request_id, member__user=request.user
+    ).afirst()
+    if payment is None:
+        hub.unsubscribe(key, queue)
+        return JsonResponse({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
+    await sync_to_async(ensure_listener)()
+    initial = await sync_to_async(payment_event)(payment)
+
+    response = StreamingHttpResponse(_payment_stream(key, queue, initial), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"   # don't let nginx buffer the stream
+    return response
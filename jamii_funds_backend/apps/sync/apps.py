@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.sync"
+    label = "sync"
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+
+        from .models import SyncTracked, record_tombstone
+
+        for model in self.apps.get_models():
+            if issubclass(model, SyncTracked):
+                post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"sync-tombstone-{model._meta.label}")
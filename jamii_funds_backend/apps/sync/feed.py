@@ -0,0 +1,138 @@
+# apps/sync/feed.py
+"""
+Delta-sync change feed.
+
+A sync token is "<shard>:<usn>". The response holds every tracked row
+and tombstone with usn >= token. Rows are columnar: field names once per
+feed, then one list of values per row. The next token is the snapshot
+xmin taken before reading. Every transaction still in flight at that
+moment has an id >= xmin, so its rows come back next time and a row
+committed late is never skipped. A client may see a row twice, so it
+must apply rows as upserts.
+
+Pages end on a USN boundary. That keeps all rows written by one
+transaction in the same page.
+
+Tombstones are filtered like the feeds they belong to (_tombstone_scope).
+A token older than the tombstone horizon gets "reset": the deletes it
+would need were pruned.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Max, Q
+
+from apps.chamas.models import Chama, Member
+from apps.contributions.models import Contribution
+from apps.payments.models import Payment
+
+from .models import Tombstone, TombstoneHorizon
+
+# feed name -> (model, fields sent, lookup restricting rows to the caller)
+FEEDS = {
+    "chamas": (Chama, ("id", "name", "description", "created_by_id", "created_at"), None),
+    "members": (Member, ("id", "chama_id", "user_id", "role", "joined_at"), "chama__membership__user"),
+    "contributions": (Contribution, ("id", "member_id", "type_id", "amount", "date", "reference"), "member__user"),
+    "payments": (Payment, ("id", "member_id", "amount", "status", "checkout_request_id", "created_at"), "member__user"),
+}
+FEED_BY_LABEL = {model._meta.label_lower: name for name, (model, _, _) in FEEDS.items()}
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def make_token(shard, usn):
+    return f"{shard}:{usn}"
+
+
+def parse_token(token, shard):
+    """Return the usn to sync from; 0 (full sync) for no token or another shard's token."""
+    if not token:
+        return 0, False
+    alias, _, usn = token.rpartition(":")
+    try:
+        usn = int(usn)
+    except ValueError:
+        raise InvalidToken(token)
+    if alias != shard:
+        # The tenant moved shards; transaction ids are per database
+        return 0, True
+    return max(usn, 0), False
+
+
+def snapshot_xmin(using):
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return cursor.fetchone()[0]
+
+
+def _tombstone_scope(user):
+    # Mirrors the FEEDS owners: chamas are public, members are visible within
+    # the user's chamas (and their own), contributions/payments to their member
+    memberships = Member.objects.filter(user=user)
+    return (
+        Q(chama_id__isnull=True, member_id__isnull=True, user_id__isnull=True)
+        | Q(user_id=user.pk)
+        | Q(member_id__in=memberships.values("pk"))
+        | Q(member_id__isnull=True, chama_id__in=memberships.values("chama_id"))
+    )
+
+
+def _feed_querysets(user, since, upto):
+    querysets = {}
+    for name, (model, fields, owner) in FEEDS.items():
+        qs = model.objects.filter(usn__gte=since)
+        if owner:
+            qs = qs.filter(**{owner: user})
+        if upto is not None:
+            qs = qs.filter(usn__lt=upto)
+        querysets[name] = qs.order_by("usn", "pk").values_list("usn", *fields)
+    tombstones = Tombstone.objects.filter(_tombstone_scope(user), usn__gte=since)
+    if upto is not None:
+        tombstones = tombstones.filter(usn__lt=upto)
+    querysets[None] = tombstones.order_by("usn", "pk").values_list("usn", "model", "object_id")
+    return querysets
+
+
+async def _read(querysets, limit):
+    return {
+        name: [row async for row in (qs if limit is None else qs[:limit + 1])]
+        for name, qs in querysets.items()
+    }
+
+
+async def changes_since(user, shard, token, limit=None):
+    limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_PAGE_SIZE)
+    since, reset = parse_token(token, shard)
+    horizon = (await TombstoneHorizon.objects.aaggregate(usn=Max("usn")))["usn"]
+    if since and horizon is not None and since <= horizon:
+        since, reset = 0, True
+    watermark = await sync_to_async(snapshot_xmin)(router.db_for_read(Payment))
+
+    rows = await _read(_feed_querysets(user, since, None), limit)
+    # Cut the page at the lowest USN some feed could not fit
+    cut = min((r[limit][0] for r in rows.values() if len(r) > limit), default=None)
+    if cut is not None and cut <= since:
+        # One transaction wrote more than a page; send all of it
+        cut = since + 1
+        rows = await _read(_feed_querysets(user, since, cut), None)
+    elif cut is not None:
+        rows = {name: [row for row in r if row[0] < cut] for name, r in rows.items()}
+
+    next_usn = max(since, watermark if cut is None else min(cut, watermark))
+    payload = {
+        "token": make_token(shard, next_usn),
+        "more": cut is not None and next_usn > since,
+        "reset": reset or since == 0,
+        "changes": {},
+        "deleted": {},
+    }
+    for name, (model, fields, _) in FEEDS.items():
+        if rows[name]:
+            payload["changes"][name] = {"fields": fields, "rows": [row[1:] for row in rows[name]]}
+    for _, label, object_id in rows[None]:
+        name = FEED_BY_LABEL.get(label)
+        if name:
+            payload["deleted"].setdefault(name, []).append(object_id)
+    return payload
@@ -0,0 +1,26 @@
+# apps/sync/management/commands/prune_tombstones.py
+"""
+Delete delta-sync tombstones past their retention in the current schema.
+Run it across tenants with:
+
+    python manage.py parallel_tenant_command -- prune_tombstones
+"""
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.sync.models import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS (current schema)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options["days"])
+        deleted = prune_tombstones(cutoff)
+        self.stdout.write(f"Pruned {deleted} tombstones older than {cutoff:%Y-%m-%d}")
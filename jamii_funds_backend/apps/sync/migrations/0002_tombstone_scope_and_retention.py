@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TombstoneHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usn', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='chama_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='deleted_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='member_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='user_id',
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
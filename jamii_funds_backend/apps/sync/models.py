@@ -0,0 +1,91 @@
+# apps/sync/models.py
+"""
+Update sequence numbers (USNs) for the delta-sync feed.
+
+Every save of a SyncTracked row stamps it with the id of the writing
+transaction (txid_current()), which only grows, and every delete leaves a
+Tombstone stamped the same way. /api/sync/?since=<token> then reads only
+rows with usn >= token (see feed.py). Code that bypasses save() (bulk_create,
+QuerySet.update) must set usn itself, e.g. usn=TxidCurrent().
+
+Tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS are pruned
+(prune_tombstones); TombstoneHorizon remembers the highest pruned usn so
+older tokens get a full resync instead of silently missing deletes.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.utils import timezone
+
+
+class TxidCurrent(models.Func):
+    template = "txid_current()"
+    output_field = models.BigIntegerField()
+
+
+def current_usn(using=DEFAULT_DB_ALIAS):
+    """The current transaction's USN, for rows written without save()."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT txid_current()")
+        return cursor.fetchone()[0]
+
+
+class SyncTracked(models.Model):
+    # 0 until first saved after this field was added; a full sync (since=0) still returns it
+    usn = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Evaluated by the INSERT/UPDATE itself; reload the row to read the value
+        self.usn = TxidCurrent()
+        update_fields = kwargs.get("update_fields")
+        if update_fields:
+            kwargs["update_fields"] = {*update_fields, "usn"}
+        super().save(*args, **kwargs)
+
+
+class Tombstone(models.Model):
+    model = models.CharField(max_length=100)      # label_lower, e.g. "chamas.chama"
+    object_id = models.BigIntegerField()
+    usn = models.BigIntegerField(db_index=True)
+    # Who may see it (feed.py); copied from the deleted row, null if it had none
+    chama_id = models.BigIntegerField(null=True)
+    member_id = models.BigIntegerField(null=True)
+    user_id = models.BigIntegerField(null=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted @ {self.usn}"
+
+
+class TombstoneHorizon(models.Model):
+    """Highest usn of a pruned tombstone; tokens at or below it must resync."""
+    usn = models.BigIntegerField()
+
+    def __str__(self):
+        return f"tombstones pruned up to {self.usn}"
+
+
+def record_tombstone(sender, instance, using, **kwargs):
+    Tombstone.objects.using(using).create(
+        model=sender._meta.label_lower, object_id=instance.pk, usn=TxidCurrent(),
+        chama_id=getattr(instance, "chama_id", None),
+        member_id=getattr(instance, "member_id", None),
+        user_id=getattr(instance, "user_id", None),
+    )
+
+
+def prune_tombstones(cutoff):
+    """Delete tombstones older than cutoff and move the horizon past them."""
+    old = Tombstone.objects.filter(deleted_at__lt=cutoff)
+    newest = old.aggregate(usn=models.Max("usn"))["usn"]
+    if newest is None:
+        return 0
+    horizon = TombstoneHorizon.objects.first()
+    if horizon is None:
+        TombstoneHorizon.objects.create(usn=newest)
+    elif newest > horizon.usn:
+        horizon.usn = newest
+        horizon.save(update_fields=["usn"])
+    deleted, _ = old.filter(usn__lte=newest).delete()
+    return deleted
@@ -0,0 +1,29 @@
+# apps/sync/views.py
+from django.db import DEFAULT_DB_ALIAS
+from django.http import JsonResponse
+from rest_framework import status
+
+from apps.core.async_api import async_endpoint
+
+from .feed import InvalidToken, changes_since
+
+
+@async_endpoint(["GET"])
+async def sync(request):
+    """
+    Changes since the client's last sync
+    GET /api/sync/?since=<token>&limit=500
+    Omit `since` for a full download. Keep calling with the returned token
+    while "more" is true. "reset": true means drop local data and apply
+    this response as the full state.
+    """
+    try:
+        limit = int(request.GET.get("limit", 0)) or None
+    except ValueError:
+        limit = None
+    shard = getattr(request.tenant, "shard", None) or DEFAULT_DB_ALIAS
+    try:
+        payload = await changes_since(request.user, shard, request.GET.get("since"), limit=limit)
+    except InvalidToken:
+        return JsonResponse({"error": "Invalid sync token"}, status=status.HTTP_400_BAD_REQUEST)
+    return JsonResponse(payload, json_dumps_params={"separators": (",", ":")})
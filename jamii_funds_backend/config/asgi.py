@@ -1,5 +1,13 @@
+# config/asgi.py
+"""
+ASGI entry point. The hot API paths are async views (apps/core/async_api.py),
+so one worker serves many requests that are waiting on the database or
+Daraja:
+
+    uvicorn config.asgi:application --workers 4
+"""
 import os
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
-application = get_asgi_application()
\ No newline at end of file
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev')
+application = get_asgi_application()
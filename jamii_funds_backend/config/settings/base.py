@@ -17,6 +17,12 @@ TENANT_MODEL = "auth_app.Client"
 TENANT_DOMAIN_MODEL = "auth_app.Domain"
 
 PUBLIC_SCHEMA_NAME = 'public'
+# Fully migrated schema that django-tenants clones new tenants from, faking
+# their migrations (apps/auth_app/schema_templates.py)
+TENANT_BASE_SCHEMA = os.environ.get("TENANT_BASE_SCHEMA", "tenant_template")
+TENANT_CREATION_FAKES_MIGRATIONS = True
+# Ready, unassigned schemas kept by `manage.py maintain_schema_pool` (0 disables the pool)
+TENANT_SCHEMA_POOL_SIZE = int(os.environ.get("TENANT_SCHEMA_POOL_SIZE", "10"))
 SHOW_PUBLIC_SCHEMA = True
 # PUBLIC_SCHEMA_URLCONF = "config.public_urls"   # ← DELETED FOREVER — THIS WAS THE ROOT OF ALL EVIL
 
@@ -39,18 +45,24 @@ TENANT_APPS = [
     'apps.chamas',        # ← THESE ARE THE APPS THAT GET MIGRATED INTO EACH TENANT
     'apps.payments',
     'apps.contributions',
+    'apps.sync',          # ← delta-sync change feed (usn + tombstones)
 ]
 
 INSTALLED_APPS = SHARED_APPS + TENANT_APPS
 
 MIDDLEWARE = [
-    
-    'django_tenants.middleware.main.TenantMainMiddleware',  # ← MUST BE FIRST
+    'apps.core.middleware.InstrumentationMiddleware',       # ← outermost, so it times the whole stack
+    'apps.core.middleware.TenantConnectionMiddleware',      # ← resets reused connections to public
+    'django_tenants.middleware.main.TenantMainMiddleware',  # ← MUST BE FIRST tenant middleware
     'apps.core.dev_middleware.ForceKibeMiddleware',
     'apps.core.middleware.HeaderTenantMiddleware',
+    'apps.core.middleware.TenantShardMiddleware',  # ← after every middleware that picks the tenant
+    'apps.core.middleware.ReplicaRoutingMiddleware',
+    'apps.core.middleware.ProfilingMiddleware',              # ← needs request.tenant
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'apps.core.middleware.RateLimitMiddleware',             # ← inside Cors, so browsers can read a 429; before the view runs
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -59,22 +71,61 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "config.urls"   # ← single urls.py for public + tenants
 
-DATABASE_ROUTERS = ("django_tenants.routers.TenantSyncRouter",)
+DATABASE_ROUTERS = (
+    "apps.auth_app.routers.ShardRouter",              # ← shard-aware, must come first
+    "django_tenants.routers.TenantSyncRouter",
+)
 
 # ────────────────────────────────────────
 # DATABASE
 # ────────────────────────────────────────
 DATABASES = {
     "default": {
-        "ENGINE": "django_tenants.postgresql_backend",
+        "ENGINE": "apps.core.postgresql_backend",   # ← django-tenants + search_path tracking
         "NAME": "jamii_funds_saas",
         "USER": "postgres",
         "PASSWORD": "Matumboya1*",
         "HOST": "localhost",
         "PORT": "5432",
+        # Persistent connections; the backend only re-sends SET search_path
+        # when the tenant changes (apps/core/postgresql_backend/base.py)
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Behind pgbouncer in transaction pooling mode the search_path is only ever
+# set with SET LOCAL, so it cannot leak to another client's server
+# connection (apps/core/postgresql_backend/base.py). Server-side cursors,
+# which outlive a transaction, are off. Not ATOMIC_REQUESTS: Django refuses
+# it for async views.
+if os.environ.get("DB_TRANSACTION_POOLING", "").lower() in ("1", "true", "yes"):
+    DATABASES["default"].update(
+        TRANSACTION_POOLING=True,
+        DISABLE_SERVER_SIDE_CURSORS=True,
+    )
+
+# Extra tenant shards, e.g. TENANT_SHARDS="shard_1,shard_2". Each gets its own
+# database (<NAME>_<alias>) on the same server unless overridden here;
+# Client.shard picks the alias for each tenant.
+for _alias in filter(None, os.environ.get("TENANT_SHARDS", "").split(",")):
+    DATABASES[_alias.strip()] = {**DATABASES["default"], "NAME": f"{DATABASES['default']['NAME']}_{_alias.strip()}"}
+
+# Read replica of `default`. For local testing point it at the same server:
+# DATABASE_REPLICA_HOST=localhost gives a second alias on the primary.
+DATABASE_REPLICAS = {}   # primary alias → replica alias
+if os.environ.get("DATABASE_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["DATABASE_REPLICA_HOST"],
+        "PORT": os.environ.get("DATABASE_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS["default"] = "replica"
+REPLICA_PIN_SECONDS = float(os.environ.get("REPLICA_PIN_SECONDS", "5"))      # read-your-writes window
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", "2"))              # seconds
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", "5"))
+
 # ────────────────────────────────────────
 # TEMPLATES / STATIC / MEDIA
 # ────────────────────────────────────────
@@ -106,7 +157,166 @@ MEDIA_ROOT = BASE_DIR / "media"
 # ────────────────────────────────────────
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "apps.auth_app.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
-}
\ No newline at end of file
+    # orjson-backed (apps/api/renderers.py)
+    "DEFAULT_RENDERER_CLASSES": [
+        "apps.api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.api.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+# POST /api/batch/ (apps/api/batch.py)
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "20"))
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "4"))   # threads (and DB connections) per worker process
+
+# Rows per batch for ?stream=1 list responses (apps/api/streaming.py)
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "2000"))
+
+# Delta-sync (apps/sync/feed.py): soft cap on rows per feed per page
+SYNC_PAGE_SIZE = int(os.environ.get("SYNC_PAGE_SIZE", "500"))
+# Tombstones older than this are deleted by prune_tombstones; clients that
+# last synced before that get a full resync
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+
+# Per-process token → user cache used by CachedTokenAuthentication; entries are
+# checked against a per-user stamp in CACHES, so share that cache between workers
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get("TOKEN_AUTH_CACHE_SIZE", "10000"))
+TOKEN_AUTH_CACHE_TTL = float(os.environ.get("TOKEN_AUTH_CACHE_TTL", "60"))  # seconds
+
+# ────────────────────────────────────────
+# M-PESA (DARAJA)
+# ────────────────────────────────────────
+# Point MPESA_BASE_URL at `manage.py run_daraja_simulator` to exercise the
+# payment path locally without touching Safaricom's sandbox.
+MPESA_BASE_URL = os.environ.get("MPESA_BASE_URL", "https://sandbox.safaricom.co.ke")
+MPESA_CONSUMER_KEY = os.environ.get("MPESA_CONSUMER_KEY", "")
+MPESA_CONSUMER_SECRET = os.environ.get("MPESA_CONSUMER_SECRET", "")
+MPESA_SHORTCODE = os.environ.get("MPESA_SHORTCODE", "174379")
+MPESA_PASSKEY = os.environ.get("MPESA_PASSKEY", "")
+MPESA_TIMEOUT = float(os.environ.get("MPESA_TIMEOUT", "10"))
+# Callbacks must come from Daraja (apps/payments/services/callback_auth.py):
+# a secret appended to every callback URL, and/or Safaricom's source IPs
+MPESA_CALLBACK_TOKEN = os.environ.get("MPESA_CALLBACK_TOKEN", "")
+MPESA_CALLBACK_ALLOWED_IPS = frozenset(ip.strip() for ip in os.environ.get("MPESA_CALLBACK_ALLOWED_IPS", "").split(",") if ip.strip())
+# Pooled connections per event loop for the async payment path
+MPESA_MAX_CONNECTIONS = int(os.environ.get("MPESA_MAX_CONNECTIONS", "100"))
+
+# Shared across workers through CACHES (see apps/payments/services/circuit.py)
+MPESA_RATE_LIMIT = float(os.environ.get("MPESA_RATE_LIMIT", "20"))      # requests / second
+MPESA_RATE_BURST = float(os.environ.get("MPESA_RATE_BURST", "40"))
+MPESA_RATE_MAX_WAIT = float(os.environ.get("MPESA_RATE_MAX_WAIT", "1"))  # seconds to wait for a token
+MPESA_BREAKER_THRESHOLD = int(os.environ.get("MPESA_BREAKER_THRESHOLD", "5"))
+MPESA_BREAKER_COOLDOWN = float(os.environ.get("MPESA_BREAKER_COOLDOWN", "30"))
+
+# Payment status stream (apps/payments/events.py). Relay events between
+# workers with Postgres LISTEN/NOTIFY; turn off for a single worker.
+PAYMENT_EVENTS_NOTIFY = os.environ.get("PAYMENT_EVENTS_NOTIFY", "true").lower() in ("1", "true", "yes")
+SSE_MAX_SUBSCRIBERS = int(os.environ.get("SSE_MAX_SUBSCRIBERS", "5000"))   # per worker
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_MAX_SECONDS = float(os.environ.get("SSE_MAX_SECONDS", "180"))          # STK prompts expire well before this
+
+# ────────────────────────────────────────
+# CACHE
+# ────────────────────────────────────────
+# Use Redis or DatabaseCache when running more than one worker so that
+# cache-backed state (Daraja limiter/breaker) is shared between them.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "jamii-funds"),
+    }
+}
+
+# ────────────────────────────────────────
+# LOGIN PASSWORD HASHING (apps/auth_app/hashing.py)
+# ────────────────────────────────────────
+LOGIN_HASH_EXECUTOR = os.environ.get("LOGIN_HASH_EXECUTOR", "thread")   # "thread" or "process"
+LOGIN_HASH_WORKERS = int(os.environ.get("LOGIN_HASH_WORKERS", os.cpu_count() or 1))
+LOGIN_HASH_MAX_PENDING = int(os.environ.get("LOGIN_HASH_MAX_PENDING", "256"))
+# Hasher algorithm users are migrated to on successful login (None = PASSWORD_HASHERS[0])
+LOGIN_PREFERRED_HASHER = os.environ.get("LOGIN_PREFERRED_HASHER") or None
+
+# POST /api/auth/provision/ (apps/auth_app/provisioning.py); larger rosters go
+# through `manage.py provision_users`, which may hash in a process pool
+PROVISION_HASH_THREADS = int(os.environ.get("PROVISION_HASH_THREADS", os.cpu_count() or 1))
+PROVISION_MAX_ROWS = int(os.environ.get("PROVISION_MAX_ROWS", "2000"))
+
+# ────────────────────────────────────────
+# LOGGING & INSTRUMENTATION (apps/core/logs.py, apps/core/instrumentation.py)
+# ────────────────────────────────────────
+PERF_INSTRUMENTATION = os.environ.get("PERF_INSTRUMENTATION", "1") == "1"
+PERF_SLOW_QUERIES = int(os.environ.get("PERF_SLOW_QUERIES", "3"))            # slowest statements kept per request
+PERF_SQL_MAX_LENGTH = int(os.environ.get("PERF_SQL_MAX_LENGTH", "300"))
+PERF_SLOW_REQUEST_MS = float(os.environ.get("PERF_SLOW_REQUEST_MS", "500"))  # logged at WARNING from here
+PERF_SERVER_TIMING = os.environ.get("PERF_SERVER_TIMING", "1" if DEBUG else "0") == "1"
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "apps.core.logs.JSONFormatter"},
+    },
+    "handlers": {
+        # Formats and writes on a background thread
+        "background": {"class": "apps.core.logs.BackgroundHandler", "formatter": "json"},
+    },
+    "loggers": {
+        "apps": {"handlers": ["background"], "level": LOG_LEVEL, "propagate": False},
+        "jamii.perf": {"handlers": ["background"], "level": os.environ.get("PERF_LOG_LEVEL", "INFO"),
+                       "propagate": False},
+    },
+}
+
+# Metrics (apps/core/metrics.py). With several worker processes set METRICS_DIR
+# to a per-host directory they share; empty it on deploy.
+METRICS_NAMESPACE = "jamii"
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "5"))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")   # scrapers send "Authorization: Bearer <token>"
+
+# On-demand request profiling (apps/core/profiling.py, `manage.py profiles`)
+PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED", "1") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", str(BASE_DIR.parent / "profiles"))
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "cprofile")        # "cprofile" or "sample" (sync requests)
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_TOKEN_MAX_AGE = int(os.environ.get("PROFILE_TOKEN_MAX_AGE", "3600"))
+PROFILE_TOGGLE_REFRESH = float(os.environ.get("PROFILE_TOGGLE_REFRESH", "5"))
+PROFILE_TOGGLE_MAX_MINUTES = float(os.environ.get("PROFILE_TOGGLE_MAX_MINUTES", "240"))
+# Always-on sampling per tenant, e.g. PROFILE_TENANT_RATES="kibe=0.01,acme=0.05"
+PROFILE_TENANT_RATES = {
+    schema: float(rate)
+    for schema, _, rate in (item.partition("=") for item in os.environ.get("PROFILE_TENANT_RATES", "").split(",") if item)
+}
+
+# Per-tenant and per-token request limits (apps/core/ratelimit.py). Counters
+# live in RATE_LIMIT_CACHE; point it at Redis/memcached so every worker
+# shares them. If that cache fails, each process counts locally for
+# RATE_LIMIT_FALLBACK_SECONDS before retrying it.
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_CACHE = os.environ.get("RATE_LIMIT_CACHE", "default")
+RATE_LIMIT_WINDOW = int(os.environ.get("RATE_LIMIT_WINDOW", "60"))   # seconds
+RATE_LIMIT_FALLBACK_SECONDS = float(os.environ.get("RATE_LIMIT_FALLBACK_SECONDS", "30"))
+# Client.plan -> (requests per window per tenant, per API token); 0 = unlimited.
+# Override with e.g. RATE_LIMIT_PLANS="free=300/60,premium=12000/2400"
+RATE_LIMIT_PLANS = {
+    "free": (300, 60),
+    "standard": (1200, 240),
+    "premium": (6000, 1200),
+    "enterprise": (30000, 6000),
+}
+RATE_LIMIT_PLANS.update({
+    plan: tuple(int(n) for n in limits.split("/"))
+    for plan, _, limits in (item.partition("=") for item in os.environ.get("RATE_LIMIT_PLANS", "").split(",") if item)
+})
+# Never limited: Daraja callbacks must not be dropped, scrapers poll /metrics
+RATE_LIMIT_EXEMPT_PATHS = ("/metrics", "/api/payments/c2b/")
+# Let browser clients read when to retry a 429
+CORS_EXPOSE_HEADERS = ["Retry-After", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset"]
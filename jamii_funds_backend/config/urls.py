@@ -5,6 +5,8 @@ from django.urls import path, include
 from django.http import HttpResponse
 from django_tenants.utils import get_public_schema_name
 
+from apps.core.metrics import metrics_view
+
 
 def landing_page(request):
     if request.tenant.schema_name != get_public_schema_name():
@@ -18,9 +20,12 @@ def landing_page(request):
 urlpatterns = [
     path('', landing_page),
 
+    path('metrics', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.auth_app.urls')),
     path('api-auth/', include('rest_framework.urls')),
+    path('api/payments/', include('apps.payments.urls')),
+    path('api/sync/', include('apps.sync.urls')),
 
     # THIS LINE MAKES /api/chamas/ WORK
     path('api/', include('apps.api.urls')),